@@ -1,197 +1,273 @@
-import asyncio
-import logging
-from datetime import datetime, timedelta
-from zoneinfo import ZoneInfo
-from aiohttp import ClientSession
-from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant, ServiceCall
-from homeassistant.helpers.update_coordinator import DataUpdateCoordinator
-from homeassistant.helpers.entity_registry import async_get as async_get_entity_registry
-from homeassistant.helpers.restore_state import RestoreStateData
-from .const import DOMAIN, SCHEDULE_ENDPOINTS
-from .utils import get_tesy_device_type
-from .services import register_set_vacation_mode_service
-
-_LOGGER = logging.getLogger(__name__)
-
-async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry):
-    """Set up Tesy integration from a config entry."""
-
-    try:
-        _LOGGER.info("Setting up Tesy integration for entry: %s", entry.entry_id)
-
-        # Initialize API details and device-specific data
-        api_url = f"http://{entry.data['ip']}"
-        await register_set_vacation_mode_service(hass, api_url)
-        devid = entry.data.get("device_id")
-        macaddr = entry.data.get("macaddr")
-
-        if not devid:
-            _LOGGER.error("Device ID is missing in the config entry.")
-            return False
-
-        # Fetch device type details
-        device_type = get_tesy_device_type(devid)
-        device_name = f"Tesy {device_type.get('name', 'Device')}"
-        min_setpoint = device_type.get('min_setpoint', 8)
-        max_setpoint = device_type.get('max_setpoint', 75)
-
-        # Store these attributes in `hass.data`
-        hass.data.setdefault(DOMAIN, {})
-        hass.data[DOMAIN][entry.entry_id] = {
-            "api_url": api_url,
-            "device_id": devid,
-            "macaddr": macaddr,
-            "device_name": device_name,
-            "min_setpoint": min_setpoint,
-            "max_setpoint": max_setpoint,
-        }
-
-        # Create dynamic entities using entity registry
-        entity_registry = async_get_entity_registry(hass)
-        entity_prefix = f"tesy_{entry.entry_id}"
-        vacation_datetime_entity = f"input_datetime.{entity_prefix}_vacation_end"
-        vacation_temp_entity = f"input_number.{entity_prefix}_temp_after_vacation"
-
-        # Check and create input_datetime entity
-        if not entity_registry.async_get(vacation_datetime_entity):
-            hass.states.async_set(
-                vacation_datetime_entity,
-                None,
-                {
-                    "name": f"Tesy Vacation End {entry.entry_id}",
-                    "has_date": True,
-                    "has_time": True,
-                },
-            )
-
-        # Check and create input_number entity
-        if not entity_registry.async_get(vacation_temp_entity):
-            hass.states.async_set(
-                vacation_temp_entity,
-                None,
-                {
-                    "name": f"Tesy Temp After Vacation {entry.entry_id}",
-                    "min": min_setpoint,
-                    "max": max_setpoint,
-                    "step": 1,
-                },
-            )
-
-        # Store dynamic entities in `hass.data`
-        hass.data[DOMAIN][entry.entry_id].update({
-            "vacation_datetime_entity": vacation_datetime_entity,
-            "vacation_temp_entity": vacation_temp_entity,
-        })
-
-        # Create a DataUpdateCoordinator
-        async def async_fetch_data():
-            """Fetch data from the Tesy API."""
-            data = {}
-            try:
-                _LOGGER.debug("Fetching data from Tesy API for device %s", devid)
-                async with ClientSession() as session:
-                    for endpoint in ["status", "calcRes", "devstat"]:
-                        async with session.get(f"{api_url}/{endpoint}") as response:
-                            if response.status == 200:
-                                endpoint_data = await response.json(content_type=None)
-                                if endpoint_data:
-                                    data[endpoint] = endpoint_data
-                                else:
-                                    _LOGGER.warning("Empty %s data received.", endpoint)
-                            else:
-                                _LOGGER.error("Failed to fetch %s: HTTP %d", endpoint, response.status)
-
-                    # Fetch schedules (P1, P2, P3, Vacation)
-                    for schedule, endpoint in SCHEDULE_ENDPOINTS.items():
-                        async with session.get(f"{api_url}/{endpoint}") as response:
-                            if response.status == 200:
-                                schedule_data = await response.json(content_type=None)
-                                if schedule_data:
-                                    data[schedule] = schedule_data
-                                else:
-                                    _LOGGER.warning("Empty schedule data for %s received.", schedule)
-                            else:
-                                _LOGGER.error("Failed to fetch schedule %s: HTTP %d", schedule, response.status)
-            except Exception as e:
-                _LOGGER.error("Error fetching data from Tesy API: %s", e)
-            return data
-
-        coordinator = DataUpdateCoordinator(
-            hass,
-            _LOGGER,
-            name="tesy",
-            update_method=async_fetch_data,
-            update_interval=timedelta(seconds=60),
-        )
-
-        # Perform the first refresh
-        await coordinator.async_config_entry_first_refresh()
-
-        # Update `hass.data` with coordinator
-        hass.data[DOMAIN][entry.entry_id].update({
-            "coordinator": coordinator,
-        })
-        _LOGGER.debug("Coordinator data update completed for entry: %s", entry.entry_id)
-
-        # Forward entry setup to platforms
-        await hass.config_entries.async_forward_entry_setups(entry, ["water_heater", "sensor", "switch"])
-
-        # Register the refresh service
-        async def handle_refresh_service(call: ServiceCall):
-            """Handle refresh service call."""
-            _LOGGER.info("Received request to refresh Tesy data for device %s", devid)
-            await coordinator.async_request_refresh()
-
-        hass.services.async_register(DOMAIN, "refresh", handle_refresh_service)
-
-        # Register the update device time service
-        async def async_update_device_time(call: ServiceCall):
-            """Handle the service call to update device time."""
-            device = hass.data[DOMAIN].get(entry.entry_id)
-            if not device:
-                _LOGGER.error("Device not found for time update.")
-                return
-
-            # Fetch current time from Home Assistant's time zone
-            timezone = hass.config.time_zone
-            local_time = datetime.now(ZoneInfo(timezone))
-            t_offset = timezone.replace("/", "").replace(":", "")
-            url = (
-                f"{device['api_url']}/setdate?"
-                f"tOffset={t_offset}&tDay={local_time.day}"
-                f"&tMonth={local_time.month}&tYear={local_time.year}"
-                f"&tHour={local_time.hour}&tMin={local_time.minute}&tSec={local_time.second}"
-            )
-
-            try:
-                async with ClientSession() as session:
-                    async with session.get(url) as response:
-                        if response.status == 200:
-                            _LOGGER.info("Successfully updated device time to %s", local_time)
-                        else:
-                            _LOGGER.error("Failed to update time: HTTP %s", response.status)
-            except Exception as e:
-                _LOGGER.error("Error updating device time: %s", e)
-
-        hass.services.async_register(DOMAIN, "update_device_time", async_update_device_time)
-
-        # Add an update listener for options changes
-        async def update_listener(hass, entry):
-            """Handle options updates."""
-            _LOGGER.info("Options for Tesy integration have been updated.")
-            await hass.config_entries.async_reload(entry.entry_id)
-
-        entry.async_on_unload(entry.add_update_listener(update_listener))
-        return True
-
-    except Exception as e:
-        _LOGGER.error("Failed to set up Tesy integration: %s", e)
-        return False
-
-async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry):
-    """Unload a config entry."""
-    unload_ok = await hass.config_entries.async_unload_platforms(entry, ["water_heater", "sensor", "switch"])
-    if unload_ok:
-        hass.data[DOMAIN].pop(entry.entry_id)
-    return unload_ok
+import asyncio
+import logging
+from datetime import timedelta
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.exceptions import ConfigEntryNotReady
+from homeassistant.core import HomeAssistant, ServiceCall
+from homeassistant.helpers import config_validation as cv
+from homeassistant.helpers.dispatcher import async_dispatcher_send
+from homeassistant.helpers.entity_registry import async_get as async_get_entity_registry
+from homeassistant.helpers.restore_state import RestoreStateData
+from .const import (
+    DOMAIN,
+    HTTP_TIMEOUT,
+    POLL_BUDGET_RATIO,
+    ENDPOINT_REFRESH_INTERVALS,
+    DEFAULT_STATUS_INTERVAL,
+    CONF_STATUS_INTERVAL,
+    CONF_POLL_BUDGET,
+    CONF_ENDPOINT_TIMEOUT,
+    CONF_DRIFT_THRESHOLD,
+    DEFAULT_DRIFT_THRESHOLD,
+    SIGNAL_FLEET_UPDATED,
+)
+from .utils import get_tesy_device_type, async_set_device_time
+from .capabilities import get_capability_profile, async_get_supported_endpoints
+from .coordinator import TesyDataUpdateCoordinator
+from .transitions import async_setup_transition_events
+from .cycles import async_setup_cycle_detector
+from .thermal import async_setup_thermal_model
+from .draws import async_setup_draw_detector
+from .scheduler import async_get_scheduler
+from .journal import async_setup_command_journal
+from .clock import async_setup_clock_monitor
+from .anomaly import async_setup_anomaly_detector
+from .availability import async_load_availability
+from .websocket_api import async_setup_websocket_api
+from .services import (
+    register_set_vacation_mode_service,
+    register_optimize_program_service,
+    register_set_power_cap_service,
+    register_profile_service,
+    register_import_devices_service,
+    register_snapshot_services,
+    register_availability_report_service,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+PLATFORMS = ["water_heater", "sensor", "switch", "binary_sensor", "calendar"]
+
+CONFIG_SCHEMA = cv.config_entry_only_config_schema(DOMAIN)
+
+async def async_setup(hass: HomeAssistant, config):
+    """Register the services and websocket commands that must exist before any device is configured."""
+    await register_import_devices_service(hass)
+    # Push compact fleet snapshots to `tesy/subscribe` websocket clients
+    async_setup_websocket_api(hass)
+    return True
+
+async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry):
+    """Set up Tesy integration from a config entry."""
+
+    try:
+        _LOGGER.info("Setting up Tesy integration for entry: %s", entry.entry_id)
+
+        # Initialize API details and device-specific data
+        api_url = f"http://{entry.data['ip']}"
+        await register_set_vacation_mode_service(hass, api_url)
+        devid = entry.data.get("device_id")
+        macaddr = entry.data.get("macaddr")
+
+        if not devid:
+            _LOGGER.error("Device ID is missing in the config entry.")
+            return False
+
+        # Fetch device type details
+        device_type = get_tesy_device_type(devid)
+        # Bulk-imported entries carry the name given in the device list
+        device_name = entry.data.get("device_name") or f"Tesy {device_type.get('name', 'Device')}"
+        min_setpoint = device_type.get('min_setpoint', 8)
+        max_setpoint = device_type.get('max_setpoint', 75)
+        capabilities = get_capability_profile(device_type)
+        endpoints = await async_get_supported_endpoints(hass, entry, api_url, capabilities)
+
+        # Store these attributes in `hass.data`
+        hass.data.setdefault(DOMAIN, {})
+        hass.data[DOMAIN][entry.entry_id] = {
+            "api_url": api_url,
+            "device_id": devid,
+            "macaddr": macaddr,
+            "device_name": device_name,
+            "min_setpoint": min_setpoint,
+            "max_setpoint": max_setpoint,
+            "capabilities": capabilities,
+            "endpoints": endpoints,
+        }
+
+        # Create dynamic entities using entity registry
+        entity_registry = async_get_entity_registry(hass)
+        entity_prefix = f"tesy_{entry.entry_id}"
+        vacation_datetime_entity = f"input_datetime.{entity_prefix}_vacation_end"
+        vacation_temp_entity = f"input_number.{entity_prefix}_temp_after_vacation"
+
+        # Check and create input_datetime entity
+        if not entity_registry.async_get(vacation_datetime_entity):
+            hass.states.async_set(
+                vacation_datetime_entity,
+                None,
+                {
+                    "name": f"Tesy Vacation End {entry.entry_id}",
+                    "has_date": True,
+                    "has_time": True,
+                },
+            )
+
+        # Check and create input_number entity
+        if not entity_registry.async_get(vacation_temp_entity):
+            hass.states.async_set(
+                vacation_temp_entity,
+                None,
+                {
+                    "name": f"Tesy Temp After Vacation {entry.entry_id}",
+                    "min": min_setpoint,
+                    "max": max_setpoint,
+                    "step": 1,
+                },
+            )
+
+        # Store dynamic entities in `hass.data`
+        hass.data[DOMAIN][entry.entry_id].update({
+            "vacation_datetime_entity": vacation_datetime_entity,
+            "vacation_temp_entity": vacation_temp_entity,
+        })
+
+        # Create the coordinator, bounding each poll cycle by the configured budget.
+        # A short status interval only speeds up `status`; the other endpoints
+        # keep their default cadence.
+        update_interval = timedelta(seconds=entry.options.get(CONF_STATUS_INTERVAL, DEFAULT_STATUS_INTERVAL))
+        refresh_intervals = {
+            endpoint: ENDPOINT_REFRESH_INTERVALS.get(endpoint, DEFAULT_STATUS_INTERVAL)
+            for endpoint in endpoints
+            if endpoint != "status"
+        }
+        coordinator = TesyDataUpdateCoordinator(
+            hass,
+            _LOGGER,
+            name="tesy",
+            config_entry=entry,
+            update_interval=update_interval,
+            api_url=api_url,
+            endpoints=endpoints,
+            poll_budget=entry.options.get(CONF_POLL_BUDGET)
+            or update_interval.total_seconds() * POLL_BUDGET_RATIO,
+            endpoint_timeout=entry.options.get(CONF_ENDPOINT_TIMEOUT, HTTP_TIMEOUT),
+            refresh_intervals=refresh_intervals,
+        )
+
+        # Load the reachability record first, so a heater that is down at startup is recorded
+        availability = await async_load_availability(hass, entry)
+        hass.data[DOMAIN][entry.entry_id]["availability"] = availability
+
+        # Perform the first refresh
+        try:
+            await coordinator.async_config_entry_first_refresh()
+        except ConfigEntryNotReady:
+            await availability.async_mark_unreachable()
+            raise
+
+        # Update `hass.data` with coordinator
+        hass.data[DOMAIN][entry.entry_id].update({
+            "coordinator": coordinator,
+        })
+        _LOGGER.debug("Coordinator data update completed for entry: %s", entry.entry_id)
+
+        # Fire transition events (heating, errors, mode, boost) once per refresh
+        entry.async_on_unload(async_setup_transition_events(hass, entry, coordinator, devid))
+
+        # Detect heating cycles for the daily analytics sensors
+        hass.data[DOMAIN][entry.entry_id]["cycles"] = await async_setup_cycle_detector(hass, entry, coordinator)
+
+        # Learn heating and standby loss rates for the forecast sensors
+        hass.data[DOMAIN][entry.entry_id]["thermal"] = await async_setup_thermal_model(hass, entry, coordinator)
+
+        # Detect hot-water draws and estimate consumption from the same status stream
+        hass.data[DOMAIN][entry.entry_id]["draws"] = await async_setup_draw_detector(
+            hass, entry, coordinator, hass.data[DOMAIN][entry.entry_id]["thermal"]
+        )
+
+        # Track live power for the fleet-wide power cap
+        scheduler = await async_get_scheduler(hass)
+        scheduler.async_update_device(entry.entry_id, coordinator.data)
+        entry.async_on_unload(coordinator.async_add_snapshot_handler(
+            lambda previous, current: scheduler.async_update_device(entry.entry_id, current)
+        ))
+        entry.async_on_unload(lambda: scheduler.async_remove_device(entry.entry_id))
+
+        # Replay commands that could not reach the device once it answers again
+        hass.data[DOMAIN][entry.entry_id]["journal"] = await async_setup_command_journal(
+            hass, entry, coordinator, api_url
+        )
+
+        # Compare the device clock on every poll and resync it when it drifts
+        hass.data[DOMAIN][entry.entry_id]["clock"] = async_setup_clock_monitor(
+            hass, entry, coordinator, api_url, entry.options.get(CONF_DRIFT_THRESHOLD, DEFAULT_DRIFT_THRESHOLD)
+        )
+
+        # Watch the status stream for device faults
+        hass.data[DOMAIN][entry.entry_id]["anomalies"] = async_setup_anomaly_detector(
+            hass, entry, coordinator, device_name
+        )
+
+        # Keep a per-minute reachability record for availability reports
+        availability.async_start(entry, coordinator)
+
+        # Tell `tesy/subscribe` websocket clients about the new device
+        async_dispatcher_send(hass, SIGNAL_FLEET_UPDATED)
+
+        # Forward entry setup to platforms
+        await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
+
+        # Register the refresh service
+        async def handle_refresh_service(call: ServiceCall):
+            """Handle refresh service call."""
+            _LOGGER.info("Received request to refresh Tesy data for device %s", devid)
+            coordinator.async_invalidate(*coordinator.endpoints)
+            await coordinator.async_request_refresh()
+
+        hass.services.async_register(DOMAIN, "refresh", handle_refresh_service)
+
+        # Register the update device time service
+        async def async_update_device_time(call: ServiceCall):
+            """Handle the service call to update device time."""
+            device = hass.data[DOMAIN].get(entry.entry_id)
+            if not device:
+                _LOGGER.error("Device not found for time update.")
+                return
+
+            # Set the device clock from Home Assistant's time zone
+            if await async_set_device_time(hass, device["api_url"], hass.config.time_zone):
+                device["clock"].async_mark_synced()
+
+        hass.services.async_register(DOMAIN, "update_device_time", async_update_device_time)
+
+        # Register the domain-wide services shared by all entries
+        await register_optimize_program_service(hass)
+        await register_set_power_cap_service(hass)
+        await register_profile_service(hass)
+        await register_snapshot_services(hass)
+        await register_availability_report_service(hass)
+
+        # Add an update listener for options changes
+        async def update_listener(hass, entry):
+            """Handle options updates."""
+            _LOGGER.info("Options for Tesy integration have been updated.")
+            await hass.config_entries.async_reload(entry.entry_id)
+
+        entry.async_on_unload(entry.add_update_listener(update_listener))
+        return True
+
+    except ConfigEntryNotReady:
+        # Let Home Assistant retry the setup while the device is unreachable
+        raise
+    except Exception as e:
+        _LOGGER.error("Failed to set up Tesy integration: %s", e)
+        return False
+
+async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry):
+    """Unload a config entry."""
+    unload_ok = await hass.config_entries.async_unload_platforms(entry, PLATFORMS)
+    if unload_ok:
+        hass.data[DOMAIN].pop(entry.entry_id)
+        async_dispatcher_send(hass, SIGNAL_FLEET_UPDATED)
+    return unload_ok
@@ -0,0 +1,229 @@
+"""Streaming anomaly detection on the polled status."""
+import logging
+from homeassistant.core import callback
+from homeassistant.helpers import issue_registry as ir
+from homeassistant.util import dt as dt_util
+from .const import (
+    DOMAIN,
+    ATTR_CURRENT_TEMP,
+    ATTR_TARGET_TEMP,
+    ATTR_IS_HEATING,
+    ANOMALY_KINDS,
+    ANOMALY_EWMA_ALPHA,
+    ANOMALY_STALL_MINUTES,
+    ANOMALY_STALL_RATE,
+    ANOMALY_POWER_RANGE,
+    ANOMALY_OVERTEMP_MARGIN,
+    ANOMALY_JUMP_SIGMA,
+    ANOMALY_JUMP_MIN_RATE,
+    ANOMALY_WARMUP,
+    DEFAULT_HEATER_POWER,
+    DRAW_MIN_MIX40_DROP,
+)
+from .utils import is_heating, is_error, to_float
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class Ewma:
+    """Exponentially weighted mean and variance in constant memory."""
+
+    __slots__ = ("alpha", "mean", "variance", "count")
+
+    def __init__(self, alpha):
+        """Initialize the statistic."""
+        self.alpha = alpha
+        self.mean = None
+        self.variance = 0.0
+        self.count = 0
+
+    def update(self, value):
+        """Add a sample."""
+        self.count += 1
+        if self.mean is None:
+            self.mean = value
+            return
+        diff = value - self.mean
+        increment = self.alpha * diff
+        self.mean += increment
+        self.variance = (1 - self.alpha) * (self.variance + diff * increment)
+
+    @property
+    def std(self):
+        """Return the standard deviation."""
+        return self.variance ** 0.5
+
+
+class AnomalyDetector:
+    """Flag device faults from successive `status` payloads.
+
+    Each poll updates a fixed set of counters and EWMA statistics, so the
+    cost is O(1) per device and poll and the memory constant:
+
+    - heating_stalled: heating for ANOMALY_STALL_MINUTES while the smoothed
+      temperature rise stays below ANOMALY_STALL_RATE (failed element)
+    - power_out_of_range: `watts` outside ANOMALY_POWER_RANGE times the rated
+      power while heating
+    - error_persistent: a non-zero `err_flag` on consecutive polls
+    - over_temperature: `gradus` above `ref_gradus` by ANOMALY_OVERTEMP_MARGIN
+      while still heating or rising at an unchanged setpoint (stuck
+      thermostat); a hot tank after the setpoint was lowered is not a fault
+    - temperature_jump: a rate of change more than ANOMALY_JUMP_SIGMA standard
+      deviations from the usual rate (sensor fault); a fall that looks like a
+      hot-water draw (not heating, `mix40` dropping or not reported) is
+      ignored unless it reverses a jump seen on the previous poll
+
+    ANOMALY_KINDS gives, per condition, how many consecutive polls raise it
+    and how many clean polls clear it.
+    """
+
+    def __init__(self):
+        """Initialize the detector."""
+        self.active = {kind: False for kind in ANOMALY_KINDS}
+        self.details = {kind: None for kind in ANOMALY_KINDS}
+        self._streaks = {kind: 0 for kind in ANOMALY_KINDS}
+        self._clean = {kind: 0 for kind in ANOMALY_KINDS}
+        self._rate = Ewma(ANOMALY_EWMA_ALPHA)
+        self._heating_rate = Ewma(ANOMALY_EWMA_ALPHA)
+        self._last_time = None
+        self._last_temp = None
+        self._last_target = None
+        self._last_mix40 = None
+        self._heating_since = None
+
+    def update(self, status: dict, rated_power, timestamp: float) -> list:
+        """Feed one status payload; return `(kind, active)` for every change."""
+        temperature = to_float(status.get(ATTR_CURRENT_TEMP))
+        target = to_float(status.get(ATTR_TARGET_TEMP))
+        watts = to_float(status.get("watts"))
+        mix40 = to_float(status.get("mix40"))
+        heating = is_heating(status.get(ATTR_IS_HEATING))
+        rated_power = rated_power or DEFAULT_HEATER_POWER
+        observed = dict.fromkeys(ANOMALY_KINDS, False)
+
+        rate = None
+        if None not in (temperature, self._last_temp, self._last_time) and timestamp > self._last_time:
+            rate = (temperature - self._last_temp) / ((timestamp - self._last_time) / 60)
+
+        if rate is not None:
+            stats = self._rate
+            if (
+                stats.count >= ANOMALY_WARMUP
+                and abs(rate) >= ANOMALY_JUMP_MIN_RATE
+                and not self._looks_like_draw(rate, heating, mix40)
+            ):
+                if abs(rate - stats.mean) > ANOMALY_JUMP_SIGMA * max(stats.std, 0.01):
+                    observed["temperature_jump"] = True
+                    self.details["temperature_jump"] = round(rate, 2)
+            # A jump must not widen the band the next poll is compared against
+            if not observed["temperature_jump"]:
+                stats.update(rate)
+
+        if heating:
+            if self._heating_since is None:
+                self._heating_since = timestamp
+                self._heating_rate = Ewma(ANOMALY_EWMA_ALPHA)
+            if rate is not None:
+                self._heating_rate.update(rate)
+            heated_minutes = (timestamp - self._heating_since) / 60
+            mean_rate = self._heating_rate.mean
+            if (
+                heated_minutes >= ANOMALY_STALL_MINUTES
+                and mean_rate is not None
+                and mean_rate < ANOMALY_STALL_RATE
+            ):
+                observed["heating_stalled"] = True
+                self.details["heating_stalled"] = round(mean_rate, 3)
+
+            low, high = ANOMALY_POWER_RANGE
+            if watts is not None and not low * rated_power <= watts <= high * rated_power:
+                observed["power_out_of_range"] = True
+                self.details["power_out_of_range"] = watts
+        else:
+            self._heating_since = None
+
+        if is_error(status.get("err_flag")):
+            observed["error_persistent"] = True
+            self.details["error_persistent"] = status.get("err_flag")
+
+        # A setpoint change restarts the streak; only a tank that keeps heating past it is stuck
+        if (
+            None not in (temperature, target)
+            and target == self._last_target
+            and (heating or (rate is not None and rate > 0))
+            and temperature > target + ANOMALY_OVERTEMP_MARGIN
+        ):
+            observed["over_temperature"] = True
+            self.details["over_temperature"] = round(temperature - target, 1)
+
+        self._last_time = timestamp
+        self._last_temp = temperature
+        self._last_target = target
+        self._last_mix40 = mix40
+
+        changes = []
+        for kind, present in observed.items():
+            raise_after, clear_after = ANOMALY_KINDS[kind]
+            if present:
+                self._streaks[kind] += 1
+                self._clean[kind] = 0
+            else:
+                self._streaks[kind] = 0
+                self._clean[kind] += 1
+            if not self.active[kind] and self._streaks[kind] >= raise_after:
+                self.active[kind] = True
+                changes.append((kind, True))
+            elif self.active[kind] and self._clean[kind] >= clear_after:
+                self.active[kind] = False
+                self.details[kind] = None
+                changes.append((kind, False))
+        return changes
+
+    def _looks_like_draw(self, rate, heating, mix40) -> bool:
+        """Return True if a falling temperature is explained by hot water being drawn."""
+        if rate >= 0 or self._streaks["temperature_jump"]:
+            return False
+        if not heating or None in (mix40, self._last_mix40):
+            return True
+        return self._last_mix40 - mix40 >= DRAW_MIN_MIX40_DROP
+
+
+def _issue_id(entry_id, kind):
+    return f"{kind}_{entry_id}"
+
+
+@callback
+def async_setup_anomaly_detector(hass, entry, coordinator, device_name):
+    """Create the detector, feed it every refresh and mirror it into repair issues."""
+    detector = AnomalyDetector()
+
+    @callback
+    def handle_snapshot(previous, current):
+        status = current.get("status")
+        if not status or status is previous.get("status"):
+            return
+        rated_power = to_float(current.get("calcRes", {}).get("watt"))
+        for kind, active in detector.update(status, rated_power, dt_util.utcnow().timestamp()):
+            _LOGGER.warning("%s: %s %s", device_name, kind, "detected" if active else "cleared")
+            if active:
+                ir.async_create_issue(
+                    hass,
+                    DOMAIN,
+                    _issue_id(entry.entry_id, kind),
+                    is_fixable=False,
+                    severity=ir.IssueSeverity.WARNING,
+                    translation_key=kind,
+                    translation_placeholders={"name": device_name, "value": str(detector.details[kind])},
+                )
+            else:
+                ir.async_delete_issue(hass, DOMAIN, _issue_id(entry.entry_id, kind))
+
+    @callback
+    def clear_issues():
+        for kind in ANOMALY_KINDS:
+            ir.async_delete_issue(hass, DOMAIN, _issue_id(entry.entry_id, kind))
+
+    entry.async_on_unload(coordinator.async_add_snapshot_handler(handle_snapshot))
+    # Conditions are re-detected after a reload, so issues must not outlive the entry
+    entry.async_on_unload(clear_issues)
+    return detector
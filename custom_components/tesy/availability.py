@@ -0,0 +1,230 @@
+"""Long-term per-device availability record."""
+import base64
+import logging
+from datetime import timedelta
+from homeassistant.core import callback
+from homeassistant.helpers.event import async_track_time_interval
+from homeassistant.helpers.storage import Store
+from homeassistant.util import dt as dt_util
+from .const import (
+    DOMAIN,
+    AVAILABILITY_DAYS,
+    AVAILABILITY_BRIDGE_SLOTS,
+    AVAILABILITY_SLOT_SECONDS,
+    AVAILABILITY_SAVE_INTERVAL,
+    STORAGE_VERSION,
+)
+from .utils import throttled_saver
+
+_LOGGER = logging.getLogger(__name__)
+
+
+def _longest_run(bits: int) -> int:
+    """Return the length of the longest run of set bits.
+
+    `runs` holds the start of every run of at least `length` bits. Doubling
+    `length` until no run is left, then narrowing it down bit by bit, takes
+    O(log n) big-integer operations instead of one per bit.
+    """
+    if not bits:
+        return 0
+    runs, length = bits, 1
+    while True:
+        longer = runs & (runs >> length)
+        if not longer:
+            break
+        runs, length = longer, length * 2
+    step = length // 2
+    while step:
+        longer = runs & (runs >> step)
+        if longer:
+            runs, length = longer, length + step
+        step //= 2
+    return length
+
+
+class AvailabilityBitmap:
+    """One bit per time slot in a fixed-size ring of `bytearray`s.
+
+    `seen` marks the slots that were sampled at all and `up` the ones in
+    which the device answered; slots without a sample (Home Assistant not
+    running) count as neither uptime nor outage. At minute resolution 90
+    days take 2 x 16200 bytes. Reports turn the ring into Python ints in
+    time order and use `int.bit_count` and shifts, never a loop per slot.
+    """
+
+    def __init__(self, slot_seconds=AVAILABILITY_SLOT_SECONDS, days=AVAILABILITY_DAYS):
+        """Initialize an empty record."""
+        self.slot_seconds = slot_seconds
+        # A whole number of bytes keeps the ring byte aligned
+        self.slots = -(-days * 86400 // slot_seconds // 8) * 8
+        self.seen = bytearray(self.slots // 8)
+        self.up = bytearray(self.slots // 8)
+        self.head = None
+
+    def mark(self, timestamp: float, available: bool) -> None:
+        """Record the device state for the slot containing `timestamp`."""
+        slot = int(timestamp // self.slot_seconds)
+        if self.head is not None and slot <= self.head:
+            if slot <= self.head - self.slots:
+                return
+        else:
+            # Slots skipped since the last sample were not observed, unless the
+            # gap is short and both ends agree (e.g. between setup retries)
+            first = self.head + 1 if self.head is not None else slot
+            self._clear(first, slot)
+            if slot - first <= AVAILABILITY_BRIDGE_SLOTS and self._state(first - 1) == bool(available):
+                for skipped in range(first, slot):
+                    self._set(skipped, available)
+            self.head = slot
+        self._set(slot, available)
+
+    def _state(self, slot: int):
+        """Return whether the device was up in `slot`, None if the slot was not sampled."""
+        byte, bit = divmod(slot % self.slots, 8)
+        if not self.seen[byte] >> bit & 1:
+            return None
+        return bool(self.up[byte] >> bit & 1)
+
+    def _set(self, slot: int, available: bool) -> None:
+        byte, bit = divmod(slot % self.slots, 8)
+        self.seen[byte] |= 1 << bit
+        if available:
+            self.up[byte] |= 1 << bit
+        else:
+            self.up[byte] &= ~(1 << bit) & 0xFF
+
+    def _clear(self, first: int, last: int) -> None:
+        """Clear slots `first`..`last` inclusive."""
+        if last - first + 1 >= self.slots:
+            self.seen[:] = bytes(len(self.seen))
+            self.up[:] = bytes(len(self.up))
+            return
+        slot = first
+        while slot <= last:
+            index = slot % self.slots
+            byte, bit = divmod(index, 8)
+            if bit == 0 and last - slot >= 7:
+                # Whole bytes at a time where possible
+                count = min((last - slot + 1) // 8, len(self.seen) - byte)
+                self.seen[byte:byte + count] = bytes(count)
+                self.up[byte:byte + count] = bytes(count)
+                slot += count * 8
+                continue
+            self.seen[byte] &= ~(1 << bit) & 0xFF
+            self.up[byte] &= ~(1 << bit) & 0xFF
+            slot += 1
+
+    def _ordered(self, ring: bytearray, count: int) -> int:
+        """Return the latest `count` slots of a ring as an int, oldest slot in the lowest bit."""
+        value = int.from_bytes(ring, "little")
+        start = (self.head + 1) % self.slots
+        mask = (1 << self.slots) - 1
+        value = ((value >> start) | (value << (self.slots - start))) & mask
+        return value >> (self.slots - count)
+
+    def report(self, days: float) -> dict:
+        """Return uptime, outage count and longest outage over the last `days`."""
+        if self.head is None:
+            return {
+                "observed_hours": 0,
+                "uptime_percent": None,
+                "downtime_minutes": 0,
+                "outages": 0,
+                "longest_outage_minutes": 0,
+            }
+        count = min(self.slots, max(1, int(days * 86400 // self.slot_seconds)))
+        seen = self._ordered(self.seen, count)
+        down = seen & ~self._ordered(self.up, count)
+        observed = seen.bit_count()
+        down_slots = down.bit_count()
+        minutes = self.slot_seconds / 60
+        return {
+            "observed_hours": round(observed * minutes / 60, 1),
+            "uptime_percent": round(100 * (observed - down_slots) / observed, 3) if observed else None,
+            "downtime_minutes": round(down_slots * minutes),
+            # A run starts wherever a down slot follows a slot that was not down
+            "outages": (down & ~(down << 1)).bit_count(),
+            "longest_outage_minutes": round(_longest_run(down) * minutes),
+        }
+
+    def as_dict(self) -> dict:
+        """Return a JSON-serializable representation."""
+        return {
+            "slot_seconds": self.slot_seconds,
+            "head": self.head,
+            "seen": base64.b64encode(self.seen).decode("ascii"),
+            "up": base64.b64encode(self.up).decode("ascii"),
+        }
+
+    def load(self, stored: dict) -> None:
+        """Restore state saved by `as_dict`; a record with another layout is dropped."""
+        seen = base64.b64decode(stored.get("seen", ""))
+        up = base64.b64decode(stored.get("up", ""))
+        if stored.get("slot_seconds") != self.slot_seconds or len(seen) != len(self.seen) or len(up) != len(self.up):
+            _LOGGER.warning("Discarding stored availability record with a different layout")
+            return
+        self.seen[:] = seen
+        self.up[:] = up
+        self.head = stored.get("head")
+
+
+class AvailabilityRecord:
+    """The persisted availability bitmap of one config entry."""
+
+    def __init__(self, hass, entry):
+        """Initialize the record."""
+        self.bitmap = AvailabilityBitmap()
+        self._store = Store(hass, STORAGE_VERSION, f"{DOMAIN}.{entry.entry_id}.availability")
+        self._save = throttled_saver(self._store, self.bitmap.as_dict, AVAILABILITY_SAVE_INTERVAL)
+
+    async def async_load(self):
+        """Restore the saved record."""
+        stored = await self._store.async_load()
+        if stored:
+            self.bitmap.load(stored)
+
+    @callback
+    def async_mark(self, available: bool):
+        """Record the current slot."""
+        self.bitmap.mark(dt_util.utcnow().timestamp(), available)
+        self._save()
+
+    async def async_mark_unreachable(self):
+        """Record the current slot as down and save now, before a setup retry discards the entry."""
+        self.bitmap.mark(dt_util.utcnow().timestamp(), False)
+        await self._store.async_save(self.bitmap.as_dict())
+
+    @callback
+    def async_start(self, entry, coordinator):
+        """Sample the coordinator once per slot until the entry is unloaded."""
+
+        @callback
+        def sample(now=None):
+            self.async_mark(coordinator.last_update_success and "status" not in coordinator.missing_endpoints)
+
+        @callback
+        def flush():
+            # A reload loads the record again right away, so do not leave the last slots pending
+            self._store.async_delay_save(self.bitmap.as_dict, 0)
+
+        sample()
+        entry.async_on_unload(
+            async_track_time_interval(coordinator.hass, sample, timedelta(seconds=AVAILABILITY_SLOT_SECONDS))
+        )
+        entry.async_on_unload(flush)
+
+    def report(self, days: float) -> dict:
+        """Return the availability report over the last `days`."""
+        return self.bitmap.report(days)
+
+
+async def async_load_availability(hass, entry) -> AvailabilityRecord:
+    """Return the entry's availability record, restored from storage.
+
+    It is loaded before the first refresh so that a heater which is down at
+    startup, and every setup retry while it stays down, is recorded.
+    """
+    record = AvailabilityRecord(hass, entry)
+    await record.async_load()
+    return record
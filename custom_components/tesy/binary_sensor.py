@@ -0,0 +1,58 @@
+import logging
+from homeassistant.components.binary_sensor import BinarySensorDeviceClass, BinarySensorEntity
+from homeassistant.helpers.update_coordinator import CoordinatorEntity
+from .const import DOMAIN, ANOMALY_KINDS
+
+_LOGGER = logging.getLogger(__name__)
+
+ANOMALY_NAMES = {
+    "heating_stalled": ("Heating Stalled", "mdi:heating-coil"),
+    "power_out_of_range": ("Power Out of Range", "mdi:flash-alert"),
+    "error_persistent": ("Persistent Error", "mdi:alert-circle"),
+    "over_temperature": ("Over Temperature", "mdi:thermometer-alert"),
+    "temperature_jump": ("Temperature Sensor Jump", "mdi:chart-bell-curve"),
+}
+
+async def async_setup_entry(hass, config_entry, async_add_entities):
+    """Set up the Tesy anomaly binary sensors."""
+    data = hass.data[DOMAIN].get(config_entry.entry_id)
+    if data is None or "anomalies" not in data:
+        _LOGGER.error("Anomaly detector not found for entry: %s", config_entry.entry_id)
+        return
+
+    async_add_entities(
+        TesyAnomalyBinarySensor(data["coordinator"], data["anomalies"], data["device_id"], data["device_name"], kind)
+        for kind in ANOMALY_KINDS
+    )
+
+
+class TesyAnomalyBinarySensor(CoordinatorEntity, BinarySensorEntity):
+    """On while the anomaly detector reports a fault condition."""
+
+    _attr_device_class = BinarySensorDeviceClass.PROBLEM
+
+    def __init__(self, coordinator, detector, device_id, device_name, kind):
+        """Initialize the anomaly binary sensor."""
+        super().__init__(coordinator, "status")
+        self._detector = detector
+        self._kind = kind
+        self._device_name = device_name
+        name, icon = ANOMALY_NAMES[kind]
+        self._attr_name = f"{device_name} {name}"
+        self._attr_unique_id = f"{device_id}_anomaly_{kind}"
+        # Names the sensor in translations/en.json; the explicit name keeps existing entity ids
+        self._attr_translation_key = kind
+        self._attr_icon = icon
+
+    @property
+    def is_on(self):
+        """Return True while the condition is active."""
+        return self._detector.active[self._kind]
+
+    @property
+    def extra_state_attributes(self):
+        """Return the value that triggered the condition."""
+        return {
+            "value": self._detector.details[self._kind],
+            "device_name": self._device_name,
+        }
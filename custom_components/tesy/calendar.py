@@ -0,0 +1,177 @@
+"""Calendar of the P1-P3 program blocks and the vacation window."""
+import heapq
+import logging
+from datetime import timedelta
+from homeassistant.components.calendar import CalendarEntity, CalendarEvent
+from homeassistant.helpers.update_coordinator import CoordinatorEntity
+from homeassistant.util import dt as dt_util
+from .const import DOMAIN, SCHEDULE_ENDPOINTS, ENDPOINT_DATA_KEYS
+
+_LOGGER = logging.getLogger(__name__)
+
+PROGRAM_KEYS = ("p1", "p2", "p3")
+# How far ahead `event` looks for the next block
+NEXT_EVENT_HORIZON = timedelta(days=8)
+# Blocks continuing beyond a requested range are followed this many days
+MERGE_DAYS = 7
+
+
+async def async_setup_entry(hass, config_entry, async_add_entities):
+    """Set up the Tesy schedule calendar."""
+    data = hass.data[DOMAIN].get(config_entry.entry_id)
+    if data is None or "coordinator" not in data:
+        _LOGGER.error("Coordinator not found for entry: %s", config_entry.entry_id)
+        return
+
+    endpoints = data.get("endpoints") or list(ENDPOINT_DATA_KEYS)
+    keys = tuple(key for key, endpoint in SCHEDULE_ENDPOINTS.items() if endpoint in endpoints)
+    if not keys:
+        return
+    async_add_entities([TesyScheduleCalendar(data["coordinator"], data["device_id"], data["device_name"], keys)])
+
+
+def compact_program(program) -> tuple:
+    """Return a weekly program as 7 tuples (Sunday first) of `(start_hour, end_hour, setpoint)` blocks.
+
+    Consecutive hours with the same setpoint form one block.
+    """
+    week = []
+    for day in program:
+        blocks = []
+        start, setpoint = 0, day.get("h00")
+        for hour in range(1, 24):
+            value = day.get(f"h{hour:02d}")
+            if value != setpoint:
+                blocks.append((start, hour, setpoint))
+                start, setpoint = hour, value
+        blocks.append((start, 24, setpoint))
+        week.append(tuple(block for block in blocks if block[2] is not None))
+    return tuple(week)
+
+
+def expand_program(week: tuple, label: str, start, end):
+    """Yield `(start, end, label, setpoint)` for every block overlapping [start, end), in order.
+
+    Only the days in the range are visited, plus up to MERGE_DAYS on either
+    side: a block running up to midnight and a block with the same setpoint
+    starting the next day are merged, so a setpoint held across days is one
+    event.
+    """
+    if len(week) != 7:
+        return
+    day = dt_util.start_of_local_day(start) - timedelta(days=MERGE_DAYS)
+    limit = end + timedelta(days=MERGE_DAYS)
+    pending = None
+    while day < limit:
+        weekday = (day.weekday() + 1) % 7  # 0=Sunday, as the device counts
+        for first, last, setpoint in week[weekday]:
+            block_start = day + timedelta(hours=first)
+            if pending is not None and pending[1] == block_start and pending[3] == setpoint:
+                pending = (pending[0], day + timedelta(hours=last), label, setpoint)
+                continue
+            if pending is not None and pending[1] > start:
+                yield pending
+            if block_start >= end:
+                return
+            pending = (block_start, day + timedelta(hours=last), label, setpoint)
+        day = dt_util.start_of_local_day(day + timedelta(hours=25))
+    if pending is not None and pending[1] > start:
+        yield pending
+
+
+class TesyScheduleCalendar(CoordinatorEntity, CalendarEntity):
+    """Program setpoint blocks and the vacation window of one heater.
+
+    Each schedule payload is compacted once into merged hour blocks when the
+    coordinator fetches it (schedules are refreshed every 15 minutes, and the
+    payload object is reused in between). Events are only materialized for
+    the range the frontend asks for, by walking those days and merging the
+    per-program streams in start order.
+    """
+
+    _attr_icon = "mdi:calendar-clock"
+
+    def __init__(self, coordinator, device_id, device_name, keys):
+        """Initialize the calendar."""
+        super().__init__(coordinator, keys)
+        self._keys = keys
+        self._device_name = device_name
+        self._attr_name = f"{device_name} Schedule"
+        self._attr_unique_id = f"{device_id}_schedule_calendar"
+        self._sources = {}
+        self._compact = {}
+        self._vacation_seen = None
+
+    def _program(self, key):
+        """Return the compact program for `key`, rebuilt only when a new payload was fetched."""
+        payload = self.coordinator.data.get(key)
+        if payload is not self._sources.get(key):
+            self._sources[key] = payload
+            self._compact[key] = compact_program(payload) if isinstance(payload, list) else ()
+        return self._compact[key]
+
+    def _vacation(self):
+        """Return (start, end, temperature) of the vacation window, None if there is none.
+
+        The device only reports when a vacation ends, so the window starts
+        when the integration first saw it.
+        """
+        vacation = self.coordinator.data.get("vacation") if "vacation" in self._keys else None
+        if vacation is not self._sources.get("vacation"):
+            self._sources["vacation"] = vacation
+            self._compact["vacation"] = None
+            try:
+                year = vacation["vYear"]
+                end = dt_util.start_of_local_day(dt_util.now()).replace(
+                    year=year + 2000 if year < 100 else year,
+                    month=vacation["vMonth"],
+                    day=vacation["vMDay"],
+                    hour=vacation["vHour"],
+                )
+            except (KeyError, TypeError, ValueError):
+                end = None
+            if end is not None:
+                if self._vacation_seen is None or self._vacation_seen[0] != end:
+                    self._vacation_seen = (end, dt_util.now())
+                if end > self._vacation_seen[1]:
+                    self._compact["vacation"] = (self._vacation_seen[1], end, vacation.get("vTemp"))
+        return self._compact.get("vacation")
+
+    def _iter_events(self, start, end):
+        """Yield raw events overlapping [start, end) in start order."""
+        streams = [
+            expand_program(self._program(key), key.upper(), start, end) for key in PROGRAM_KEYS if key in self._keys
+        ]
+        vacation = self._vacation()
+        if vacation is not None and vacation[0] < end and vacation[1] > start:
+            streams.append(iter([(vacation[0], vacation[1], "vacation", vacation[2])]))
+        return heapq.merge(*streams, key=lambda event: event[0])
+
+    def _to_event(self, raw) -> CalendarEvent:
+        start, end, label, setpoint = raw
+        if label == "vacation":
+            summary = "Vacation"
+            description = f"Heats to {setpoint} °C when the vacation ends" if setpoint is not None else None
+        else:
+            summary = f"{label} {setpoint} °C"
+            description = f"Program {label[1:]} setpoint"
+        return CalendarEvent(start=start, end=end, summary=summary, description=description)
+
+    @property
+    def event(self):
+        """Return the current or next event."""
+        now = dt_util.now()
+        for raw in self._iter_events(now, now + NEXT_EVENT_HORIZON):
+            return self._to_event(raw)
+        return None
+
+    async def async_get_events(self, hass, start_date, end_date) -> list:
+        """Return the events between `start_date` and `end_date`."""
+        start = dt_util.as_local(start_date)
+        end = dt_util.as_local(end_date)
+        return [self._to_event(raw) for raw in self._iter_events(start, end)]
+
+    @property
+    def extra_state_attributes(self):
+        """Return the device name."""
+        return {"device_name": self._device_name}
@@ -0,0 +1,88 @@
+"""Capability profiles and one-time endpoint probing for Tesy devices."""
+import asyncio
+import logging
+from .const import (
+    CAPABILITY_PROBE_TIMEOUT,
+    CONF_CAPABILITIES,
+    CORE_ENDPOINTS,
+    ENDPOINT_DATA_KEYS,
+    TESY_DEFAULT_CAPABILITIES,
+)
+from .pytesy import TesyError, TesyResponseError
+from .utils import get_client
+
+_LOGGER = logging.getLogger(__name__)
+
+
+def get_capability_profile(device_type: dict) -> dict:
+    """Return the capability profile for a device type from TESY_DEVICE_TYPES."""
+    profile = dict(TESY_DEFAULT_CAPABILITIES)
+    profile["use_showers"] = device_type.get("use_showers", False)
+    profile.update(device_type.get("capabilities", {}))
+    return profile
+
+
+async def async_probe_endpoints(hass, api_url, endpoints) -> dict:
+    """Probe all endpoints at once; return endpoint -> supported.
+
+    An endpoint is supported when it answers with a non-empty JSON payload
+    and unsupported when it answers with an empty or unusable payload or a
+    4xx status. Timeouts, connection errors and 5xx statuses say nothing
+    about the firmware, so those endpoints map to None.
+    """
+    client = get_client(hass, api_url, timeout=CAPABILITY_PROBE_TIMEOUT)
+
+    async def probe(endpoint):
+        try:
+            payload = await client.get(endpoint, retries=0)
+        except TesyResponseError as e:
+            if e.status >= 500:
+                _LOGGER.debug("Endpoint %s probe inconclusive: %s", endpoint, e)
+                return None
+            _LOGGER.debug("Endpoint %s not supported: %s", endpoint, e)
+            return False
+        except TesyError as e:
+            _LOGGER.debug("Endpoint %s probe inconclusive: %s", endpoint, e)
+            return None
+        if not payload:
+            _LOGGER.debug("Endpoint %s not supported: empty payload", endpoint)
+            return False
+        return True
+
+    return dict(zip(endpoints, await asyncio.gather(*(probe(endpoint) for endpoint in endpoints))))
+
+
+async def async_get_supported_endpoints(hass, entry, api_url, profile) -> list:
+    """Return the endpoints to poll, probing optional ones once per config entry.
+
+    The probe result is cached in the config entry once every endpoint gave
+    a definitive answer. When the device does not answer `status` the full
+    profile is polled; an optional endpoint that timed out is kept. Either
+    way nothing is cached and the probe is retried on the next setup.
+    """
+    cached = entry.data.get(CONF_CAPABILITIES)
+    if cached and "endpoints" in cached:
+        return [endpoint for endpoint in cached["endpoints"] if endpoint in ENDPOINT_DATA_KEYS]
+
+    candidates = [endpoint for endpoint in profile["endpoints"] if endpoint in ENDPOINT_DATA_KEYS]
+    optional = [endpoint for endpoint in candidates if endpoint not in CORE_ENDPOINTS]
+    probed = await async_probe_endpoints(hass, api_url, ["status"] + optional)
+    if not probed["status"]:
+        _LOGGER.warning("Device at %s did not answer the capability probe, polling all endpoints", api_url)
+        return candidates
+
+    endpoints = [endpoint for endpoint in candidates if probed.get(endpoint) is not False]
+    _LOGGER.info(
+        "Capability probe for %s: polling %s, skipping %s",
+        api_url,
+        ", ".join(endpoints),
+        ", ".join(endpoint for endpoint in optional if probed[endpoint] is False) or "nothing",
+    )
+    inconclusive = [endpoint for endpoint in optional if probed[endpoint] is None]
+    if inconclusive:
+        _LOGGER.info("Capability probe for %s will be repeated: no answer from %s", api_url, ", ".join(inconclusive))
+        return endpoints
+    hass.config_entries.async_update_entry(
+        entry, data={**entry.data, CONF_CAPABILITIES: {"endpoints": endpoints}}
+    )
+    return endpoints
@@ -0,0 +1,135 @@
+"""Device clock drift detection from the `date`/`tz` fields in `status`."""
+import logging
+from datetime import datetime
+from homeassistant.core import callback
+from homeassistant.util import dt as dt_util
+from .const import (
+    DOMAIN,
+    ATTR_DATE_TIME,
+    ATTR_TIME_ZONE,
+    CLOCK_DRIFT_CONFIRMATIONS,
+    CLOCK_SYNC_MIN_INTERVAL,
+)
+from .utils import async_set_device_time
+
+_LOGGER = logging.getLogger(__name__)
+
+# Formats seen in the `date` field across firmware versions
+DEVICE_DATE_FORMATS = (
+    "%Y-%m-%d %H:%M:%S",
+    "%Y-%m-%dT%H:%M:%S",
+    "%d.%m.%Y %H:%M:%S",
+    "%d-%m-%Y %H:%M:%S",
+    "%d/%m/%Y %H:%M:%S",
+    "%Y-%m-%d %H:%M",
+    "%d.%m.%Y %H:%M",
+    "%d-%m-%Y %H:%M",
+    "%d/%m/%Y %H:%M",
+)
+
+
+def parse_device_date(value):
+    """Return `(naive datetime, resolution in seconds)` or None if unparseable."""
+    if not isinstance(value, str):
+        return None
+    value = value.strip()
+    for fmt in DEVICE_DATE_FORMATS:
+        try:
+            return datetime.strptime(value, fmt), 1 if "%S" in fmt else 60
+        except ValueError:
+            continue
+    return None
+
+
+class ClockMonitor:
+    """Estimate device clock drift from data the poll already fetched.
+
+    The device reports local wall time. It is compared with Home Assistant's
+    local time at the midpoint of the `status` request, so the error of the
+    estimate is half the round trip plus the resolution of the `date` field.
+    Only drift beyond the threshold plus that error counts, and it has to be
+    seen on consecutive polls before `setdate` is sent.
+    """
+
+    def __init__(self, hass, api_url, threshold):
+        """Initialize the monitor; a threshold of 0 disables automatic resync."""
+        self.hass = hass
+        self._api_url = api_url
+        self.threshold = threshold
+        self.drift = None
+        self.uncertainty = None
+        self.tz_mismatch = False
+        self.last_sync = None
+        self._confirmations = 0
+        self._syncing = False
+
+    @property
+    def _expected_tz(self):
+        """Return the `tz` value setdate would program for the HA time zone."""
+        return self.hass.config.time_zone.replace("/", "").replace(":", "")
+
+    @callback
+    def async_update(self, status, fetch_times) -> bool:
+        """Update the drift estimate; return True if a resync is due."""
+        parsed = parse_device_date(status.get(ATTR_DATE_TIME))
+        times = fetch_times.get("status")
+        if parsed is None or times is None:
+            return False
+
+        device_time, resolution = parsed
+        sent, received = times
+        midpoint = dt_util.as_local(dt_util.utc_from_timestamp((sent + received) / 2)).replace(tzinfo=None)
+        self.drift = round((device_time - midpoint).total_seconds(), 1)
+        self.uncertainty = round((received - sent) / 2 + resolution, 1)
+        tz = status.get(ATTR_TIME_ZONE)
+        self.tz_mismatch = bool(tz) and str(tz).replace("/", "") != self._expected_tz
+
+        if abs(self.drift) - self.uncertainty > self.threshold or self.tz_mismatch:
+            self._confirmations += 1
+        else:
+            self._confirmations = 0
+
+        if not self.threshold or self._syncing or self._confirmations < CLOCK_DRIFT_CONFIRMATIONS:
+            return False
+        if self.last_sync is not None and (dt_util.utcnow() - self.last_sync).total_seconds() < CLOCK_SYNC_MIN_INTERVAL:
+            return False
+        return True
+
+    async def async_sync(self):
+        """Send the current time to the device."""
+        self._syncing = True
+        try:
+            _LOGGER.info(
+                "Device clock at %s is off by %ss (±%ss)%s, resyncing",
+                self._api_url,
+                self.drift,
+                self.uncertainty,
+                " and reports a different time zone" if self.tz_mismatch else "",
+            )
+            if await async_set_device_time(self.hass, self._api_url, self.hass.config.time_zone):
+                self.async_mark_synced()
+        finally:
+            self._syncing = False
+
+    @callback
+    def async_mark_synced(self):
+        """Record a successful `setdate`."""
+        self.last_sync = dt_util.utcnow()
+        self._confirmations = 0
+
+
+@callback
+def async_setup_clock_monitor(hass, entry, coordinator, api_url, threshold):
+    """Create the monitor and check the clock on every refresh."""
+    monitor = ClockMonitor(hass, api_url, threshold)
+
+    @callback
+    def handle_snapshot(previous, current):
+        status = current.get("status")
+        if not status or status is previous.get("status"):
+            return
+        if monitor.async_update(status, coordinator.fetch_times):
+            entry.async_create_background_task(hass, monitor.async_sync(), f"{DOMAIN}_clock_sync")
+
+    entry.async_on_unload(coordinator.async_add_snapshot_handler(handle_snapshot))
+    return monitor
@@ -1,87 +1,164 @@
-import logging
-import aiohttp
-import voluptuous as vol
-from homeassistant import config_entries
-from homeassistant.data_entry_flow import FlowResult
-from .const import DOMAIN
-from .utils import get_tesy_device_type
-
-_LOGGER = logging.getLogger(__name__)
-
-
-class TesyConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
-    """Handle a config flow for Tesy integration."""
-
-    async def async_step_user(self, user_input=None) -> FlowResult:
-        """Handle the initial step where the user inputs the device IP."""
-        if user_input is None:
-            return self.async_show_form(
-                step_id="user",
-                data_schema=vol.Schema({vol.Required("ip"): str}),
-            )
-
-        ip = user_input["ip"]
-
-        # Fetch device info dynamically
-        device_info = await self._fetch_device_info(ip)
-
-        if not device_info or "devid" not in device_info:
-            return self.async_show_form(
-                step_id="user",
-                errors={"base": "cannot_connect"},
-            )
-        devid = device_info.get("devid", "Unknown")
-        macaddr = device_info.get("macaddr", "Unknown")
-        device_type = get_tesy_device_type(devid)
-        device_name = f"Tesy {device_type.get('name', 'Device')}"
-        min_setpoint = device_type.get('min_setpoint', 8)
-        max_setpoint = device_type.get('max_setpoint', 75)    
-        
-        # Include additional attributes from devstat API in the config entry
-        return self.async_create_entry(
-            title=f"Tesy ({ip})",
-            data={
-                "ip": ip,
-                "device_id": devid,
-                "macaddr": macaddr,
-                "device_name": device_name,
-                "min_setpoint": min_setpoint,
-                "max_setpoint": max_setpoint,
-            },
-        )
-
-    async def _fetch_device_info(self, ip: str) -> dict:
-        """Fetch device information dynamically from the API."""
-        try:
-            async with aiohttp.ClientSession() as session:
-                async with session.get(f"http://{ip}/devstat") as response:
-                    if response.status == 200:
-                        data = await response.json(content_type=None)
-                        return data
-                    else:
-                        _LOGGER.error("Failed to fetch device info: HTTP %s", response.status)
-                        return {}
-        except Exception as e:
-            _LOGGER.error("Error fetching device info: %s", e)
-            return {}
-
-
-class TesyOptionsFlowHandler(config_entries.OptionsFlow):
-    """Handle Tesy options."""
-
-    def __init__(self, config_entry):
-        """Initialize options flow."""
-        self.config_entry = config_entry
-
-    async def async_step_init(self, user_input=None):
-        """Manage the Tesy options."""
-        if user_input is not None:
-            # Handle refresh or other options here
-            if user_input.get("refresh"):
-                await self.hass.services.async_call(DOMAIN, "refresh")
-            return self.async_create_entry(title="", data=self.config_entry.options)
-
-        return self.async_show_form(
-            step_id="init",
-            data_schema=vol.Schema({vol.Optional("refresh", default=False): bool}),
-        )
+import logging
+import voluptuous as vol
+from homeassistant import config_entries
+from homeassistant.core import callback
+from homeassistant.data_entry_flow import FlowResult
+from .const import (
+    DOMAIN,
+    HTTP_TIMEOUT,
+    CONF_CAPABILITIES,
+    CONF_REPROBE,
+    CONF_POLL_BUDGET,
+    CONF_ENDPOINT_TIMEOUT,
+    CONF_FORECAST_MINUTES,
+    DEFAULT_FORECAST_MINUTES,
+    CONF_DRIFT_THRESHOLD,
+    DEFAULT_DRIFT_THRESHOLD,
+    CONF_STATE_HEARTBEAT,
+    DEFAULT_STATE_HEARTBEAT,
+    CONF_STATUS_INTERVAL,
+    DEFAULT_STATUS_INTERVAL,
+)
+from .provisioning import device_key
+from .pytesy import TesyError
+from .utils import get_client, get_tesy_device_type
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class TesyConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
+    """Handle a config flow for Tesy integration."""
+
+    async def async_step_user(self, user_input=None) -> FlowResult:
+        """Handle the initial step where the user inputs the device IP."""
+        if user_input is None:
+            return self.async_show_form(
+                step_id="user",
+                data_schema=vol.Schema({vol.Required("ip"): str}),
+            )
+
+        ip = user_input["ip"]
+
+        # Fetch device info dynamically
+        device_info = await self._fetch_device_info(ip)
+
+        if not device_info or "devid" not in device_info:
+            return self.async_show_form(
+                step_id="user",
+                errors={"base": "cannot_connect"},
+            )
+        return self.async_create_entry(**self._entry_from_device_info(ip, device_info))
+
+    async def async_step_import(self, import_data) -> FlowResult:
+        """Create an entry for a device already validated by the bulk import."""
+        key = device_key(import_data.get("macaddr"), import_data["ip"])
+        for entry in self._async_current_entries(include_ignore=False):
+            # An empty or unknown MAC falls back to host:port instead of matching every MAC-less entry
+            if device_key(entry.data.get("macaddr"), entry.data.get("ip")) == key:
+                return self.async_abort(reason="already_configured")
+        return self.async_create_entry(
+            **self._entry_from_device_info(
+                import_data["ip"],
+                {"devid": import_data["device_id"], "macaddr": import_data.get("macaddr") or "Unknown"},
+                import_data.get("name"),
+            )
+        )
+
+    @staticmethod
+    def _entry_from_device_info(ip: str, device_info: dict, name=None) -> dict:
+        """Return the entry title and data for a device answering `/devstat`."""
+        devid = device_info.get("devid", "Unknown")
+        macaddr = device_info.get("macaddr", "Unknown")
+        device_type = get_tesy_device_type(devid)
+        device_name = name or f"Tesy {device_type.get('name', 'Device')}"
+        min_setpoint = device_type.get('min_setpoint', 8)
+        max_setpoint = device_type.get('max_setpoint', 75)
+
+        # Include additional attributes from devstat API in the config entry
+        return {
+            "title": f"{name} ({ip})" if name else f"Tesy ({ip})",
+            "data": {
+                "ip": ip,
+                "device_id": devid,
+                "macaddr": macaddr,
+                "device_name": device_name,
+                "min_setpoint": min_setpoint,
+                "max_setpoint": max_setpoint,
+            },
+        }
+
+    async def _fetch_device_info(self, ip: str) -> dict:
+        """Fetch device information dynamically from the API."""
+        try:
+            return await get_client(self.hass, ip).devstat()
+        except TesyError as e:
+            _LOGGER.error("Error fetching device info: %s", e)
+            return {}
+
+    @staticmethod
+    @callback
+    def async_get_options_flow(config_entry):
+        """Return the options flow handler."""
+        return TesyOptionsFlowHandler(config_entry)
+
+
+class TesyOptionsFlowHandler(config_entries.OptionsFlow):
+    """Handle Tesy options."""
+
+    def __init__(self, config_entry):
+        """Initialize options flow."""
+        self.config_entry = config_entry
+
+    async def async_step_init(self, user_input=None):
+        """Manage the Tesy options."""
+        if user_input is not None:
+            # Handle refresh or other options here
+            if user_input.get("refresh"):
+                await self.hass.services.async_call(DOMAIN, "refresh")
+            options = {
+                **self.config_entry.options,
+                CONF_POLL_BUDGET: user_input.get(CONF_POLL_BUDGET, 0),
+                CONF_ENDPOINT_TIMEOUT: user_input.get(CONF_ENDPOINT_TIMEOUT, HTTP_TIMEOUT),
+                CONF_FORECAST_MINUTES: user_input.get(CONF_FORECAST_MINUTES, DEFAULT_FORECAST_MINUTES),
+                CONF_DRIFT_THRESHOLD: user_input.get(CONF_DRIFT_THRESHOLD, DEFAULT_DRIFT_THRESHOLD),
+                CONF_STATE_HEARTBEAT: user_input.get(CONF_STATE_HEARTBEAT, DEFAULT_STATE_HEARTBEAT),
+                CONF_STATUS_INTERVAL: user_input.get(CONF_STATUS_INTERVAL, DEFAULT_STATUS_INTERVAL),
+            }
+            if user_input.get(CONF_REPROBE):
+                # Drop the cached probe result together with the new options: the
+                # update listener then reloads the entry once, and the reload probes
+                # again. Finishing the flow with unchanged options triggers no reload.
+                data = {key: value for key, value in self.config_entry.data.items() if key != CONF_CAPABILITIES}
+                self.hass.config_entries.async_update_entry(self.config_entry, data=data, options=options)
+            return self.async_create_entry(title="", data=options)
+
+        options = self.config_entry.options
+        return self.async_show_form(
+            step_id="init",
+            data_schema=vol.Schema({
+                vol.Optional("refresh", default=False): bool,
+                vol.Optional(CONF_REPROBE, default=False): bool,
+                # 0 derives the budget from the update interval
+                vol.Optional(CONF_POLL_BUDGET, default=options.get(CONF_POLL_BUDGET, 0)): vol.All(
+                    vol.Coerce(float), vol.Range(min=0, max=600)
+                ),
+                vol.Optional(CONF_ENDPOINT_TIMEOUT, default=options.get(CONF_ENDPOINT_TIMEOUT, HTTP_TIMEOUT)): vol.All(
+                    vol.Coerce(float), vol.Range(min=1, max=120)
+                ),
+                vol.Optional(
+                    CONF_FORECAST_MINUTES, default=options.get(CONF_FORECAST_MINUTES, DEFAULT_FORECAST_MINUTES)
+                ): vol.All(vol.Coerce(int), vol.Range(min=0, max=24 * 60)),
+                # 0 disables automatic clock resync
+                vol.Optional(
+                    CONF_DRIFT_THRESHOLD, default=options.get(CONF_DRIFT_THRESHOLD, DEFAULT_DRIFT_THRESHOLD)
+                ): vol.All(vol.Coerce(int), vol.Range(min=0, max=3600)),
+                # Longest time a filtered sensor goes without a write; 0 disables filtering
+                vol.Optional(
+                    CONF_STATE_HEARTBEAT, default=options.get(CONF_STATE_HEARTBEAT, DEFAULT_STATE_HEARTBEAT)
+                ): vol.All(vol.Coerce(int), vol.Range(min=0, max=24 * 3600)),
+                # Polls only `status` this often; shorter intervals catch short hot-water draws
+                vol.Optional(
+                    CONF_STATUS_INTERVAL, default=options.get(CONF_STATUS_INTERVAL, DEFAULT_STATUS_INTERVAL)
+                ): vol.All(vol.Coerce(int), vol.Range(min=5, max=600)),
+            }),
+        )
@@ -1,81 +1,231 @@
-"""Constants for the Tesy integration."""
-from homeassistant.const import STATE_ON, STATE_OFF
-from homeassistant.components.water_heater import WaterHeaterEntityFeature
-
-DOMAIN = "tesy"
-HTTP_TIMEOUT = 15
-UPDATE_INTERVAL = 30
-
-TESY_SUPPORTED_FEATURES = (
-    WaterHeaterEntityFeature.TARGET_TEMPERATURE
-    | WaterHeaterEntityFeature.OPERATION_MODE
-    | WaterHeaterEntityFeature.AWAY_MODE
-    | WaterHeaterEntityFeature.ON_OFF
-)
-
-# API-specific mappings
-API_OPERATION_MODES = {
-    "Off": "Off",
-    "On": "On",
-    "Manual": "1",
-    "Program 1": "2",
-    "Program 2": "3",
-    "Program 3": "4",
-    "Eco Smart": "5",
-    "Eco Comfort": "6",
-    "Eco Night": "7",
-    "Performance": "10",
-}
-
-API_STATE_MAPPING = {
-    "on": STATE_ON,
-    "off": STATE_OFF,
-}
-
-# Device attributes
-ATTR_POWER = "power_sw"
-ATTR_CURRENT_TEMP = "gradus"
-ATTR_TARGET_TEMP = "ref_gradus"
-ATTR_MODE = "mode"
-ATTR_IS_HEATING = "heater_state"
-ATTR_LAST_OPERATION_MODE = "mode"
-ATTR_TIME_ZONE = "tz"
-ATTR_DATE_TIME = "date"
-
-# Device mapping
-TESY_DEVICE_TYPES = {
-    "2000": {
-        "name": "ModEco",
-        "min_setpoint": 8,
-        "max_setpoint": 75,
-    },
-    "2002": {
-        "name": "BeliSlimo",
-        "min_setpoint": 15,
-        "max_setpoint": 75,
-        "use_showers": True,
-    },
-    "2003": {
-        "name": "BiLight Smart",
-        "min_setpoint": 15,
-        "max_setpoint": 75,
-    },
-    "2004": {
-        "name": "ModEco 2",
-        "min_setpoint": 15,
-        "max_setpoint": 75,
-    },
-    "2005": {
-        "name": "BelliSlimo Lite",
-        "min_setpoint": 15,
-        "max_setpoint": 75,
-        "use_showers": True,
-    },
-}
-
-SCHEDULE_ENDPOINTS = {
-    "p1": "getP1",
-    "p2": "getP2",
-    "p3": "getP3",
-    "vacation": "getVacation",
-}
\ No newline at end of file
+"""Constants for the Tesy integration."""
+from homeassistant.const import STATE_ON, STATE_OFF
+from homeassistant.components.water_heater import WaterHeaterEntityFeature
+
+DOMAIN = "tesy"
+HTTP_TIMEOUT = 15
+UPDATE_INTERVAL = 30
+# Refresh requests arriving within this many seconds share one fetch
+REFRESH_COALESCE_WINDOW = 0.5
+# Share of the update interval a whole poll cycle may take by default
+POLL_BUDGET_RATIO = 0.8
+
+TESY_SUPPORTED_FEATURES = (
+    WaterHeaterEntityFeature.TARGET_TEMPERATURE
+    | WaterHeaterEntityFeature.OPERATION_MODE
+    | WaterHeaterEntityFeature.AWAY_MODE
+    | WaterHeaterEntityFeature.ON_OFF
+)
+
+# API-specific mappings
+API_OPERATION_MODES = {
+    "Off": "Off",
+    "On": "On",
+    "Manual": "1",
+    "Program 1": "2",
+    "Program 2": "3",
+    "Program 3": "4",
+    "Eco Smart": "5",
+    "Eco Comfort": "6",
+    "Eco Night": "7",
+    "Performance": "10",
+}
+
+API_STATE_MAPPING = {
+    "on": STATE_ON,
+    "off": STATE_OFF,
+}
+
+# Device attributes
+ATTR_POWER = "power_sw"
+ATTR_CURRENT_TEMP = "gradus"
+ATTR_TARGET_TEMP = "ref_gradus"
+ATTR_MODE = "mode"
+ATTR_IS_HEATING = "heater_state"
+ATTR_LAST_OPERATION_MODE = "mode"
+ATTR_TIME_ZONE = "tz"
+ATTR_DATE_TIME = "date"
+
+# Transition events fired once per refresh from the status diff
+EVENT_HEATING_STARTED = f"{DOMAIN}_heating_started"
+EVENT_HEATING_STOPPED = f"{DOMAIN}_heating_stopped"
+EVENT_ERROR_RAISED = f"{DOMAIN}_error_raised"
+EVENT_ERROR_CLEARED = f"{DOMAIN}_error_cleared"
+EVENT_MODE_CHANGED = f"{DOMAIN}_mode_changed"
+EVENT_BOOST_CHANGED = f"{DOMAIN}_boost_changed"
+
+# Persistent storage
+STORAGE_VERSION = 1
+STORAGE_SAVE_DELAY = 60
+# Longest interval between writes of state that changes on every poll
+STORAGE_SAVE_INTERVAL = 600
+
+# Number of completed heating cycles kept per device
+CYCLE_HISTORY_SIZE = 200
+
+# Hot-water draws: smallest drop between two polls counted as a draw, in
+# liters of 40 °C water (`mix40`) or °C of tank temperature when there is no `mix40`
+DRAW_MIN_MIX40_DROP = 3
+DRAW_MIN_TEMP_DROP = 1.5
+DRAW_HISTORY_SIZE = 200
+
+# Thermal model
+THERMAL_AMBIENT_TEMP = 20
+THERMAL_COLD_WATER_TEMP = 10
+THERMAL_FORGETTING_FACTOR = 0.995
+DEFAULT_FORECAST_MINUTES = 60
+# Fallbacks until the thermal model has learned the device
+DEFAULT_HEATING_RATE = 0.25
+DEFAULT_LOSS_COEFFICIENT = 0.0005
+DEFAULT_HEATER_POWER = 2400
+
+# Fleet power cap
+DATA_LOAD_SCHEDULER = f"{DOMAIN}_load_scheduler"
+# Optional pytesy transport (e.g. a cassette Player) used instead of HTTP for all devices
+DATA_TRANSPORT = f"{DOMAIN}_transport"
+DATA_PROFILER = f"{DOMAIN}_profiler"
+DATA_SNAPSHOTS = f"{DOMAIN}_snapshots"
+DEFAULT_RESTORE_CONCURRENCY = 4
+# Dispatched whenever a device coordinator is added or removed
+SIGNAL_FLEET_UPDATED = f"{DOMAIN}_fleet_updated"
+DEFAULT_POWER_STAGGER = 30
+POWER_RESERVATION_TTL = 180
+
+# Availability record: one bit per slot, kept for AVAILABILITY_DAYS
+AVAILABILITY_SLOT_SECONDS = 60
+AVAILABILITY_DAYS = 90
+AVAILABILITY_SAVE_INTERVAL = 600
+# Longest run of unsampled slots filled in when the samples on both sides agree
+AVAILABILITY_BRIDGE_SLOTS = 2
+
+# Bulk import: devices validated in parallel and per-device `/devstat` timeout
+DEFAULT_IMPORT_CONCURRENCY = 32
+DEFAULT_IMPORT_TIMEOUT = 5
+
+# Noisy numeric fields: (endpoint, key) -> deadband and extra hysteresis for
+# reversals, in the field's unit. A value is always written at least every
+# DEFAULT_STATE_HEARTBEAT seconds; energy totals are never filtered.
+STATE_FILTERS = {
+    ("status", "gradus"): {"deadband": 0.5, "hysteresis": 0.5},
+    ("status", "watts"): {"deadband": 50, "hysteresis": 25},
+    ("status", "mix40"): {"deadband": 2, "hysteresis": 1},
+    ("calcRes", "watt"): {"deadband": 50, "hysteresis": 25},
+}
+DEFAULT_STATE_HEARTBEAT = 900
+
+# Anomaly detection: kind -> (polls to raise, clean polls to clear)
+ANOMALY_KINDS = {
+    "heating_stalled": (3, 1),
+    "power_out_of_range": (3, 1),
+    "error_persistent": (3, 1),
+    "over_temperature": (3, 1),
+    "temperature_jump": (2, 10),
+}
+ANOMALY_EWMA_ALPHA = 0.1
+# Polls before the rate statistics are trusted
+ANOMALY_WARMUP = 20
+# °C per minute below which heating counts as stalled, after this many minutes
+ANOMALY_STALL_RATE = 0.02
+ANOMALY_STALL_MINUTES = 30
+# Acceptable `watts` while heating, as a share of the rated power
+ANOMALY_POWER_RANGE = (0.6, 1.25)
+ANOMALY_OVERTEMP_MARGIN = 8
+ANOMALY_JUMP_SIGMA = 6
+ANOMALY_JUMP_MIN_RATE = 1.0
+
+# Offline command journal: seconds an intent stays valid, per command type
+JOURNAL_INTENT_TTL = {
+    "temperature": 6 * 3600,
+    "operation_mode": 6 * 3600,
+    "power": 6 * 3600,
+    "vacation": 24 * 3600,
+}
+JOURNAL_MAX_ATTEMPTS = 5
+JOURNAL_SAVE_DELAY = 1
+
+# Clock drift: resync when the device clock is off by more than this many
+# seconds on consecutive polls, at most once per CLOCK_SYNC_MIN_INTERVAL
+DEFAULT_DRIFT_THRESHOLD = 120
+CLOCK_SYNC_MIN_INTERVAL = 6 * 3600
+CLOCK_DRIFT_CONFIRMATIONS = 2
+
+# Device mapping
+TESY_DEVICE_TYPES = {
+    "2000": {
+        "name": "ModEco",
+        "min_setpoint": 8,
+        "max_setpoint": 75,
+    },
+    "2002": {
+        "name": "BeliSlimo",
+        "min_setpoint": 15,
+        "max_setpoint": 75,
+        "use_showers": True,
+    },
+    "2003": {
+        "name": "BiLight Smart",
+        "min_setpoint": 15,
+        "max_setpoint": 75,
+    },
+    "2004": {
+        "name": "ModEco 2",
+        "min_setpoint": 15,
+        "max_setpoint": 75,
+    },
+    "2005": {
+        "name": "BelliSlimo Lite",
+        "min_setpoint": 15,
+        "max_setpoint": 75,
+        "use_showers": True,
+    },
+}
+
+SCHEDULE_ENDPOINTS = {
+    "p1": "getP1",
+    "p2": "getP2",
+    "p3": "getP3",
+    "vacation": "getVacation",
+}
+
+# Endpoint name -> key under which its payload is stored in coordinator data
+ENDPOINT_DATA_KEYS = {
+    "status": "status",
+    "calcRes": "calcRes",
+    "devstat": "devstat",
+    **{endpoint: schedule for schedule, endpoint in SCHEDULE_ENDPOINTS.items()},
+}
+
+# Polling interval of `status`; every other endpoint is fetched at most once
+# per DEFAULT_STATUS_INTERVAL seconds, or less often as listed below
+DEFAULT_STATUS_INTERVAL = 60
+# Endpoint -> minimum seconds between fetches; schedules and identity rarely
+# change and are refreshed right after the integration writes them
+ENDPOINT_REFRESH_INTERVALS = {
+    "devstat": 3600,
+    **{endpoint: 900 for endpoint in SCHEDULE_ENDPOINTS.values()},
+}
+
+# Endpoints every device answers; everything else is probed once per entry
+CORE_ENDPOINTS = ["status", "devstat"]
+# Per-endpoint timeout of the capability probe; all endpoints are probed at once
+CAPABILITY_PROBE_TIMEOUT = 5
+
+# Capability profile applied to every model, overridden per model through
+# the optional "capabilities" key in TESY_DEVICE_TYPES. Endpoints are probed
+# and boost/lock are detected from the `status` fields, so an override is only
+# needed for firmware that reports a function it does not have.
+TESY_DEFAULT_CAPABILITIES = {
+    "endpoints": list(ENDPOINT_DATA_KEYS),
+    "boost": True,
+    "child_lock": True,
+}
+
+# Config entry keys
+CONF_CAPABILITIES = "capabilities"
+CONF_REPROBE = "reprobe_capabilities"
+CONF_POLL_BUDGET = "poll_budget"
+CONF_ENDPOINT_TIMEOUT = "endpoint_timeout"
+CONF_FORECAST_MINUTES = "forecast_minutes"
+CONF_DRIFT_THRESHOLD = "drift_threshold"
+CONF_STATE_HEARTBEAT = "state_heartbeat"
+CONF_STATUS_INTERVAL = "status_interval"
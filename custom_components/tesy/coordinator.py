@@ -0,0 +1,232 @@
+"""Data update coordinator for the Tesy integration."""
+import asyncio
+import logging
+from homeassistant.core import CALLBACK_TYPE, callback
+from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
+from homeassistant.util import dt as dt_util
+from .const import ENDPOINT_DATA_KEYS, HTTP_TIMEOUT, REFRESH_COALESCE_WINDOW
+from .pytesy import TesyError, TesyTimeoutError
+from .utils import get_client
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class TesyDataUpdateCoordinator(DataUpdateCoordinator):
+    """Coordinator that coalesces overlapping refresh requests into one fetch.
+
+    Entities, switches and services all ask for a refresh after a write. Instead
+    of debouncing them into several back-to-back polls, every request is served
+    by a single in-flight fetch as long as that fetch started after the request
+    was made. `data_as_of` is the loop time at which the current data was
+    fetched, so callers can wait for "data at least as fresh as T".
+
+    Each poll cycle is bounded by `poll_budget` seconds. Endpoints are fetched
+    in order and each one gets a fair share of the remaining budget, capped at
+    `endpoint_timeout`; an endpoint that overruns its slice is cancelled and
+    its previous payload is kept. `complete` and `missing_endpoints` describe
+    the last cycle. Endpoints listed in `refresh_intervals` are only fetched
+    once their interval has elapsed, or after `async_invalidate`.
+
+    Listeners are notified per data group, see `async_update_listeners`.
+    """
+
+    def __init__(
+        self,
+        hass,
+        logger,
+        *,
+        api_url,
+        endpoints,
+        poll_budget,
+        endpoint_timeout=HTTP_TIMEOUT,
+        coalesce_window=REFRESH_COALESCE_WINDOW,
+        refresh_intervals=None,
+        **kwargs,
+    ):
+        """Initialize the coordinator."""
+        super().__init__(hass, logger, **kwargs)
+        self.api_url = api_url
+        self.client = get_client(hass, api_url)
+        self.endpoints = list(endpoints)
+        self.poll_budget = poll_budget
+        self.endpoint_timeout = endpoint_timeout
+        self.complete = False
+        self.missing_endpoints = []
+        # endpoint -> (request sent, response received) as UTC timestamps
+        self.fetch_times = {}
+        self._coalesce_window = coalesce_window
+        self._snapshot_handlers = []
+        self.data_as_of = 0.0
+        self._inflight = None
+        self._inflight_started = 0.0
+        self._pending = None
+        # endpoint -> minimum seconds between fetches; endpoints not listed are fetched every poll
+        self.refresh_intervals = dict(refresh_intervals or {})
+        self._fetched_at = {}
+        self._notified = None
+
+    async def async_request_refresh(self) -> None:
+        """Request a refresh, sharing any fetch that starts after this call."""
+        await self.async_wait_for_data(self.hass.loop.time())
+
+    async def async_wait_for_data(self, not_before: float) -> None:
+        """Wait until the coordinator holds data fetched no earlier than `not_before`."""
+        if self.data_as_of >= not_before:
+            return
+
+        if self._inflight is not None and self._inflight_started >= not_before:
+            await asyncio.shield(self._inflight)
+            return
+
+        if self._pending is None:
+            self._pending = self.hass.async_create_task(self._async_pending_refresh(self._inflight))
+        await asyncio.shield(self._pending)
+
+    async def _async_pending_refresh(self, previous) -> None:
+        """Run one refresh after the current fetch and the coalescing window."""
+        try:
+            if previous is not None:
+                await asyncio.shield(previous)
+            await asyncio.sleep(self._coalesce_window)
+        finally:
+            self._pending = None
+        await self.async_refresh()
+
+    @callback
+    def async_add_snapshot_handler(self, handler) -> CALLBACK_TYPE:
+        """Call `handler(previous, current)` once after every successful refresh.
+
+        Handlers run before listeners are notified, so entities render state the
+        handlers derived from the same snapshot. They must be cheap.
+        """
+        self._snapshot_handlers.append(handler)
+
+        @callback
+        def remove_handler() -> None:
+            self._snapshot_handlers.remove(handler)
+
+        return remove_handler
+
+    async def _async_refresh(self, *args, **kwargs) -> None:
+        """Refresh data, tracking the fetch so overlapping requests can join it."""
+        started = self.hass.loop.time()
+        inflight = self.hass.loop.create_future()
+        self._inflight = inflight
+        self._inflight_started = started
+        try:
+            await super()._async_refresh(*args, **kwargs)
+            if self.last_update_success:
+                self.data_as_of = started
+        finally:
+            if self._inflight is inflight:
+                self._inflight = None
+            inflight.set_result(None)
+
+    async def _async_update_data(self):
+        """Fetch all supported endpoints within the poll budget."""
+        loop = self.hass.loop
+        previous = self.data or {}
+        deadline = loop.time() + self.poll_budget
+        now = loop.time()
+        due = [endpoint for endpoint in self.endpoints if self._is_due(endpoint, now)]
+        # Endpoints on a slower cadence keep their payload until they are due
+        data = {
+            ENDPOINT_DATA_KEYS[endpoint]: previous[ENDPOINT_DATA_KEYS[endpoint]]
+            for endpoint in self.endpoints
+            if endpoint not in due and ENDPOINT_DATA_KEYS[endpoint] in previous
+        }
+        missing = []
+
+        for index, endpoint in enumerate(due):
+            key = ENDPOINT_DATA_KEYS[endpoint]
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                missing.append(endpoint)
+            else:
+                time_slice = min(self.endpoint_timeout, remaining / (len(due) - index))
+                payload = await self._async_fetch_endpoint(endpoint, time_slice)
+                if payload:
+                    data[key] = payload
+                    self._fetched_at[endpoint] = now
+                    continue
+                missing.append(endpoint)
+
+            # Keep the last known payload so entities do not flap on a straggler
+            if key in previous:
+                data[key] = previous[key]
+
+        self.missing_endpoints = missing
+        self.complete = not missing
+        if due and len(missing) == len(due):
+            raise UpdateFailed(f"No endpoint answered within {self.poll_budget:.0f}s")
+        if missing:
+            _LOGGER.debug("Incomplete poll of %s, missing: %s", self.api_url, ", ".join(missing))
+        self._async_run_snapshot_handlers(previous, data)
+        return data
+
+    async def _async_fetch_endpoint(self, endpoint, timeout):
+        """Fetch one endpoint, giving up after `timeout` seconds."""
+        sent = dt_util.utcnow().timestamp()
+        try:
+            # No retries: the poll budget decides how long a straggler may take
+            payload = await self.client.get(endpoint, timeout=timeout, retries=0)
+        except TesyTimeoutError:
+            _LOGGER.warning("Fetching %s timed out after %.1fs", endpoint, timeout)
+            return None
+        except TesyError as e:
+            _LOGGER.error("Error fetching %s from Tesy API: %s", endpoint, e)
+            return None
+        self.fetch_times[endpoint] = (sent, dt_util.utcnow().timestamp())
+
+        if not payload:
+            _LOGGER.warning("Empty %s data received.", endpoint)
+        return payload
+
+    def _is_due(self, endpoint, now) -> bool:
+        """Return True if an endpoint's refresh interval has elapsed."""
+        interval = self.refresh_intervals.get(endpoint)
+        fetched_at = self._fetched_at.get(endpoint)
+        return interval is None or fetched_at is None or now - fetched_at >= interval
+
+    @callback
+    def async_invalidate(self, *endpoints) -> None:
+        """Fetch the given endpoints on the next refresh, whatever their interval."""
+        for endpoint in endpoints:
+            self._fetched_at.pop(endpoint, None)
+
+    @callback
+    def async_update_listeners(self) -> None:
+        """Notify only the listeners whose data group changed.
+
+        Entities pass the data keys they read as their coordinator context,
+        e.g. "status" or ("calcRes", "devstat"). A listener without context
+        hears every update, and everyone is notified when availability flips.
+        """
+        changed = self._async_changed_groups()
+        for update_callback, context in list(self._listeners.values()):
+            if changed is None or context is None or not changed.isdisjoint(_context_groups(context)):
+                update_callback()
+
+    @callback
+    def _async_changed_groups(self):
+        """Return the data keys that changed since the last notification, None for all."""
+        data = self.data or {}
+        notified, self._notified = self._notified, (self.last_update_success, dict(data))
+        if notified is None or notified[0] != self.last_update_success:
+            return None
+        previous = notified[1]
+        return {key for key in data.keys() | previous.keys() if data.get(key) != previous.get(key)}
+
+    @callback
+    def _async_run_snapshot_handlers(self, previous, current) -> None:
+        """Hand the previous and current snapshot to every handler."""
+        for handler in list(self._snapshot_handlers):
+            try:
+                handler(previous or {}, current or {})
+            except Exception:
+                _LOGGER.exception("Error in snapshot handler %s", handler)
+
+
+def _context_groups(context) -> tuple:
+    """Return the data keys named by a listener context."""
+    return (context,) if isinstance(context, str) else tuple(context)
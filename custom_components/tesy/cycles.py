@@ -0,0 +1,150 @@
+"""Incremental heating-cycle detection and per-cycle analytics."""
+import logging
+from collections import deque
+from homeassistant.core import callback
+from homeassistant.helpers.storage import Store
+from homeassistant.util import dt as dt_util
+from .const import (
+    DOMAIN,
+    ATTR_CURRENT_TEMP,
+    ATTR_IS_HEATING,
+    CYCLE_HISTORY_SIZE,
+    STORAGE_SAVE_DELAY,
+    STORAGE_VERSION,
+)
+from .utils import is_heating, to_float
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class HeatingCycleDetector:
+    """Detect heating cycles from successive `status` payloads.
+
+    Every poll costs O(1): an open cycle accumulates energy by integrating
+    `watts` over the poll interval, and a closed cycle is appended to a
+    bounded deque of `(start, end, temp_rise, energy_wh)` tuples while the
+    running daily aggregates are updated in place.
+    """
+
+    def __init__(self, max_cycles=CYCLE_HISTORY_SIZE):
+        """Initialize the detector."""
+        self.cycles = deque(maxlen=max_cycles)
+        self._open = None
+        self._last_time = None
+        self._last_watts = None
+        self._day = None
+        self.day_cycles = 0
+        self.day_duration = 0.0
+        self.day_energy = 0.0
+
+    def update(self, status: dict, timestamp: float):
+        """Feed one status payload; return the cycle it closed, if any."""
+        self._roll_day(timestamp)
+        heating = is_heating(status.get(ATTR_IS_HEATING))
+        temperature = to_float(status.get(ATTR_CURRENT_TEMP))
+        watts = to_float(status.get("watts")) or 0.0
+        closed = None
+
+        if self._open is not None and self._last_time is not None:
+            # Trapezoidal integration while heating, last known power at the edge
+            end_watts = watts if heating else self._last_watts
+            elapsed = max(0.0, timestamp - self._last_time)
+            self._open["energy"] += (self._last_watts + end_watts) / 2 * elapsed / 3600
+
+        if heating and self._open is None:
+            self._open = {"start": timestamp, "start_temp": temperature, "energy": 0.0}
+        elif not heating and self._open is not None:
+            closed = self._close(timestamp, temperature)
+
+        self._last_time = timestamp
+        self._last_watts = watts
+        return closed
+
+    def _close(self, timestamp, temperature):
+        """Close the open cycle and account it in the daily aggregates."""
+        cycle = self._open
+        self._open = None
+        start_temp = cycle["start_temp"]
+        temp_rise = temperature - start_temp if None not in (temperature, start_temp) else None
+        record = (cycle["start"], timestamp, temp_rise, round(cycle["energy"], 1))
+        self.cycles.append(record)
+        self.day_cycles += 1
+        self.day_duration += timestamp - cycle["start"]
+        self.day_energy += cycle["energy"]
+        return record
+
+    def _roll_day(self, timestamp):
+        """Reset the daily aggregates at local midnight."""
+        day = dt_util.as_local(dt_util.utc_from_timestamp(timestamp)).date().isoformat()
+        if day != self._day:
+            self._day = day
+            self.day_cycles = 0
+            self.day_duration = 0.0
+            self.day_energy = 0.0
+
+    @property
+    def is_open(self) -> bool:
+        """Return True while a heating cycle is in progress."""
+        return self._open is not None
+
+    @property
+    def average_cycle_minutes(self):
+        """Return today's average cycle length in minutes."""
+        if not self.day_cycles:
+            return None
+        return round(self.day_duration / self.day_cycles / 60, 1)
+
+    @property
+    def kwh_per_cycle(self):
+        """Return today's average energy per cycle in kWh."""
+        if not self.day_cycles:
+            return None
+        return round(self.day_energy / self.day_cycles / 1000, 3)
+
+    @property
+    def last_cycle(self):
+        """Return the most recent completed cycle as a dict."""
+        if not self.cycles:
+            return None
+        start, end, temp_rise, energy = self.cycles[-1]
+        return {
+            "start": dt_util.utc_from_timestamp(start).isoformat(),
+            "end": dt_util.utc_from_timestamp(end).isoformat(),
+            "duration_min": round((end - start) / 60, 1),
+            "temp_rise": temp_rise,
+            "energy_wh": energy,
+        }
+
+    def as_dict(self) -> dict:
+        """Return a compact, JSON-serializable representation."""
+        return {
+            "cycles": [list(cycle) for cycle in self.cycles],
+            "day": [self._day, self.day_cycles, self.day_duration, self.day_energy],
+        }
+
+    def load(self, stored: dict) -> None:
+        """Restore state saved by `as_dict`."""
+        self.cycles.extend(tuple(cycle) for cycle in stored.get("cycles", []))
+        day = stored.get("day")
+        if day and len(day) == 4:
+            self._day, self.day_cycles, self.day_duration, self.day_energy = day
+
+
+async def async_setup_cycle_detector(hass, entry, coordinator):
+    """Create the detector, restore its history and feed it every refresh."""
+    detector = HeatingCycleDetector()
+    store = Store(hass, STORAGE_VERSION, f"{DOMAIN}.{entry.entry_id}.cycles")
+    stored = await store.async_load()
+    if stored:
+        detector.load(stored)
+
+    @callback
+    def handle_snapshot(previous, current):
+        status = current.get("status")
+        if not status or status is previous.get("status"):
+            return
+        if detector.update(status, dt_util.utcnow().timestamp()):
+            store.async_delay_save(detector.as_dict, STORAGE_SAVE_DELAY)
+
+    entry.async_on_unload(coordinator.async_add_snapshot_handler(handle_snapshot))
+    return detector
@@ -0,0 +1,55 @@
+"""Device triggers for Tesy heater transitions."""
+import voluptuous as vol
+from homeassistant.components.device_automation import DEVICE_TRIGGER_BASE_SCHEMA
+from homeassistant.components.homeassistant.triggers import event as event_trigger
+from homeassistant.const import CONF_DEVICE_ID, CONF_DOMAIN, CONF_PLATFORM, CONF_TYPE
+from .const import (
+    DOMAIN,
+    EVENT_HEATING_STARTED,
+    EVENT_HEATING_STOPPED,
+    EVENT_ERROR_RAISED,
+    EVENT_ERROR_CLEARED,
+    EVENT_MODE_CHANGED,
+    EVENT_BOOST_CHANGED,
+)
+
+# Trigger type -> event fired by transitions.py
+TRIGGER_EVENTS = {
+    "heating_started": EVENT_HEATING_STARTED,
+    "heating_stopped": EVENT_HEATING_STOPPED,
+    "error_raised": EVENT_ERROR_RAISED,
+    "error_cleared": EVENT_ERROR_CLEARED,
+    "mode_changed": EVENT_MODE_CHANGED,
+    "boost_changed": EVENT_BOOST_CHANGED,
+}
+
+TRIGGER_SCHEMA = DEVICE_TRIGGER_BASE_SCHEMA.extend(
+    {vol.Required(CONF_TYPE): vol.In(TRIGGER_EVENTS)}
+)
+
+
+async def async_get_triggers(hass, device_id):
+    """List the transition triggers for a Tesy device."""
+    return [
+        {
+            CONF_PLATFORM: "device",
+            CONF_DOMAIN: DOMAIN,
+            CONF_DEVICE_ID: device_id,
+            CONF_TYPE: trigger_type,
+        }
+        for trigger_type in TRIGGER_EVENTS
+    ]
+
+
+async def async_attach_trigger(hass, config, action, trigger_info):
+    """Attach a trigger by listening for the matching transition event."""
+    event_config = event_trigger.TRIGGER_SCHEMA(
+        {
+            event_trigger.CONF_PLATFORM: "event",
+            event_trigger.CONF_EVENT_TYPE: TRIGGER_EVENTS[config[CONF_TYPE]],
+            event_trigger.CONF_EVENT_DATA: {CONF_DEVICE_ID: config[CONF_DEVICE_ID]},
+        }
+    )
+    return await event_trigger.async_attach_trigger(
+        hass, event_config, action, trigger_info, platform_type="device"
+    )
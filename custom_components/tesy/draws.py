@@ -0,0 +1,155 @@
+"""Hot-water draw detection and consumption estimate."""
+import logging
+from collections import deque
+from homeassistant.core import callback
+from homeassistant.helpers.storage import Store
+from homeassistant.util import dt as dt_util
+from .const import (
+    DOMAIN,
+    ATTR_CURRENT_TEMP,
+    DRAW_HISTORY_SIZE,
+    DRAW_MIN_MIX40_DROP,
+    DRAW_MIN_TEMP_DROP,
+    THERMAL_COLD_WATER_TEMP,
+    STORAGE_SAVE_DELAY,
+    STORAGE_VERSION,
+)
+from .utils import to_float
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class DrawDetector:
+    """Detect hot-water draws from successive `status` payloads.
+
+    Standby losses lower `mix40` and `gradus` slowly, a tap being opened
+    drops them sharply between two polls. A drop of at least
+    DRAW_MIN_MIX40_DROP liters (or DRAW_MIN_TEMP_DROP °C when the firmware
+    does not report `mix40`) opens a draw event; further drops on the next
+    polls extend it and the first poll without one closes it. The volume is
+    the `mix40` drop, i.e. liters of 40 °C water, or a temperature based
+    estimate from the tank volume learned by the thermal model.
+
+    Every poll is O(1); closed events go to a bounded deque of
+    `(start, end, liters)` tuples and the daily aggregates are kept in place.
+    """
+
+    def __init__(self, max_events=DRAW_HISTORY_SIZE):
+        """Initialize the detector."""
+        self.events = deque(maxlen=max_events)
+        self._open = None
+        self._last = None
+        self._day = None
+        self.day_draws = 0
+        self.day_liters = 0.0
+
+    def update(self, status: dict, timestamp: float, tank_volume=None):
+        """Feed one status payload; return the draw it closed, if any."""
+        self._roll_day(timestamp)
+        temperature = to_float(status.get(ATTR_CURRENT_TEMP))
+        mix40 = to_float(status.get("mix40"))
+        liters = self._drawn_liters(temperature, mix40, tank_volume)
+        self._last = (temperature, mix40)
+
+        if liters:
+            if self._open is None:
+                self._open = {"start": timestamp, "liters": 0.0}
+            self._open["liters"] += liters
+            self._open["end"] = timestamp
+            return None
+        if self._open is not None:
+            return self._close()
+        return None
+
+    def _drawn_liters(self, temperature, mix40, tank_volume):
+        """Return the liters drawn since the previous poll, 0 if there was no draw."""
+        if self._last is None:
+            return 0.0
+        last_temperature, last_mix40 = self._last
+        if None not in (mix40, last_mix40):
+            drop = last_mix40 - mix40
+            return drop if drop >= DRAW_MIN_MIX40_DROP else 0.0
+        if None in (temperature, last_temperature) or not tank_volume:
+            return 0.0
+        drop = last_temperature - temperature
+        if drop < DRAW_MIN_TEMP_DROP:
+            return 0.0
+        # Energy taken out of the tank, expressed as liters of 40 °C water
+        return tank_volume * drop / (40 - THERMAL_COLD_WATER_TEMP)
+
+    def _close(self):
+        """Close the open event and account it in the daily aggregates."""
+        event = self._open
+        self._open = None
+        record = (event["start"], event["end"], round(event["liters"], 1))
+        self.events.append(record)
+        self.day_draws += 1
+        self.day_liters += event["liters"]
+        return record
+
+    def _roll_day(self, timestamp):
+        """Reset the daily aggregates at local midnight."""
+        day = dt_util.as_local(dt_util.utc_from_timestamp(timestamp)).date().isoformat()
+        if day != self._day:
+            self._day = day
+            self.day_draws = 0
+            self.day_liters = 0.0
+
+    @property
+    def is_open(self) -> bool:
+        """Return True while water is being drawn."""
+        return self._open is not None
+
+    @property
+    def last_draw(self):
+        """Return the most recent completed draw as a dict."""
+        if not self.events:
+            return None
+        start, end, liters = self.events[-1]
+        return {
+            "start": dt_util.utc_from_timestamp(start).isoformat(),
+            "end": dt_util.utc_from_timestamp(end).isoformat(),
+            "liters": liters,
+        }
+
+    def recent_events(self, count=10):
+        """Return the latest draws, newest first."""
+        return [
+            {"start": dt_util.utc_from_timestamp(start).isoformat(), "liters": liters}
+            for start, _, liters in list(self.events)[-count:][::-1]
+        ]
+
+    def as_dict(self) -> dict:
+        """Return a compact, JSON-serializable representation."""
+        return {
+            "events": [list(event) for event in self.events],
+            "day": [self._day, self.day_draws, self.day_liters],
+        }
+
+    def load(self, stored: dict) -> None:
+        """Restore state saved by `as_dict`."""
+        self.events.extend(tuple(event) for event in stored.get("events", []))
+        day = stored.get("day")
+        if day and len(day) == 3:
+            self._day, self.day_draws, self.day_liters = day
+
+
+async def async_setup_draw_detector(hass, entry, coordinator, thermal=None):
+    """Create the detector, restore its history and feed it every refresh."""
+    detector = DrawDetector()
+    store = Store(hass, STORAGE_VERSION, f"{DOMAIN}.{entry.entry_id}.draws")
+    stored = await store.async_load()
+    if stored:
+        detector.load(stored)
+
+    @callback
+    def handle_snapshot(previous, current):
+        status = current.get("status")
+        if not status or status is previous.get("status"):
+            return
+        tank_volume = thermal.volume if thermal is not None else None
+        if detector.update(status, dt_util.utcnow().timestamp(), tank_volume):
+            store.async_delay_save(detector.as_dict, STORAGE_SAVE_DELAY)
+
+    entry.async_on_unload(coordinator.async_add_snapshot_handler(handle_snapshot))
+    return detector
@@ -0,0 +1,93 @@
+"""Deadband and hysteresis filtering of noisy numeric states."""
+import time
+from homeassistant.core import callback
+from .const import STATE_FILTERS
+
+
+class DeadbandFilter:
+    """Decide whether a new reading is worth a state write.
+
+    A reading is reported when it moves at least `deadband` away from the
+    last reported value. Moving against the direction of the last reported
+    change needs `deadband + hysteresis`, so a value wobbling around a
+    threshold does not flip back and forth. Regardless of either, a reading
+    is reported once `max_interval` seconds have passed since the last one,
+    as are changes to or from None.
+    """
+
+    def __init__(self, deadband, hysteresis=0.0, max_interval=900):
+        """Initialize the filter."""
+        self.deadband = deadband
+        self.hysteresis = hysteresis
+        self.max_interval = max_interval
+        self.value = None
+        self._reported_at = None
+        self._direction = 0
+
+    def update(self, value, now) -> bool:
+        """Feed a reading taken at monotonic time `now`; return True if it is reported."""
+        if (
+            self._reported_at is None
+            or value is None
+            or self.value is None
+            or now - self._reported_at >= self.max_interval
+        ):
+            return self._report(value, now)
+
+        delta = value - self.value
+        threshold = self.deadband
+        if delta * self._direction < 0:
+            threshold += self.hysteresis
+        if delta == 0 or abs(delta) < threshold:
+            return False
+        return self._report(value, now)
+
+    def _report(self, value, now) -> bool:
+        if value is not None and self.value is not None and value != self.value:
+            self._direction = 1 if value > self.value else -1
+        self.value = value
+        self._reported_at = now
+        return True
+
+
+def make_state_filter(endpoint, key, heartbeat):
+    """Return the filter configured for a payload field, None if it is not filtered."""
+    settings = STATE_FILTERS.get((endpoint, key))
+    if settings is None or not heartbeat:
+        return None
+    return DeadbandFilter(max_interval=heartbeat, **settings)
+
+
+class StateFilterMixin:
+    """Skip coordinator-triggered state writes while only a filtered reading wobbles.
+
+    Entities set `state_filter`, return the raw reading from
+    `_filtered_reading` and report the filter's value instead. Anything in
+    `_unfiltered_signature` that changes still writes immediately.
+    """
+
+    state_filter = None
+    _filter_signature = None
+
+    def _filtered_reading(self):
+        raise NotImplementedError
+
+    def _unfiltered_signature(self):
+        return (self.available,)
+
+    async def async_added_to_hass(self):
+        """Seed the filter with the current reading."""
+        await super().async_added_to_hass()
+        if self.state_filter is not None:
+            self.state_filter.update(self._filtered_reading(), time.monotonic())
+            self._filter_signature = self._unfiltered_signature()
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        if self.state_filter is not None:
+            reported = self.state_filter.update(self._filtered_reading(), time.monotonic())
+            signature = self._unfiltered_signature()
+            if not reported and signature == self._filter_signature:
+                return
+            self._filter_signature = signature
+        super()._handle_coordinator_update()
@@ -0,0 +1,172 @@
+"""Persistent journal of commands that could not reach the device."""
+import logging
+from homeassistant.core import callback
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers.storage import Store
+from homeassistant.util import dt as dt_util
+from .const import (
+    DOMAIN,
+    JOURNAL_INTENT_TTL,
+    JOURNAL_MAX_ATTEMPTS,
+    JOURNAL_SAVE_DELAY,
+    STORAGE_VERSION,
+)
+from .scheduler import async_run_with_power_budget
+from .services import async_send_vacation
+from .utils import async_set_operation_mode, async_set_power, async_set_temperature
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class CommandJournal:
+    """Latest intent per command type, replayed in order once the device answers.
+
+    Recording a command replaces any earlier intent of the same type, so an
+    automation that keeps retrying still leaves a single entry. Intents expire
+    after `JOURNAL_INTENT_TTL` seconds for their type and are dropped after
+    `JOURNAL_MAX_ATTEMPTS` failed replays. Each replay is a single request
+    without client retries; the next poll the device answers is the retry.
+    Mode changes and powering on go through the fleet power cap, like the
+    live commands do.
+    """
+
+    def __init__(self, hass, store, api_url, entry_id):
+        """Initialize the journal."""
+        self.hass = hass
+        self._store = store
+        self._api_url = api_url
+        self._entry_id = entry_id
+        self._intents = {}
+        self._seq = 0
+        self._replaying = False
+
+    async def async_load(self):
+        """Load intents left over from before a restart."""
+        stored = await self._store.async_load() or {}
+        self._intents = stored.get("intents", {})
+        self._seq = max((intent["seq"] for intent in self._intents.values()), default=0)
+
+    @property
+    def pending(self):
+        """Return the command types waiting for replay, oldest first."""
+        return [kind for kind, _ in sorted(self._intents.items(), key=lambda item: item[1]["seq"])]
+
+    @callback
+    def async_record(self, kind, args):
+        """Record the latest intent for a command type."""
+        self._seq += 1
+        self._intents[kind] = {
+            "args": args,
+            "seq": self._seq,
+            "expires": dt_util.utcnow().timestamp() + JOURNAL_INTENT_TTL[kind],
+            "attempts": 0,
+        }
+        _LOGGER.warning("Device at %s unreachable, %s will be replayed when it answers", self._api_url, kind)
+        self._async_save()
+
+    @callback
+    def async_discard(self, kind):
+        """Forget a pending intent, e.g. because a newer command succeeded."""
+        if self._intents.pop(kind, None) is not None:
+            self._async_save()
+
+    async def async_replay(self) -> bool:
+        """Replay pending intents in order; return True if anything was sent."""
+        if self._replaying or not self._intents:
+            return False
+        self._replaying = True
+        sent = False
+        try:
+            now = dt_util.utcnow().timestamp()
+            for kind in self.pending:
+                intent = self._intents[kind]
+                if intent["expires"] <= now:
+                    _LOGGER.info("Dropping expired %s intent for %s", kind, self._api_url)
+                    del self._intents[kind]
+                    continue
+
+                if await self._async_send(kind, intent["args"]):
+                    _LOGGER.info("Replayed %s for %s", kind, self._api_url)
+                    del self._intents[kind]
+                    sent = True
+                    continue
+
+                intent["attempts"] += 1
+                if intent["attempts"] >= JOURNAL_MAX_ATTEMPTS:
+                    _LOGGER.error("Giving up on %s for %s after %s attempts", kind, self._api_url, intent["attempts"])
+                    del self._intents[kind]
+                    continue
+                # Keep the order: later intents wait for this one
+                break
+        finally:
+            self._replaying = False
+            self._async_save()
+        return sent
+
+    async def _async_send(self, kind, args) -> bool:
+        """Send one intent to the device."""
+        if kind == "temperature":
+            return await async_set_temperature(self.hass, self._api_url, args["temperature"], retries=0)
+        if kind == "operation_mode":
+            return await self._async_send_with_power_budget(
+                kind, args, "mode", lambda: async_set_operation_mode(self.hass, self._api_url, args["mode"], retries=0)
+            )
+        if kind == "power":
+            if not args["on"]:
+                return await async_set_power(self.hass, self._api_url, "off", retries=0)
+            return await self._async_send_with_power_budget(
+                kind, args, "power", lambda: async_set_power(self.hass, self._api_url, "on", retries=0)
+            )
+        if kind == "vacation":
+            return await async_send_vacation(self.hass, self._api_url, args["vacation_end"], args["vacation_temp"])
+        _LOGGER.error("Unknown journal intent: %s", kind)
+        return True
+
+    async def _async_send_with_power_budget(self, kind, args, budget_kind, send) -> bool:
+        """Send a load-increasing intent through the fleet power cap.
+
+        A command the cap queues counts as sent: the scheduler releases it
+        when power frees up, and records the intent again if it then fails.
+        """
+        outcome = {}
+
+        async def action():
+            outcome["sent"] = await send()
+            if not outcome["sent"] and outcome.get("queued"):
+                self.async_record(kind, args)
+
+        try:
+            granted = await async_run_with_power_budget(self.hass, self._entry_id, budget_kind, action)
+        except HomeAssistantError as err:
+            # The heater can never fit under the cap; replaying again would not help
+            _LOGGER.error("Dropping %s for %s: %s", kind, self._api_url, err)
+            return True
+        if not granted:
+            outcome["queued"] = True
+            return True
+        return outcome["sent"]
+
+    @callback
+    def _async_save(self):
+        self._store.async_delay_save(lambda: {"intents": self._intents}, JOURNAL_SAVE_DELAY)
+
+
+async def async_setup_command_journal(hass, entry, coordinator, api_url):
+    """Create the journal and replay it after every refresh the device answers."""
+    journal = CommandJournal(
+        hass, Store(hass, STORAGE_VERSION, f"{DOMAIN}.{entry.entry_id}.journal"), api_url, entry.entry_id
+    )
+    await journal.async_load()
+
+    async def async_replay():
+        if await journal.async_replay():
+            await coordinator.async_request_refresh()
+
+    @callback
+    def handle_snapshot(previous, current):
+        # Replay once the device answers status again
+        if journal.pending and "status" not in coordinator.missing_endpoints:
+            entry.async_create_background_task(hass, async_replay(), f"{DOMAIN}_journal_replay")
+
+    entry.async_on_unload(coordinator.async_add_snapshot_handler(handle_snapshot))
+    return journal
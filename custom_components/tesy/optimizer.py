@@ -0,0 +1,136 @@
+"""Cheapest weekly heating program for time-of-use prices.
+
+Pure functions with no Home Assistant dependency; `solve_program` is meant to
+run in an executor thread.
+"""
+import math
+
+HOURS_PER_WEEK = 7 * 24
+INFEASIBLE = math.inf
+
+
+def solve_program(
+    prices,
+    comfort,
+    heating_rate,
+    loss_coefficient,
+    power_kw,
+    start_temp,
+    min_temp,
+    max_temp,
+    ambient_temp=20,
+):
+    """Return the cheapest weekly setpoint program and its cost.
+
+    `prices` holds 168 hourly prices starting Sunday 00:00, `comfort` maps an
+    hour index to the minimum tank temperature required at the start of that
+    hour. Tank temperature is discretized to whole degrees between `min_temp`
+    and `max_temp`. Each hour the tank either idles, cooling by the learned
+    loss coefficient, or heats to a higher setpoint at the learned heating
+    rate, paying `power_kw` for the minutes spent heating. An idle hour
+    usually ends between two grid temperatures, so its cost-to-go is
+    interpolated between them rather than rounded, which would make a slowly
+    cooling tank either lose a whole degree per hour or never cool.
+
+    The solver runs a backward dynamic program over (hour, temperature): the
+    cost-to-go of a whole temperature row is computed per hour from the next
+    row, so the work is O(168 * states * reachable setpoints). The program
+    repeats every week, so the end of the week is not a horizon: a first
+    sweep gives the cost-to-go from Sunday 00:00, which a second sweep uses
+    as the terminal cost. Returns `(program, cost)` where
+    `program[day][hour]` is the setpoint and `cost` the cost of the first
+    week from `start_temp`, or `(None, None)` when the comfort constraints
+    cannot be met.
+    """
+    lo, hi = int(math.ceil(min_temp)), int(math.floor(max_temp))
+    temps = list(range(lo, hi + 1))
+    states = len(temps)
+    retention = max(0.0, 1 - loss_coefficient) ** 60
+
+    def idle(temperature):
+        """Return the temperature after one idle hour, kept on the grid range."""
+        return min(hi, max(lo, ambient_temp + (temperature - ambient_temp) * retention))
+
+    # Idle transition of every grid state: lower neighbour and weight of the upper one
+    idle_to = []
+    for t in temps:
+        position = idle(t) - lo
+        below = min(int(math.floor(position)), states - 1)
+        idle_to.append((below, position - below))
+    required = [comfort.get(hour, lo) for hour in range(HOURS_PER_WEEK)]
+
+    def sweep(terminal):
+        """Return the cost-to-go at hour 0 and the decisions (-1 = idle) for every hour."""
+        cost_to_go = terminal
+        decisions = [None] * HOURS_PER_WEEK
+        for hour in range(HOURS_PER_WEEK - 1, -1, -1):
+            price_per_minute = prices[hour] * power_kw / 60
+            row = [INFEASIBLE] * states
+            choice = [-1] * states
+            for i in range(states):
+                if temps[i] < required[hour]:
+                    continue
+                below, weight = idle_to[i]
+                best = cost_to_go[below]
+                if weight:
+                    above = cost_to_go[below + 1]
+                    best = INFEASIBLE if INFEASIBLE in (best, above) else best + weight * (above - best)
+                start = temps[below] + weight
+                reach = min(states - 1, int(math.floor(start + heating_rate * 60)) - lo)
+                for j in range(below + 1, reach + 1):
+                    cost = cost_to_go[j] + (temps[j] - start) / heating_rate * price_per_minute
+                    if cost < best:
+                        best, choice[i] = cost, j
+                row[i] = best
+            cost_to_go = row
+            decisions[hour] = choice
+        return cost_to_go, decisions
+
+    next_week, _ = sweep([0.0] * states)
+    if all(cost == INFEASIBLE for cost in next_week):
+        return None, None
+    cost_to_go, decisions = sweep(next_week)
+
+    start = max(0, min(states - 1, int(round(start_temp)) - lo))
+    if cost_to_go[start] == INFEASIBLE:
+        return None, None
+
+    # Follow the decisions from the actual (off-grid) temperature, deciding
+    # on the grid state just below it, which is never warmer than the tank
+    program = [[lo] * 24 for _ in range(7)]
+    temperature = float(temps[start])
+    cost = 0.0
+    for hour in range(HOURS_PER_WEEK):
+        target = decisions[hour][max(0, min(states - 1, int(math.floor(temperature + 1e-9)) - lo))]
+        temperature = idle(temperature)
+        if target >= 0:
+            program[hour // 24][hour % 24] = temps[target]
+            if temps[target] > temperature:
+                cost += (temps[target] - temperature) / heating_rate * prices[hour] * power_kw / 60
+                temperature = float(temps[target])
+    return program, round(cost, 4)
+
+
+def expand_prices(prices):
+    """Return 168 hourly prices from a 24- or 168-element vector."""
+    prices = [float(price) for price in prices]
+    if len(prices) == 24:
+        return prices * 7
+    if len(prices) == HOURS_PER_WEEK:
+        return prices
+    raise ValueError(f"Expected 24 or {HOURS_PER_WEEK} prices, got {len(prices)}")
+
+
+def expand_comfort(constraints):
+    """Return {hour of week: minimum temperature} from comfort constraints.
+
+    Each constraint has `hour`, `min_temp` and an optional `day` (0=Sunday);
+    without `day` it applies to every day.
+    """
+    comfort = {}
+    for constraint in constraints:
+        days = [constraint["day"]] if constraint.get("day") is not None else range(7)
+        for day in days:
+            hour = day * 24 + constraint["hour"]
+            comfort[hour] = max(comfort.get(hour, -math.inf), float(constraint["min_temp"]))
+    return comfort
@@ -0,0 +1,209 @@
+"""On-demand profiling of the polling and entity update hot paths."""
+import asyncio
+import functools
+import importlib
+import inspect
+import json
+import logging
+import time
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.util import dt as dt_util
+from .const import DATA_PROFILER
+
+_LOGGER = logging.getLogger(__name__)
+
+_MISSING = object()
+
+# Class attribute names instrumented on every entity class
+ENTITY_TARGETS = (
+    "state",
+    "native_value",
+    "is_on",
+    "current_temperature",
+    "target_temperature",
+    "current_operation",
+    "extra_state_attributes",
+    "async_write_ha_state",
+)
+
+
+def _profile_targets():
+    """Return (owner, attribute name, label) for every instrumented callable."""
+    from . import PLATFORMS
+    from .coordinator import TesyDataUpdateCoordinator
+    from .pytesy import client
+
+    targets = [
+        (TesyDataUpdateCoordinator, name, f"coordinator.{name}")
+        for name in (
+            "_async_update_data",
+            "_async_fetch_endpoint",
+            "_async_run_snapshot_handlers",
+            "async_update_listeners",
+        )
+    ]
+    targets.append((client, "decode_json", "pytesy.decode_json"))
+
+    # Instrument every platform the entry forwards, so new platforms are covered too
+    modules = [importlib.import_module(f".{platform}", __package__) for platform in PLATFORMS]
+    entity_classes = [
+        value
+        for module in modules
+        for value in vars(module).values()
+        if inspect.isclass(value) and value.__module__ == module.__name__ and value.__name__.startswith("Tesy")
+    ]
+    for cls in entity_classes:
+        for name in ENTITY_TARGETS:
+            if hasattr(cls, name):
+                targets.append((cls, name, f"{cls.__name__}.{name}"))
+    return targets
+
+
+class HotPathProfiler:
+    """Time the fetch pipeline, decoding, listener fan-out and entity properties.
+
+    Targets are wrapped in place when the profiler starts and the original
+    attributes are restored when it stops, so nothing is measured, and
+    nothing costs anything, outside a profiling window. Coroutines are timed
+    wall-clock including their awaits; everything else runs on the event
+    loop, so its time is time the loop was blocked.
+    """
+
+    def __init__(self):
+        """Initialize the profiler."""
+        self.stats = {}
+        self.started = None
+        self.duration = 0.0
+        self._patches = []
+
+    @property
+    def active(self) -> bool:
+        """Return True while targets are instrumented."""
+        return bool(self._patches)
+
+    def start(self) -> None:
+        """Instrument every target."""
+        self.started = time.perf_counter()
+        for owner, name, label in _profile_targets():
+            original = inspect.getattr_static(owner, name)
+            wrapped = self._wrap(original, label)
+            if wrapped is None:
+                continue
+            self._patches.append((owner, name, owner.__dict__.get(name, _MISSING)))
+            setattr(owner, name, wrapped)
+
+    def stop(self) -> None:
+        """Restore every target."""
+        for owner, name, original in reversed(self._patches):
+            if original is _MISSING:
+                delattr(owner, name)
+            else:
+                setattr(owner, name, original)
+        self._patches.clear()
+        self.duration = time.perf_counter() - self.started
+
+    def _record(self, label, elapsed) -> None:
+        entry = self.stats.get(label)
+        if entry is None:
+            self.stats[label] = [1, elapsed, elapsed]
+        else:
+            entry[0] += 1
+            entry[1] += elapsed
+            if elapsed > entry[2]:
+                entry[2] = elapsed
+
+    def _timed(self, func, label):
+        record = self._record
+
+        if inspect.iscoroutinefunction(func):
+
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                start = time.perf_counter()
+                try:
+                    return await func(*args, **kwargs)
+                finally:
+                    record(label, time.perf_counter() - start)
+
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                record(label, time.perf_counter() - start)
+
+        return wrapper
+
+    def _wrap(self, original, label):
+        if isinstance(original, property):
+            return property(self._timed(original.fget, label), original.fset, original.fdel)
+        if isinstance(original, (staticmethod, classmethod)):
+            return None
+        if callable(original):
+            return self._timed(original, label)
+        return None
+
+    def report(self) -> dict:
+        """Return the aggregated profile."""
+        return {
+            "duration": round(self.duration, 3),
+            "stats": {
+                label: {
+                    "calls": calls,
+                    "total_ms": round(total * 1000, 3),
+                    "mean_ms": round(total * 1000 / calls, 4),
+                    "max_ms": round(peak * 1000, 3),
+                }
+                for label, (calls, total, peak) in sorted(
+                    self.stats.items(), key=lambda item: item[1][1], reverse=True
+                )
+            },
+        }
+
+    def summary(self, top=20) -> str:
+        """Return a text table of the most expensive targets."""
+        report = self.report()
+        lines = [
+            f"Tesy profile over {report['duration']:.1f}s",
+            f"{'target':<55} {'calls':>8} {'total ms':>10} {'mean ms':>9} {'max ms':>9} {'share':>6}",
+        ]
+        for label, stat in list(report["stats"].items())[:top]:
+            share = stat["total_ms"] / 1000 / report["duration"] if report["duration"] else 0
+            lines.append(
+                f"{label:<55} {stat['calls']:>8} {stat['total_ms']:>10.2f} "
+                f"{stat['mean_ms']:>9.3f} {stat['max_ms']:>9.2f} {share:>6.1%}"
+            )
+        lines.append("Coroutines (coordinator._async_*) are wall time including network waits.")
+        return "\n".join(lines) + "\n"
+
+
+async def async_profile(hass, duration: float) -> dict:
+    """Profile for `duration` seconds and write JSON and text reports to the config directory."""
+    if hass.data.get(DATA_PROFILER) is not None:
+        raise HomeAssistantError("A Tesy profile is already running")
+    profiler = hass.data[DATA_PROFILER] = HotPathProfiler()
+    profiler.start()
+    try:
+        await asyncio.sleep(duration)
+    finally:
+        profiler.stop()
+        hass.data.pop(DATA_PROFILER, None)
+
+    stamp = dt_util.now().strftime("%Y%m%d_%H%M%S")
+    json_path = hass.config.path(f"tesy_profile_{stamp}.json")
+    text_path = hass.config.path(f"tesy_profile_{stamp}.txt")
+    report = profiler.report()
+    summary = profiler.summary()
+
+    def write_reports():
+        with open(json_path, "w", encoding="utf-8") as json_file:
+            json.dump(report, json_file, indent=1)
+        with open(text_path, "w", encoding="utf-8") as text_file:
+            text_file.write(summary)
+
+    await hass.async_add_executor_job(write_reports)
+    _LOGGER.info("Tesy profile written to %s and %s", json_path, text_path)
+    return {"json": json_path, "summary": text_path, "top": dict(list(report["stats"].items())[:10])}
@@ -0,0 +1,190 @@
+"""Bulk provisioning of heaters from a device list."""
+import asyncio
+import csv
+import io
+import logging
+import re
+from collections import Counter
+import yaml
+from homeassistant.config_entries import SOURCE_IMPORT
+from homeassistant.data_entry_flow import FlowResultType
+from .const import DOMAIN
+from .pytesy import TesyError
+from .utils import get_client
+
+_LOGGER = logging.getLogger(__name__)
+
+ARP_TABLE = "/proc/net/arp"
+
+_MAC = re.compile(r"^[0-9a-f]{2}([:-]?[0-9a-f]{2}){5}$", re.IGNORECASE)
+_HOST_KEYS = ("ip", "host", "address")
+_MAC_KEYS = ("mac", "macaddr")
+
+
+def normalize_mac(mac) -> str:
+    """Return a MAC address as bare lowercase hex, for comparison only."""
+    return re.sub(r"[^0-9a-f]", "", str(mac).lower())
+
+
+def device_key(macaddr, ip) -> str:
+    """Return the key entries are deduplicated on: the MAC, or host:port when the device reports none."""
+    mac = normalize_mac(macaddr) if macaddr not in (None, "Unknown") else ""
+    return mac or f"host:{str(ip).strip().lower()}"
+
+
+def _row(item) -> dict:
+    """Turn one list item (a string or a mapping) into {ip, mac, name}."""
+    if isinstance(item, dict):
+        fields = {str(key).strip().lower(): str(value).strip() for key, value in item.items() if value is not None}
+        address = next((fields[key] for key in _HOST_KEYS if fields.get(key)), "")
+        mac = next((fields[key] for key in _MAC_KEYS if fields.get(key)), "")
+        name = fields.get("name") or None
+    else:
+        address, mac, name = str(item).strip(), "", None
+    if address and _MAC.match(address) and not mac:
+        address, mac = "", address
+    return {"ip": address or None, "mac": mac or None, "name": name}
+
+
+def parse_device_list(text, fmt: str = "csv") -> list:
+    """Parse a YAML or CSV device list into rows of {ip, mac, name}.
+
+    YAML is a list (optionally under a `devices` key) of addresses or of
+    mappings with `ip`/`host`, `mac` and `name`. CSV either has a header
+    naming those columns or holds one device per line as `address[,name]`,
+    where the address is an IP, a hostname or a MAC. Blank lines and lines
+    starting with `#` are skipped. An already loaded list is taken as is.
+    """
+    if isinstance(text, str) and fmt != "yaml":
+        return _parse_csv(text)
+    data = text
+    if isinstance(text, str):
+        try:
+            data = yaml.safe_load(text) or []
+        except yaml.YAMLError as err:
+            raise ValueError(f"invalid YAML: {err}") from err
+    if isinstance(data, dict):
+        data = data.get("devices", [])
+    if not isinstance(data, list):
+        raise ValueError("expected a list of devices")
+    return [_row(item) for item in data]
+
+
+def _parse_csv(text: str) -> list:
+    lines = [line for line in text.splitlines() if line.strip() and not line.lstrip().startswith("#")]
+    if not lines:
+        return []
+    header = [column.strip().lower() for column in next(csv.reader([lines[0]]))]
+    if set(header) & {*_HOST_KEYS, *_MAC_KEYS}:
+        return [_row(record) for record in csv.DictReader(io.StringIO("\n".join(lines)))]
+    rows = []
+    for record in csv.reader(lines):
+        rows.append(_row({"ip": record[0], "name": record[1] if len(record) > 1 else None}))
+    return rows
+
+
+def read_arp_table(path=ARP_TABLE) -> dict:
+    """Return normalized MAC -> IP from the kernel ARP cache."""
+    table = {}
+    try:
+        with open(path, encoding="ascii") as arp:
+            next(arp, None)
+            for line in arp:
+                fields = line.split()
+                # IP address, HW type, flags, HW address, mask, device; flags 0x0 is incomplete
+                if len(fields) >= 4 and fields[2] != "0x0":
+                    table[normalize_mac(fields[3])] = fields[0]
+    except OSError as err:
+        _LOGGER.warning("Cannot read the ARP table %s: %s", path, err)
+    return table
+
+
+async def async_import_devices(hass, rows: list, concurrency: int, timeout: float) -> list:
+    """Validate every row concurrently, then create the new entries in one batch.
+
+    Each row is probed once through `/devstat` with at most `concurrency`
+    requests in flight. Rows are deduplicated by `macaddr` (by address for
+    devices that report no MAC) against existing entries and against earlier
+    rows. The returned report has one result per row, in input order.
+    """
+    if any(row["mac"] and not row["ip"] for row in rows):
+        arp = await hass.async_add_executor_job(read_arp_table)
+    else:
+        arp = {}
+    semaphore = asyncio.Semaphore(concurrency)
+    report = [{"row": index + 1, **row} for index, row in enumerate(rows)]
+
+    async def validate(result):
+        if not result["ip"]:
+            if not result["mac"]:
+                result["result"] = "invalid"
+                return
+            result["ip"] = arp.get(normalize_mac(result["mac"]))
+            if not result["ip"]:
+                result["result"] = "not_found"
+                result["error"] = "MAC address not in the ARP table"
+                return
+        async with semaphore:
+            try:
+                info = await get_client(hass, result["ip"]).devstat(timeout=timeout, retries=0)
+            except TesyError as err:
+                result["result"] = "unreachable"
+                result["error"] = str(err)
+                return
+        if not info or "devid" not in info:
+            result["result"] = "unreachable"
+            result["error"] = "devstat has no devid"
+            return
+        result["device_id"] = info["devid"]
+        result["macaddr"] = info.get("macaddr") or "Unknown"
+        reported = normalize_mac(result["macaddr"])
+        if result["mac"] and result["macaddr"] != "Unknown" and normalize_mac(result["mac"]) != reported:
+            result["result"] = "mac_mismatch"
+            result["error"] = f"{result['ip']} answers as {result['macaddr']}"
+
+    await asyncio.gather(*(validate(result) for result in report))
+
+    configured = {
+        device_key(entry.data.get("macaddr"), entry.data["ip"])
+        for entry in hass.config_entries.async_entries(DOMAIN)
+    }
+    batch = set()
+    pending = []
+    for result in report:
+        if "result" in result:
+            continue
+        key = device_key(result["macaddr"], result["ip"])
+        if key in configured:
+            result["result"] = "already_configured"
+            continue
+        if key in batch:
+            result["result"] = "duplicate"
+            continue
+        batch.add(key)
+        pending.append(result)
+
+    async def create(result):
+        flow = await hass.config_entries.flow.async_init(
+            DOMAIN,
+            context={"source": SOURCE_IMPORT},
+            data={key: result[key] for key in ("ip", "device_id", "macaddr", "name")},
+        )
+        if flow["type"] == FlowResultType.CREATE_ENTRY:
+            result["result"] = "created"
+            result["entry_id"] = flow["result"].entry_id
+        else:
+            result["result"] = flow.get("reason", "aborted")
+
+    outcomes = await asyncio.gather(*(create(result) for result in pending), return_exceptions=True)
+    for result, outcome in zip(pending, outcomes):
+        if isinstance(outcome, Exception):
+            result["result"] = "failed"
+            result["error"] = str(outcome)
+
+    _LOGGER.info("Tesy bulk import of %s devices: %s", len(report), summarize(report))
+    return report
+
+
+def summarize(report: list) -> dict:
+    """Return result -> number of rows."""
+    return dict(Counter(result["result"] for result in report))
@@ -0,0 +1,21 @@
+"""Standalone async client for Tesy water heaters.
+
+This package has no Home Assistant dependency and only needs aiohttp. The
+integration is built on it, and it can be used on its own, e.g.
+`python custom_components/tesy/pytesy poll --file heaters.txt`.
+"""
+from .cassette import Cassette, CassetteMissError, Player, Recorder
+from .client import TesyClient
+from .exceptions import TesyConnectionError, TesyError, TesyResponseError, TesyTimeoutError
+
+__all__ = [
+    "Cassette",
+    "CassetteMissError",
+    "Player",
+    "Recorder",
+    "TesyClient",
+    "TesyConnectionError",
+    "TesyError",
+    "TesyResponseError",
+    "TesyTimeoutError",
+]
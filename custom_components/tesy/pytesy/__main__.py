@@ -0,0 +1,12 @@
+"""Entry point: `python custom_components/tesy/pytesy poll 192.168.1.50`."""
+import os
+import sys
+
+if not __package__:
+    # Run as a directory: import the package without the Home Assistant integration around it
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from pytesy.cli import main
+else:
+    from .cli import main
+
+sys.exit(main())
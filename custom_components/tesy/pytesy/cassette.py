@@ -0,0 +1,153 @@
+"""Record and replay device traffic.
+
+A cassette is a JSON file of request/response exchanges. `Recorder` wraps a
+transport and appends every exchange, including its latency and any timeout
+or connection error, to a cassette. `Player` serves a cassette back without
+a device: exchanges are matched on host, endpoint and parameters and
+returned in recorded order, delayed by the recorded latency times
+`time_scale` (0 replays at full speed, 1 in real time).
+
+    cassette = Cassette()
+    client = TesyClient(host, session, transport=Recorder(cassette))
+    ...
+    cassette.save("heater.json")
+
+    client = TesyClient(host, transport=Player(Cassette.load("heater.json"), time_scale=0))
+"""
+import asyncio
+import base64
+import json
+import time
+from collections import defaultdict, deque
+from typing import Optional
+
+import aiohttp
+
+from .client import http_transport
+from .exceptions import TesyError
+
+CASSETTE_VERSION = 1
+
+ERROR_TIMEOUT = "timeout"
+ERROR_CONNECTION = "connection"
+
+
+class CassetteMissError(TesyError):
+    """A replayed request has no recorded exchange left."""
+
+
+def _params_key(params: Optional[dict]) -> tuple:
+    return tuple(sorted((str(key), str(value)) for key, value in (params or {}).items()))
+
+
+class Cassette:
+    """An ordered list of recorded exchanges."""
+
+    def __init__(self, interactions: Optional[list] = None):
+        """Initialize the cassette."""
+        self.interactions = list(interactions or [])
+        self._started = time.monotonic()
+
+    @classmethod
+    def load(cls, path: str) -> "Cassette":
+        """Read a cassette file."""
+        with open(path, encoding="utf-8") as cassette_file:
+            data = json.load(cassette_file)
+        if data.get("version") != CASSETTE_VERSION:
+            raise ValueError(f"Unsupported cassette version {data.get('version')!r} in {path}")
+        return cls(data["interactions"])
+
+    def save(self, path: str) -> None:
+        """Write the cassette to a file."""
+        with open(path, "w", encoding="utf-8") as cassette_file:
+            json.dump({"version": CASSETTE_VERSION, "interactions": self.interactions}, cassette_file, indent=1)
+
+    @property
+    def hosts(self) -> list:
+        """Return the recorded hosts in order of first appearance."""
+        return list(dict.fromkeys(interaction["host"] for interaction in self.interactions))
+
+    def append(self, host, endpoint, params, elapsed, status=None, body=None, error=None) -> None:
+        """Add an exchange; `error` is ERROR_TIMEOUT or ERROR_CONNECTION."""
+        interaction = {
+            "host": host,
+            "endpoint": endpoint,
+            "params": dict(_params_key(params)),
+            "at": round(time.monotonic() - self._started - elapsed, 3),
+            "elapsed": round(elapsed, 3),
+        }
+        if error is not None:
+            interaction["error"] = error
+        else:
+            interaction["status"] = status
+            try:
+                interaction["body"] = body.decode("utf-8")
+            except UnicodeDecodeError:
+                interaction["body_b64"] = base64.b64encode(body).decode("ascii")
+        self.interactions.append(interaction)
+
+
+class Recorder:
+    """Transport that records every exchange of the wrapped transport."""
+
+    def __init__(self, cassette: Cassette, transport=None):
+        """Initialize the recorder; `transport` defaults to plain HTTP."""
+        self.cassette = cassette
+        self._transport = transport
+
+    async def __call__(self, client, endpoint, params) -> tuple:
+        start = time.monotonic()
+        try:
+            status, body = await (self._transport or http_transport)(client, endpoint, params)
+        except (asyncio.CancelledError, TimeoutError):
+            # The client's timeout cancels the exchange; a wrapped transport may time out itself
+            self.cassette.append(client.base_url, endpoint, params, time.monotonic() - start, error=ERROR_TIMEOUT)
+            raise
+        except aiohttp.ClientError:
+            self.cassette.append(client.base_url, endpoint, params, time.monotonic() - start, error=ERROR_CONNECTION)
+            raise
+        self.cassette.append(client.base_url, endpoint, params, time.monotonic() - start, status, body)
+        return status, body
+
+
+class Player:
+    """Transport that serves a cassette back.
+
+    Each (host, endpoint, params) has its own queue of exchanges. When a
+    queue runs dry the last exchange is repeated if `repeat` is set,
+    otherwise CassetteMissError is raised, as it is for requests that were
+    never recorded.
+    """
+
+    def __init__(self, cassette: Cassette, *, time_scale: float = 0.0, repeat: bool = True):
+        """Initialize the player."""
+        self.time_scale = time_scale
+        self.repeat = repeat
+        self.served = 0
+        self._queues = defaultdict(deque)
+        self._last = {}
+        for interaction in cassette.interactions:
+            key = (interaction["host"], interaction["endpoint"], _params_key(interaction["params"]))
+            self._queues[key].append(interaction)
+
+    async def __call__(self, client, endpoint, params) -> tuple:
+        key = (client.base_url, endpoint, _params_key(params))
+        queue = self._queues.get(key)
+        if queue:
+            interaction = self._last[key] = queue.popleft()
+        elif self.repeat and key in self._last:
+            interaction = self._last[key]
+        else:
+            raise CassetteMissError(f"{client.base_url}/{endpoint}: not in cassette")
+        self.served += 1
+
+        if self.time_scale > 0:
+            await asyncio.sleep(interaction["elapsed"] * self.time_scale)
+        error = interaction.get("error")
+        if error == ERROR_TIMEOUT:
+            raise TimeoutError
+        if error == ERROR_CONNECTION:
+            raise aiohttp.ClientConnectionError("recorded connection error")
+        if "body_b64" in interaction:
+            return interaction["status"], base64.b64decode(interaction["body_b64"])
+        return interaction["status"], interaction["body"].encode("utf-8")
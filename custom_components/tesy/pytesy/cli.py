@@ -0,0 +1,238 @@
+"""Command line tool to poll or command many Tesy heaters concurrently.
+
+Results are streamed to stdout as JSON lines, one per host and operation, in
+completion order.
+"""
+import argparse
+import asyncio
+import json
+import sys
+import time
+from collections import Counter
+from datetime import datetime
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+import aiohttp
+
+from . import decode, models
+from .cassette import Cassette, Player, Recorder
+from .client import DEFAULT_RETRIES, DEFAULT_TIMEOUT, TesyClient
+from .exceptions import TesyError
+
+
+def _emit(record: dict) -> None:
+    sys.stdout.write(json.dumps(record, separators=(",", ":")) + "\n")
+    sys.stdout.flush()
+
+
+def _read_hosts(args) -> list:
+    hosts = list(args.hosts)
+    if args.file:
+        with open(args.file, encoding="utf-8") as hosts_file:
+            for line in hosts_file:
+                line = line.split("#", 1)[0].strip()
+                if line:
+                    hosts.append(line.split(",")[0].strip())
+    return hosts
+
+
+async def _timed(host: str, operation: str, coro) -> dict:
+    start = time.perf_counter()
+    record = {"host": host, "op": operation}
+    try:
+        result = await coro
+        record["ok"] = True
+        if result is not None:
+            record["data"] = result
+    except TesyError as err:
+        record["ok"] = False
+        record["error"] = f"{type(err).__name__}: {err}"
+    record["ms"] = round((time.perf_counter() - start) * 1000, 1)
+    return record
+
+
+async def _poll_host(client: TesyClient, host: str, endpoints: list) -> list:
+    return [await _timed(host, endpoint, client.get(endpoint)) for endpoint in endpoints]
+
+
+async def _command_host(client: TesyClient, host: str, args) -> list:
+    operations = []
+    if args.power is not None:
+        operations.append(("power", client.set_power(args.power == "on")))
+    if args.mode is not None:
+        operations.append(("mode", client.set_mode(args.mode)))
+    if args.temperature is not None:
+        operations.append(("setTemp", client.set_temperature(args.temperature)))
+    if args.boost is not None:
+        operations.append(("boost", client.set_boost(args.boost == "on")))
+    if args.lock is not None:
+        operations.append(("lock", client.set_lock(args.lock == "on")))
+    if args.sync_time:
+        operations.append(("setdate", client.set_date(args.sync_time, datetime.now(ZoneInfo(args.sync_time)))))
+    records = []
+    for operation, coro in operations:
+        records.append(await _timed(host, operation, coro))
+    return records
+
+
+async def _run(args) -> int:
+    hosts = _read_hosts(args)
+    transport = cassette = None
+    if args.replay:
+        cassette = Cassette.load(args.replay)
+        transport = Player(cassette, time_scale=args.time_scale)
+        hosts = hosts or cassette.hosts
+    elif args.record:
+        cassette = Cassette()
+        transport = Recorder(cassette)
+    if not hosts:
+        print("No hosts given", file=sys.stderr)
+        return 2
+
+    semaphore = asyncio.Semaphore(args.concurrency)
+    connector = aiohttp.TCPConnector(limit=args.concurrency, limit_per_host=1)
+    failures = 0
+
+    async with aiohttp.ClientSession(connector=connector) as session:
+
+        async def run_host(host):
+            async with semaphore:
+                client = TesyClient(
+                    host, session, timeout=args.timeout, retries=args.retries, transport=transport
+                )
+                if args.action == "poll":
+                    return await _poll_host(client, host, args.endpoints)
+                return await _command_host(client, host, args)
+
+        try:
+            for round_number in range(args.count):
+                if round_number:
+                    await asyncio.sleep(args.interval * (args.time_scale if args.replay else 1))
+                for finished in asyncio.as_completed([run_host(host) for host in hosts]):
+                    for record in await finished:
+                        if args.count > 1:
+                            record["round"] = round_number
+                        failures += not record["ok"]
+                        _emit(record)
+        finally:
+            if args.record:
+                cassette.save(args.record)
+    return 1 if failures else 0
+
+
+# Representative bodies for `bench` when no cassette is given
+SAMPLE_BODIES = {
+    models.STATUS: (
+        b'{"power_sw":"on","mode":"1","gradus":"55","ref_gradus":"60","heater_state":"READY",'
+        b'"boost":"0","watts":"2400","mix40":"120","err_flag":"00","lockB":"off",'
+        b'"date":"2024-11-03 10:00:00","tz":"EuropeSofia"}'
+    ),
+    models.CALC_RES: b'{"sum":"5423301","watt":"2400","volume":"80","resetDate":"2024-01-01"}',
+    models.DEVSTAT: b'{"devid":"2000xxx 1.0","macaddr":"aa:bb:cc:dd:ee:ff"}',
+    models.PROGRAMS[1]: json.dumps(
+        [{f"h{hour:02d}": str(40 + hour % 3 * 10) for hour in range(24)} for _ in range(7)]
+    ).encode(),
+    models.VACATION: b'{"vYear":"25","vMonth":"08","vMDay":"15","vWDay":"5","vHour":"18","vTemp":"55"}',
+}
+
+
+def _bench(args) -> int:
+    """Time the old decode path (stdlib json on text) against pytesy.decode per endpoint."""
+    bodies = {}
+    if args.replay:
+        for interaction in Cassette.load(args.replay).interactions:
+            if interaction.get("status") == 200 and "body" in interaction:
+                bodies.setdefault(interaction["endpoint"], []).append(interaction["body"].encode("utf-8"))
+    else:
+        bodies = {endpoint: [body] for endpoint, body in SAMPLE_BODIES.items()}
+
+    for endpoint, samples in bodies.items():
+        rejected = Counter()
+        timings = {}
+        for name, run in (
+            ("stdlib_us", lambda body: json.loads(body.decode("utf-8"))),
+            ("decode_us", lambda body: decode.decode(endpoint, body, rejected)),
+        ):
+            start = time.perf_counter()
+            for _ in range(args.iterations):
+                for body in samples:
+                    run(body)
+            elapsed = time.perf_counter() - start
+            timings[name] = round(elapsed / (args.iterations * len(samples)) * 1e6, 2)
+        _emit(
+            {
+                "op": "bench",
+                "endpoint": endpoint,
+                "payloads": len(samples),
+                **timings,
+                "orjson": decode.orjson is not None,
+                "rejected": sum(rejected.values()) // args.iterations,
+            }
+        )
+    return 0
+
+
+def _time_zone(value: str) -> str:
+    """Return `value` if it is a known IANA time zone."""
+    try:
+        ZoneInfo(value)
+    except (ZoneInfoNotFoundError, ValueError) as err:
+        raise argparse.ArgumentTypeError(f"unknown time zone {value!r}") from err
+    return value
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """Return the argument parser."""
+    parser = argparse.ArgumentParser(prog="pytesy", description=__doc__)
+    parser.add_argument("--file", help="file with one host per line (CSV: host in the first column)")
+    parser.add_argument("--concurrency", type=int, default=32, help="hosts handled at once (default 32)")
+    parser.add_argument("--timeout", type=float, default=DEFAULT_TIMEOUT, help="per-request timeout in seconds")
+    parser.add_argument("--retries", type=int, default=DEFAULT_RETRIES, help="retries per request")
+    cassette = parser.add_mutually_exclusive_group()
+    cassette.add_argument("--record", metavar="CASSETTE", help="record all device traffic to a cassette file")
+    cassette.add_argument("--replay", metavar="CASSETTE", help="serve device traffic from a cassette file")
+    parser.add_argument(
+        "--time-scale",
+        type=float,
+        default=0.0,
+        help="with --replay: multiply recorded latencies and --interval (0 = full speed, 1 = real time)",
+    )
+    subparsers = parser.add_subparsers(dest="action", required=True)
+
+    poll = subparsers.add_parser("poll", help="read endpoints")
+    poll.add_argument("hosts", nargs="*")
+    poll.add_argument(
+        "--endpoints",
+        type=lambda value: value.split(","),
+        default=[models.STATUS],
+        help=f"comma-separated endpoints (default status; any of {','.join(models.READ_ENDPOINTS)})",
+    )
+    poll.add_argument("--count", type=int, default=1, help="number of polling rounds")
+    poll.add_argument("--interval", type=float, default=60, help="seconds between rounds")
+
+    command = subparsers.add_parser("command", help="send commands")
+    command.add_argument("hosts", nargs="*")
+    command.add_argument("--power", choices=["on", "off"])
+    command.add_argument("--mode", help=f"modeSW value or one of {','.join(models.OPERATION_MODES)}")
+    command.add_argument("--temperature", type=int)
+    command.add_argument("--boost", choices=["on", "off"])
+    command.add_argument("--lock", choices=["on", "off"])
+    command.add_argument(
+        "--sync-time", metavar="TIME_ZONE", type=_time_zone, help="set the clock to local time, e.g. Europe/Sofia"
+    )
+    command.set_defaults(count=1, interval=0)
+
+    bench = subparsers.add_parser("bench", help="benchmark payload decoding (samples, or bodies from --replay)")
+    bench.add_argument("--iterations", type=int, default=10000)
+    return parser
+
+
+def main(argv=None) -> int:
+    """Run the CLI."""
+    args = build_parser().parse_args(argv)
+    if args.action == "bench":
+        return _bench(args)
+    try:
+        return asyncio.run(_run(args))
+    except KeyboardInterrupt:
+        return 130
@@ -0,0 +1,210 @@
+"""Async client for the Tesy local HTTP API."""
+import asyncio
+import logging
+from collections import Counter
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Optional
+
+import aiohttp
+
+from . import decode, models
+from .exceptions import TesyConnectionError, TesyResponseError, TesyTimeoutError
+
+_LOGGER = logging.getLogger(__name__)
+
+DEFAULT_TIMEOUT = 15
+DEFAULT_RETRIES = 1
+DEFAULT_RETRY_BACKOFF = 0.5
+
+
+class TesyClient:
+    """Client for one Tesy water heater.
+
+    Pass a shared `aiohttp.ClientSession` to pool connections across devices;
+    without one the client opens its own session and closes it in `close()`
+    or when used as an async context manager. Every request has a timeout and
+    connection errors and timeouts are retried with exponential backoff.
+
+    `transport` replaces the HTTP exchange itself, e.g. with a cassette from
+    `pytesy.cassette` to record or replay device traffic. It is called as
+    `await transport(client, endpoint, params)` and returns `(status, body)`.
+    """
+
+    def __init__(
+        self,
+        host: str,
+        session: Optional[aiohttp.ClientSession] = None,
+        *,
+        timeout: float = DEFAULT_TIMEOUT,
+        retries: int = DEFAULT_RETRIES,
+        retry_backoff: float = DEFAULT_RETRY_BACKOFF,
+        transport: Optional[Callable[..., Awaitable[tuple]]] = None,
+    ):
+        """Initialize the client for `host` (an IP, hostname or base URL)."""
+        self.base_url = (host if host.startswith("http") else f"http://{host}").rstrip("/")
+        self.timeout = timeout
+        self.retries = retries
+        self.retry_backoff = retry_backoff
+        self._session = session
+        self._owns_session = session is None
+        self.transport = transport or http_transport
+        # (endpoint, field) -> number of values dropped because they could not be decoded
+        self.rejected = Counter()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def close(self) -> None:
+        """Close the session if the client opened it."""
+        if self._owns_session and self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        if self._session is None:
+            self._session = aiohttp.ClientSession()
+        return self._session
+
+    async def request(
+        self,
+        endpoint: str,
+        params: Optional[dict] = None,
+        *,
+        timeout: Optional[float] = None,
+        retries: Optional[int] = None,
+    ) -> bytes:
+        """GET an endpoint and return the raw body.
+
+        Raises TesyResponseError on a non-200 answer (not retried),
+        TesyTimeoutError or TesyConnectionError once retries are exhausted.
+        """
+        url = f"{self.base_url}/{endpoint}"
+        attempts = 1 + (self.retries if retries is None else retries)
+        timeout = self.timeout if timeout is None else timeout
+        error = None
+
+        for attempt in range(attempts):
+            if attempt:
+                await asyncio.sleep(self.retry_backoff * 2 ** (attempt - 1))
+            try:
+                async with asyncio.timeout(timeout):
+                    status, body = await self.transport(self, endpoint, params)
+                if status != 200:
+                    raise TesyResponseError(endpoint, status)
+                return body
+            except TimeoutError:
+                error = TesyTimeoutError(f"{endpoint}: no answer within {timeout:.1f}s")
+            except aiohttp.ClientError as err:
+                error = TesyConnectionError(f"{endpoint}: {err}")
+            _LOGGER.debug("Attempt %s/%s for %s failed: %s", attempt + 1, attempts, url, error)
+        raise error
+
+    async def _http(self, endpoint: str, params: Optional[dict]) -> tuple:
+        async with self._get_session().get(f"{self.base_url}/{endpoint}", params=params) as response:
+            return response.status, await response.read()
+
+    async def get(self, endpoint: str, **kwargs) -> Any:
+        """GET an endpoint and decode its JSON payload."""
+        body = await self.request(endpoint, **kwargs)
+        known = len(self.rejected)
+        payload = decode_json(endpoint, body, self.rejected)
+        if len(self.rejected) != known:
+            # Warn once per field; later rejections are only counted
+            _LOGGER.warning(
+                "Dropping undecodable fields from %s: %s",
+                self.base_url,
+                ", ".join(f"{ep}.{field}" for ep, field in list(self.rejected)[known:]),
+            )
+        return payload
+
+    # Reads
+
+    async def status(self, **kwargs) -> models.Status:
+        """Return the live status."""
+        return await self.get(models.STATUS, **kwargs)
+
+    async def calc_res(self, **kwargs) -> models.CalcRes:
+        """Return the energy counters."""
+        return await self.get(models.CALC_RES, **kwargs)
+
+    async def devstat(self, **kwargs) -> models.DevStat:
+        """Return the device identity."""
+        return await self.get(models.DEVSTAT, **kwargs)
+
+    async def program(self, slot: int, **kwargs) -> list:
+        """Return weekly program P1-P3."""
+        return await self.get(models.PROGRAMS[slot], **kwargs)
+
+    async def vacation(self, **kwargs) -> models.Vacation:
+        """Return the vacation settings."""
+        return await self.get(models.VACATION, **kwargs)
+
+    # Writes
+
+    async def set_power(self, on: bool, **kwargs) -> None:
+        """Switch the heater on or off."""
+        await self.request(models.POWER, {"val": "on" if on else "off"}, **kwargs)
+
+    async def set_temperature(self, temperature, **kwargs) -> None:
+        """Set the manual setpoint."""
+        await self.request(models.SET_TEMP, {"val": temperature}, **kwargs)
+
+    async def set_mode(self, mode: str, **kwargs) -> None:
+        """Set the operation mode by `modeSW` value or name from models.OPERATION_MODES."""
+        await self.request(models.MODE, {"mode": models.OPERATION_MODES.get(mode, mode)}, **kwargs)
+
+    async def set_boost(self, on: bool, **kwargs) -> None:
+        """Switch boost on or off."""
+        await self.request(models.BOOST, {"mode": "1" if on else "0"}, **kwargs)
+
+    async def set_lock(self, on: bool, **kwargs) -> None:
+        """Switch the child lock on or off."""
+        await self.request(models.LOCK, {"val": "on" if on else "off"}, **kwargs)
+
+    async def set_vacation(self, end: datetime, temperature, **kwargs) -> None:
+        """Set the vacation end and the temperature to heat to afterwards."""
+        params = {
+            "vYear": end.year % 100,
+            "vMonth": f"{end.month:02d}",
+            "vMDay": f"{end.day:02d}",
+            "vWDay": (end.weekday() + 1) % 7,  # 0=Sunday
+            "vHour": f"{end.hour:02d}",
+            "vTemp": temperature,
+        }
+        await self.request(models.SET_VACATION, params, **kwargs)
+
+    async def set_date(self, time_zone: str, local_time: datetime, **kwargs) -> None:
+        """Set the device clock to `local_time` in the IANA zone `time_zone`."""
+        params = {
+            "tOffset": time_zone.replace("/", "").replace(":", ""),
+            "tDay": local_time.day,
+            "tMonth": local_time.month,
+            "tYear": local_time.year,
+            "tHour": local_time.hour,
+            "tMin": local_time.minute,
+            "tSec": local_time.second,
+        }
+        await self.request(models.SET_DATE, params, **kwargs)
+
+    async def set_program(self, slot: int, program: list, **kwargs) -> None:
+        """Write a weekly program: 7 days (Sunday first) of 24 setpoints."""
+        for day, setpoints in enumerate(program):
+            await self.set_program_day(slot, day, setpoints, **kwargs)
+
+    async def set_program_day(self, slot: int, day: int, setpoints: list, **kwargs) -> None:
+        """Write the 24 setpoints of one day (0=Sunday) of a weekly program."""
+        params = {"day": day, **{f"h{hour:02d}": temp for hour, temp in enumerate(setpoints)}}
+        await self.request(models.SET_PROGRAMS[slot], params, **kwargs)
+
+
+def decode_json(endpoint: str, body: bytes, rejected: Optional[Counter] = None) -> Any:
+    """Decode an endpoint's JSON body and coerce it to the endpoint's schema."""
+    return decode.decode(endpoint, body, rejected)
+
+
+async def http_transport(client: TesyClient, endpoint: str, params: Optional[dict]) -> tuple:
+    """Default transport: one HTTP GET on the client's session."""
+    return await client._http(endpoint, params)
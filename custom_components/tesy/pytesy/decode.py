@@ -0,0 +1,188 @@
+"""Decoding and validation of device payloads.
+
+Every payload is parsed and coerced exactly once, right after it is read, so
+code further up only ever sees native values. Bodies are parsed with orjson
+when it is installed and with the stdlib otherwise. Each endpoint has a
+schema of field -> type; fields a schema does not know are passed through
+untouched, and fields whose value cannot be coerced are dropped and counted
+so a bad value never reaches an entity. Flag-like fields (power_sw, mode,
+boost, lockB, err_flag...) stay strings, as the firmware sends them.
+
+Known firmware quirks that are repaired:
+
+- a UTF-8 BOM, NUL padding or trailing garbage after the JSON document
+- trailing commas before a closing brace or bracket
+- decimal commas ("55,5") and surrounding whitespace in numbers
+- "" / "--" / "NaN" placeholders for values the device does not have
+- weekly programs sent as an object keyed by day ("0".."6") instead of a list
+"""
+import json
+import math
+import re
+from collections import Counter
+from typing import Any, Optional
+
+from . import models
+from .exceptions import TesyResponseError
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson ships with Home Assistant
+    orjson = None
+
+_PLACEHOLDERS = {"", "-", "--", "nan", "none", "null", "n/a"}
+_TRAILING_COMMA = re.compile(rb",\s*([}\]])")
+
+
+def _number(value):
+    if isinstance(value, bool):
+        raise ValueError(value)
+    if isinstance(value, (int, float)):
+        return value
+    text = str(value).strip().replace(",", ".")
+    if text.lower() in _PLACEHOLDERS:
+        return None
+    number = float(text)
+    if not math.isfinite(number):
+        raise ValueError(value)
+    return number
+
+
+def to_float(value) -> Optional[float]:
+    """Coerce to float, None for a placeholder."""
+    if type(value) is str:
+        try:
+            number = float(value)
+        except ValueError:
+            pass
+        else:
+            if math.isfinite(number):
+                return number
+    number = _number(value)
+    if number is None:
+        return None
+    number = float(number)
+    if not math.isfinite(number):
+        raise ValueError(value)
+    return number
+
+
+def to_int(value) -> Optional[int]:
+    """Coerce to int, None for a placeholder; 55.0 is accepted, 55.5 is not."""
+    if type(value) is str:
+        try:
+            return int(value)
+        except ValueError:
+            pass
+    elif type(value) is int:
+        return value
+    number = _number(value)
+    if number is None:
+        return None
+    if number != int(number):
+        raise ValueError(value)
+    return int(number)
+
+
+def to_str(value) -> str:
+    """Coerce scalars to their string form."""
+    if type(value) is str:
+        return value.strip()
+    if isinstance(value, (dict, list)):
+        raise ValueError(value)
+    return str(value).strip()
+
+
+_HOURS = {f"h{hour:02d}": to_int for hour in range(24)}
+
+SCHEMAS = {
+    models.STATUS: {
+        "power_sw": to_str,
+        "mode": to_str,
+        "gradus": to_float,
+        "ref_gradus": to_float,
+        "heater_state": to_str,
+        "boost": to_str,
+        "watts": to_float,
+        "mix40": to_float,
+        "err_flag": to_str,
+        "lockB": to_str,
+        "date": to_str,
+        "tz": to_str,
+    },
+    models.CALC_RES: {
+        "sum": to_float,
+        "watt": to_float,
+        "volume": to_float,
+        "resetDate": to_str,
+    },
+    models.DEVSTAT: {
+        "devid": to_str,
+        "macaddr": to_str,
+    },
+    models.VACATION: {
+        "vYear": to_int,
+        "vMonth": to_int,
+        "vMDay": to_int,
+        "vWDay": to_int,
+        "vHour": to_int,
+        "vTemp": to_int,
+    },
+    **{endpoint: _HOURS for endpoint in models.PROGRAMS.values()},
+}
+
+
+def parse_json(body: bytes) -> Any:
+    """Parse a JSON body, repairing framing quirks when the fast path fails."""
+    try:
+        return orjson.loads(body) if orjson is not None else json.loads(body)
+    except ValueError:
+        pass
+    text = _TRAILING_COMMA.sub(rb"\1", body.lstrip(b"\xef\xbb\xbf").strip(b"\x00 \r\n\t"))
+    # raw_decode stops at the end of the first document and ignores trailing garbage
+    return json.JSONDecoder().raw_decode(text.decode("utf-8", errors="replace"))[0]
+
+
+def _apply(schema: dict, payload: dict, endpoint: str, rejected: Counter) -> dict:
+    result = {}
+    get_coerce = schema.get
+    for key, value in payload.items():
+        coerce = get_coerce(key)
+        if coerce is not None:
+            try:
+                value = coerce(value)
+            except (TypeError, ValueError):
+                rejected[(endpoint, key)] += 1
+                continue
+            if value is None:
+                continue
+        result[key] = value
+    return result
+
+
+def validate(endpoint: str, payload: Any, rejected: Optional[Counter] = None) -> Any:
+    """Coerce a parsed payload to the endpoint's schema."""
+    rejected = Counter() if rejected is None else rejected
+    schema = SCHEMAS.get(endpoint)
+    if schema is None:
+        return payload
+
+    if endpoint in models.PROGRAMS.values():
+        if isinstance(payload, dict) and all(str(key).isdigit() for key in payload):
+            payload = [payload[key] for key in sorted(payload, key=int)]
+        if not isinstance(payload, list):
+            raise TesyResponseError(endpoint, 200, f"{endpoint}: expected a list of days")
+        return [_apply(schema, day, endpoint, rejected) for day in payload if isinstance(day, dict)]
+
+    if not isinstance(payload, dict):
+        raise TesyResponseError(endpoint, 200, f"{endpoint}: expected an object")
+    return _apply(schema, payload, endpoint, rejected)
+
+
+def decode(endpoint: str, body: bytes, rejected: Optional[Counter] = None) -> Any:
+    """Parse and validate one body; rejected fields are counted in `rejected`."""
+    try:
+        payload = parse_json(body)
+    except ValueError as err:
+        raise TesyResponseError(endpoint, 200, f"{endpoint}: invalid JSON: {err}") from err
+    return validate(endpoint, payload, rejected)
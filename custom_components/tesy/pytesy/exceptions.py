@@ -0,0 +1,23 @@
+"""Exceptions raised by the Tesy client."""
+
+
+class TesyError(Exception):
+    """Base class for all Tesy client errors."""
+
+
+class TesyConnectionError(TesyError):
+    """The device could not be reached."""
+
+
+class TesyTimeoutError(TesyError):
+    """The device did not answer in time."""
+
+
+class TesyResponseError(TesyError):
+    """The device answered with an error status or an unusable payload."""
+
+    def __init__(self, endpoint, status, message=None):
+        """Initialize the error."""
+        super().__init__(message or f"{endpoint}: HTTP {status}")
+        self.endpoint = endpoint
+        self.status = status
@@ -0,0 +1,77 @@
+"""Endpoint names and payload types of the Tesy local HTTP API."""
+from typing import TypedDict
+
+# Read endpoints
+STATUS = "status"
+CALC_RES = "calcRes"
+DEVSTAT = "devstat"
+PROGRAMS = {1: "getP1", 2: "getP2", 3: "getP3"}
+VACATION = "getVacation"
+
+READ_ENDPOINTS = [STATUS, CALC_RES, DEVSTAT, *PROGRAMS.values(), VACATION]
+
+# Write endpoints
+POWER = "power"
+SET_TEMP = "setTemp"
+MODE = "modeSW"
+BOOST = "boostSW"
+LOCK = "lockKey"
+SET_VACATION = "setVacation"
+SET_DATE = "setdate"
+SET_PROGRAMS = {1: "setP1", 2: "setP2", 3: "setP3"}
+
+# Operation mode names -> `modeSW` values
+OPERATION_MODES = {
+    "manual": "1",
+    "p1": "2",
+    "p2": "3",
+    "p3": "4",
+    "eco_smart": "5",
+    "eco_comfort": "6",
+    "eco_night": "7",
+    "performance": "10",
+}
+
+
+class Status(TypedDict, total=False):
+    """Payload of `status`."""
+
+    power_sw: str
+    mode: str
+    gradus: str
+    ref_gradus: str
+    heater_state: str
+    boost: str
+    watts: str
+    mix40: str
+    err_flag: str
+    lockB: str
+    date: str
+    tz: str
+
+
+class CalcRes(TypedDict, total=False):
+    """Payload of `calcRes`."""
+
+    sum: str
+    watt: str
+    volume: str
+    resetDate: str
+
+
+class DevStat(TypedDict, total=False):
+    """Payload of `devstat`."""
+
+    devid: str
+    macaddr: str
+
+
+class Vacation(TypedDict, total=False):
+    """Payload of `getVacation`."""
+
+    vYear: str
+    vMonth: str
+    vMDay: str
+    vWDay: str
+    vHour: str
+    vTemp: str
@@ -0,0 +1,275 @@
+"""Fleet-wide power cap for boost and heating requests."""
+import logging
+from collections import OrderedDict, deque
+from homeassistant.core import callback
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers.event import async_call_later
+from homeassistant.helpers.storage import Store
+from .const import (
+    DOMAIN,
+    DATA_LOAD_SCHEDULER,
+    ATTR_IS_HEATING,
+    DEFAULT_HEATER_POWER,
+    DEFAULT_POWER_STAGGER,
+    POWER_RESERVATION_TTL,
+    STORAGE_VERSION,
+)
+from .utils import is_heating, to_float
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class LoadScheduler:
+    """Admit load-increasing commands only while the fleet stays under the cap.
+
+    Live power per device comes from `status` on every refresh. A granted
+    command reserves the device's rated power until the device reports that
+    it is heating (or the reservation expires), so several grants between two
+    polls cannot overshoot the cap. Commands that do not fit are queued per
+    device, keeping only the latest command of each kind, and released in
+    round-robin order across devices with at least `stagger` seconds between
+    grants that add load. A device that does not fit yet is passed over, not
+    waited for, and commands for a device that is already heating are not
+    staggered. A device rated above the cap can never fit and is refused.
+    A cap of 0 disables the scheduler.
+    """
+
+    def __init__(self, hass, store):
+        """Initialize the scheduler."""
+        self.hass = hass
+        self._store = store
+        self.cap = 0
+        self.stagger = DEFAULT_POWER_STAGGER
+        self._live = {}
+        self._rated = {}
+        self._reserved = {}
+        self._queues = {}
+        self._round_robin = deque()
+        self._last_grant = None
+        self._unsub_timer = None
+        self._listeners = []
+
+    async def async_load(self):
+        """Load the configured cap and stagger."""
+        stored = await self._store.async_load() or {}
+        self.cap = stored.get("cap", 0)
+        self.stagger = stored.get("stagger", DEFAULT_POWER_STAGGER)
+
+    async def async_configure(self, cap, stagger):
+        """Set and persist the cap and stagger, then release what now fits."""
+        self.cap = cap
+        self.stagger = stagger
+        await self._store.async_save({"cap": cap, "stagger": stagger})
+        self._async_dispatch()
+        self._async_notify()
+
+    @property
+    def live_total(self):
+        """Return the power currently drawn by the fleet."""
+        return sum(self._live.values())
+
+    @property
+    def reserved_total(self):
+        """Return the power reserved for granted commands not yet reflected in status."""
+        now = self.hass.loop.time()
+        return sum(watts for watts, expires in self._reserved.values() if expires > now)
+
+    @property
+    def headroom(self):
+        """Return the power still available under the cap (None when uncapped)."""
+        if not self.cap:
+            return None
+        return self.cap - self.live_total - self.reserved_total
+
+    def allocation(self, entry_id):
+        """Return the power attributed to a device: live draw plus reservation."""
+        reserved, expires = self._reserved.get(entry_id, (0, 0))
+        if expires <= self.hass.loop.time():
+            reserved = 0
+        return self._live.get(entry_id, 0) + reserved
+
+    def queued(self, entry_id):
+        """Return the kinds of commands queued for a device."""
+        return list(self._queues.get(entry_id, {}))
+
+    @callback
+    def async_update_device(self, entry_id, data):
+        """Record a device's live and rated power from a refresh.
+
+        Listeners are only notified when the device's allocation changed,
+        not on every poll of every device.
+        """
+        allocated = self.allocation(entry_id)
+        status = data.get("status", {})
+        watts = to_float(status.get("watts"))
+        rated = to_float(data.get("calcRes", {}).get("watt")) or watts
+        if rated:
+            self._rated[entry_id] = rated
+        heating = is_heating(status.get(ATTR_IS_HEATING))
+        self._live[entry_id] = (watts or self._rated.get(entry_id, 0)) if heating else 0
+        if heating:
+            self._reserved.pop(entry_id, None)
+        if self._round_robin:
+            self._async_dispatch()
+        if self.allocation(entry_id) != allocated:
+            self._async_notify()
+
+    @callback
+    def async_remove_device(self, entry_id):
+        """Forget a device that is being unloaded."""
+        for table in (self._live, self._rated, self._reserved, self._queues):
+            table.pop(entry_id, None)
+        if entry_id in self._round_robin:
+            self._round_robin.remove(entry_id)
+        self._async_notify()
+
+    async def async_submit(self, entry_id, kind, action) -> bool:
+        """Run `action` now if it fits under the cap, otherwise queue it.
+
+        Returns True if the command ran immediately. A queued command replaces
+        any earlier queued command of the same kind for that device. Raises
+        HomeAssistantError if the command would start a heater whose rated
+        power alone exceeds the cap.
+        """
+        if not self.cap:
+            await action()
+            return True
+        rated = self._rated.get(entry_id, DEFAULT_HEATER_POWER)
+        if rated > self.cap and self.allocation(entry_id) == 0:
+            raise HomeAssistantError(
+                f"Cannot run {kind}: the heater is rated {rated:.0f} W, above the fleet power cap of {self.cap:.0f} W"
+            )
+
+        queue = self._queues.setdefault(entry_id, OrderedDict())
+        queue.pop(kind, None)
+        queue[kind] = action
+        if entry_id not in self._round_robin:
+            self._round_robin.append(entry_id)
+
+        if (entry_id, kind) in self._async_dispatch(claim=(entry_id, kind)):
+            await action()
+            return True
+        self._async_notify()
+        _LOGGER.info("Deferring %s for %s: fleet power cap of %s W reached", kind, entry_id, self.cap)
+        return False
+
+    @callback
+    def async_cancel(self, entry_id, kind):
+        """Drop a queued command, e.g. when the user switches boost off again."""
+        queue = self._queues.get(entry_id)
+        if queue and queue.pop(kind, None) is not None:
+            _LOGGER.debug("Cancelled queued %s for %s", kind, entry_id)
+            self._async_notify()
+
+    @callback
+    def _async_dispatch(self, claim=None):
+        """Grant queued commands in round-robin order while they fit.
+
+        Devices that do not fit, or would add load within the stagger
+        interval, keep their place and the next device is tried. A granted
+        device moves to the back. Returns the `(entry_id, kind)` of every
+        grant; granted commands are started as tasks, except `claim`, which
+        the caller runs itself.
+        """
+        granted = set()
+        now = self.hass.loop.time()
+        progress = True
+        while progress:
+            progress = False
+            for entry_id in list(self._round_robin):
+                queue = self._queues.get(entry_id)
+                if not queue:
+                    self._round_robin.remove(entry_id)
+                    continue
+                watts = self._rated.get(entry_id, DEFAULT_HEATER_POWER)
+                # A device that is heating or already reserved adds no load
+                adds_load = self.allocation(entry_id) == 0
+                if adds_load and self.cap:
+                    if watts > self.cap:
+                        # Cap lowered after the command was queued; it can never fit
+                        _LOGGER.warning(
+                            "Dropping queued %s for %s: rated %s W is above the fleet power cap of %s W",
+                            ", ".join(queue), entry_id, watts, self.cap,
+                        )
+                        self._round_robin.remove(entry_id)
+                        self._queues.pop(entry_id, None)
+                        continue
+                    if self.headroom < watts:
+                        continue
+                    if self._last_grant is not None and now - self._last_grant < self.stagger:
+                        self._async_schedule(self.stagger - (now - self._last_grant))
+                        continue
+
+                kind, action = queue.popitem(last=False)
+                self._round_robin.remove(entry_id)
+                if queue:
+                    self._round_robin.append(entry_id)
+                else:
+                    self._queues.pop(entry_id, None)
+                if adds_load:
+                    self._reserved[entry_id] = (watts, now + POWER_RESERVATION_TTL)
+                    self._last_grant = now
+                _LOGGER.debug("Granting %s for %s (%s W)", kind, entry_id, watts)
+                granted.add((entry_id, kind))
+                progress = True
+                if (entry_id, kind) != claim:
+                    self.hass.async_create_task(self._async_run(entry_id, kind, action))
+
+        if granted:
+            self._async_notify()
+        return granted
+
+    async def _async_run(self, entry_id, kind, action):
+        """Run a command released from the queue; nobody awaits it, so failures are logged here."""
+        try:
+            await action()
+        except Exception:
+            _LOGGER.exception("Queued %s for %s failed", kind, entry_id)
+
+    @callback
+    def _async_schedule(self, delay):
+        """Dispatch again once the stagger interval has passed."""
+        if self._unsub_timer is not None:
+            return
+
+        @callback
+        def _fire(_now):
+            self._unsub_timer = None
+            self._async_dispatch()
+
+        self._unsub_timer = async_call_later(self.hass, delay, _fire)
+
+    @callback
+    def async_add_listener(self, update_callback):
+        """Call `update_callback` whenever allocations change."""
+        self._listeners.append(update_callback)
+
+        @callback
+        def remove_listener():
+            self._listeners.remove(update_callback)
+
+        return remove_listener
+
+    @callback
+    def _async_notify(self):
+        for update_callback in list(self._listeners):
+            update_callback()
+
+
+async def async_get_scheduler(hass):
+    """Return the domain-wide scheduler, creating it on first use."""
+    scheduler = hass.data.get(DATA_LOAD_SCHEDULER)
+    if scheduler is None:
+        scheduler = LoadScheduler(hass, Store(hass, STORAGE_VERSION, f"{DOMAIN}.scheduler"))
+        hass.data[DATA_LOAD_SCHEDULER] = scheduler
+        await scheduler.async_load()
+    return scheduler
+
+
+async def async_run_with_power_budget(hass, entry_id, kind, action) -> bool:
+    """Run a load-increasing command through the fleet scheduler."""
+    scheduler = hass.data.get(DATA_LOAD_SCHEDULER)
+    if scheduler is None:
+        await action()
+        return True
+    return await scheduler.async_submit(entry_id, kind, action)
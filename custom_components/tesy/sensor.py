@@ -1,252 +1,524 @@
-import logging
-from homeassistant.components.sensor import SensorEntity
-from homeassistant.helpers.update_coordinator import CoordinatorEntity
-from homeassistant.const import UnitOfEnergy, UnitOfPower, UnitOfVolume
-from datetime import datetime
-from .const import DOMAIN, SCHEDULE_ENDPOINTS, TESY_DEVICE_TYPES, ATTR_CURRENT_TEMP, ATTR_TARGET_TEMP, ATTR_TIME_ZONE, ATTR_DATE_TIME, ATTR_MODE
-
-_LOGGER = logging.getLogger(__name__)
-
-async def async_setup_entry(hass, config_entry, async_add_entities):
-    """Set up the Tesy sensor platform."""
-    entry_data = hass.data.get(DOMAIN, {}).get(config_entry.entry_id)
-    if not entry_data:
-        _LOGGER.error("Entry data not found for config entry: %s", config_entry.entry_id)
-        return
-
-    try:
-        coordinator = entry_data.get("coordinator")
-        if not coordinator:
-            _LOGGER.error("Coordinator not found for entry: %s", config_entry.entry_id)
-            return
-
-        api_url = entry_data.get("api_url")
-        device_id = entry_data.get("device_id")
-        device_name = entry_data.get("device_name")
-
-        if not all([api_url, device_id, device_name]):
-            _LOGGER.error("Missing required entry data for sensors setup")
-            return
-
-        # Define all sensors
-        sensors = [
-            TesySensor(coordinator, api_url, device_id, device_name, "heater_state", endpoint="status", unit=None, icon="mdi:radiator"),
-            TesySensor(coordinator, api_url, device_id, device_name, ATTR_MODE, endpoint="status", unit=None, icon="mdi:settings"),
-            TesySensor(coordinator, api_url, device_id, device_name, "err_flag", endpoint="status", unit=None, icon="mdi:alert"),
-            TesySensor(coordinator, api_url, device_id, device_name, "lockB", endpoint="status", unit=None, icon="mdi:lock"),
-            TesySensor(coordinator, api_url, device_id, device_name, "boost", endpoint="status", unit=None, icon="mdi:rocket"),
-            TesySensor(coordinator, api_url, device_id, device_name, "watts", endpoint="status", unit=UnitOfPower.WATT, icon="mdi:power-plug"),
-            TesySensor(coordinator, api_url, device_id, device_name, ATTR_CURRENT_TEMP, endpoint="status", unit="°C", icon="mdi:thermometer"),
-            TesySensor(coordinator, api_url, device_id, device_name, ATTR_TARGET_TEMP, endpoint="status", unit="°C", icon="mdi:thermometer-plus"),
-            TesySensor(coordinator, api_url, device_id, device_name, "mix40", endpoint="status", unit=UnitOfVolume.LITERS, icon="mdi:water"),
-            TesySensor(coordinator, api_url, device_id, device_name, ATTR_DATE_TIME, endpoint="status", unit=None, icon="mdi:calendar"),
-            TesySensor(coordinator, api_url, device_id, device_name, ATTR_TIME_ZONE, endpoint="status", unit=None, icon="mdi:clock"),
-            TesySensor(coordinator, api_url, device_id, device_name, "resetDate", endpoint="calcRes", unit=None, icon="mdi:calendar-refresh"),
-            TesySensor(coordinator, api_url, device_id, device_name, "volume", endpoint="calcRes", unit=UnitOfVolume.LITERS, icon="mdi:water"),
-            TesySensor(coordinator, api_url, device_id, device_name, "watt", endpoint="calcRes", unit=UnitOfPower.WATT, icon="mdi:flash"),
-            TesyEnergySensor(coordinator, api_url, device_id, device_name),
-        ]
-
-        # Add schedule sensors
-        for schedule_type, endpoint in SCHEDULE_ENDPOINTS.items():
-            sensors.append(
-                TesyScheduleSensor(coordinator, api_url, device_id, device_name, schedule_type, endpoint)
-            )
-
-        async_add_entities(sensors)
-    except Exception as e:
-        _LOGGER.error("Error setting up Tesy sensors: %s", e, exc_info=True)
-
-class TesySensor(CoordinatorEntity, SensorEntity):
-    """Representation of a Tesy sensor."""
-
-    def __init__(self, coordinator, api_url, device_id, device_name, key, endpoint="status", unit=None, icon=None):
-        """Initialize the sensor."""
-        super().__init__(coordinator)
-        self._api_url = api_url
-        self._device_id = device_id
-        self._device_name = device_name
-        self._key = key
-        self._endpoint = endpoint
-        self._unit = unit
-        self._icon = icon
-        self._attr_unique_id = f"{device_id}_{endpoint}_{key}"
-
-        # Define custom mappings for user-friendly names
-        self._key_name_mapping = {
-            "heater_state": "Heater State",
-            ATTR_MODE: "Operating Mode",
-            "err_flag": "Error Flag",
-            "lockB": "Child Lock Status",
-            "boost": "Boost Mode",
-            "watts": "Power Consumption (Watts)",
-            ATTR_CURRENT_TEMP: "Current Temperature",
-            ATTR_TARGET_TEMP: "Target Temperature",
-            "mix40": "Water Mix at 40°C",
-            "resetDate": "Reset Date of Energy Usage",
-            "volume": "Water Volume",
-            "watt": "Current Power",
-            ATTR_TIME_ZONE: "Time Zone",
-            ATTR_DATE_TIME: "Date/Time",            
-        }
-
-    @property
-    def name(self):
-        """Return the name of the sensor."""
-        key_name = self._key_name_mapping.get(self._key, self._key.replace('_', ' ').title())
-        return f"{self._device_name} {key_name}"
-
-    @property
-    def native_value(self):
-        """Return the state of the sensor."""
-        data = self.coordinator.data.get(self._endpoint, {})
-        return data.get(self._key)
-
-    @property
-    def extra_state_attributes(self):
-        """Return the extra state attributes."""
-        devstat_data = self.coordinator.data.get("devstat", {})
-        return {
-            "macaddr": devstat_data.get("macaddr", "Unknown"),
-            "device_name": self._device_name,
-            "source": "Tesy API",
-        }
-
-    @property
-    def unit_of_measurement(self):
-        """Return the unit of measurement."""
-        return self._unit
-
-    @property
-    def icon(self):
-        """Return the icon for the sensor."""
-        return self._icon
-
-class TesyEnergySensor(CoordinatorEntity, SensorEntity):
-    """Representation of the Tesy Energy Sensor."""
-
-    def __init__(self, coordinator, api_url, device_id, device_name):
-        """Initialize the Tesy Energy Sensor."""
-        super().__init__(coordinator)
-        self._api_url = api_url
-        self._device_id = device_id
-        self._device_name = device_name
-        self._attr_name = f"{device_name} Energy Consumption"
-        self._attr_unique_id = f"{device_id}_energy_consumption"
-        self._attr_native_unit_of_measurement = UnitOfEnergy.WATT_HOUR
-        self._attr_device_class = "energy"
-        self._attr_state_class = "total_increasing"
-
-    @property
-    def native_value(self):
-        """Return the current energy consumption in Wh."""
-        calc_res = self.coordinator.data.get("calcRes", {})
-    
-        # Retrieve 'sum' (total energy in Joules) and 'watt' (power in Watts) from calcRes
-        total_energy_usage = calc_res.get("sum")
-        watt = calc_res.get("watt")
-    
-        try:
-            # Convert both values to numeric types if they are not already
-            total_energy_usage = float(total_energy_usage) if total_energy_usage is not None else None
-            watt = float(watt) if watt is not None else None
-        except ValueError as e:
-            _LOGGER.error("Failed to convert energy data to numeric values. Error: %s", e)
-            return None
-    
-        if total_energy_usage is not None and watt is not None:
-            try:
-                # Convert Joules to Wh, then multiply by power
-                energy = (total_energy_usage / 3600) * watt
-                return int(energy)
-            except (ValueError, TypeError) as e:
-                _LOGGER.error("Invalid energy calculation. Error: %s", e)
-                return None
-        else:
-            _LOGGER.warning(
-                "Energy consumption data is incomplete. 'sum': %s, 'watt': %s",
-                total_energy_usage,
-                watt,
-            )
-            return None
-            
-    @property
-    def extra_state_attributes(self):
-        """Return extra attributes for the energy sensor."""
-        calc_res = self.coordinator.data.get("calcRes", {})
-        devstat_data = self.coordinator.data.get("devstat", {})
-
-        return {
-            "reset_date": calc_res.get("resetDate"),
-            "current_power": calc_res.get("watt"),
-            "macaddr": devstat_data.get("macaddr", "Unknown"),
-            "device_name": self._device_name,
-        }
-
-class TesyScheduleSensor(CoordinatorEntity, SensorEntity):
-    """Representation of a Tesy schedule sensor."""
-
-    def __init__(self, coordinator, api_url, device_id, device_name, schedule_type, endpoint):
-        """Initialize the schedule sensor."""
-        super().__init__(coordinator)
-        self._api_url = api_url
-        self._device_id = device_id
-        self._device_name = device_name
-        self._schedule_type = schedule_type
-        self._endpoint = endpoint
-
-        schedule_type_mapping = {
-            "p1": "Program 1",
-            "p2": "Program 2",
-            "p3": "Program 3",
-            "vacation": "Vacation",
-        }
-        self._attr_name = f"{device_name} Schedule {schedule_type_mapping.get(schedule_type, schedule_type).upper()}"
-        self._attr_unique_id = f"{device_id}_schedule_{schedule_type}"
-
-    @property
-    def native_value(self):
-        """Return the temperature for the current hour from the schedule."""
-        current_hour = datetime.now().hour
-        schedule_data = self.coordinator.data.get(self._schedule_type, None)
-
-        if not schedule_data:
-            _LOGGER.warning("No schedule data available for type: %s", self._schedule_type)
-            return None
-            
-        if self._schedule_type == "vacation":
-            # Handle vacation schedule format
-            try:
-                vacation_temp = schedule_data.get("vTemp")
-                return vacation_temp
-            except (AttributeError, KeyError) as e:
-                _LOGGER.error(
-                    "Error retrieving vacation temperature from schedule data: %s. Error: %s",
-                    schedule_data,
-                    e,
-                )
-                return None
-            
-        if not isinstance(schedule_data, list) or len(schedule_data) < 1:
-            _LOGGER.error("Invalid schedule data format for type: %s. Data: %s", self._schedule_type, schedule_data)
-            return None
-
-        try:
-            current_temp = schedule_data[0].get(f"h{current_hour:02d}")
-            return current_temp
-        except (IndexError, AttributeError) as e:
-            _LOGGER.error(
-                "Error retrieving temperature for current hour from schedule data: %s. Error: %s",
-                schedule_data,
-                e,
-            )
-            return None
-
-    @property
-    def extra_state_attributes(self):
-        """Return detailed schedule data."""
-        return {
-            "schedule_details": self.coordinator.data.get(self._schedule_type, {}),
-            "device_name": self._device_name,
-            "source": "Tesy API",
-        }
+import logging
+from homeassistant.components.sensor import SensorEntity
+from homeassistant.core import callback
+from homeassistant.helpers.entity import EntityCategory
+from homeassistant.helpers.event import async_track_time_change
+from homeassistant.helpers.update_coordinator import CoordinatorEntity
+from homeassistant.const import UnitOfEnergy, UnitOfPower, UnitOfTime, UnitOfVolume
+from datetime import datetime
+from .const import DOMAIN, SCHEDULE_ENDPOINTS, ENDPOINT_DATA_KEYS, TESY_DEVICE_TYPES, ATTR_CURRENT_TEMP, ATTR_TARGET_TEMP, ATTR_TIME_ZONE, ATTR_DATE_TIME, ATTR_MODE
+from .const import CONF_FORECAST_MINUTES, DEFAULT_FORECAST_MINUTES, DATA_LOAD_SCHEDULER
+from .const import CONF_STATE_HEARTBEAT, DEFAULT_STATE_HEARTBEAT
+from .filters import StateFilterMixin, make_state_filter
+
+_LOGGER = logging.getLogger(__name__)
+
+async def async_setup_entry(hass, config_entry, async_add_entities):
+    """Set up the Tesy sensor platform."""
+    entry_data = hass.data.get(DOMAIN, {}).get(config_entry.entry_id)
+    if not entry_data:
+        _LOGGER.error("Entry data not found for config entry: %s", config_entry.entry_id)
+        return
+
+    try:
+        coordinator = entry_data.get("coordinator")
+        if not coordinator:
+            _LOGGER.error("Coordinator not found for entry: %s", config_entry.entry_id)
+            return
+
+        api_url = entry_data.get("api_url")
+        device_id = entry_data.get("device_id")
+        device_name = entry_data.get("device_name")
+
+        if not all([api_url, device_id, device_name]):
+            _LOGGER.error("Missing required entry data for sensors setup")
+            return
+
+        # Define all sensors
+        sensors = [
+            TesySensor(coordinator, api_url, device_id, device_name, "heater_state", endpoint="status", unit=None, icon="mdi:radiator"),
+            TesySensor(coordinator, api_url, device_id, device_name, ATTR_MODE, endpoint="status", unit=None, icon="mdi:settings"),
+            TesySensor(coordinator, api_url, device_id, device_name, "err_flag", endpoint="status", unit=None, icon="mdi:alert"),
+            TesySensor(coordinator, api_url, device_id, device_name, "lockB", endpoint="status", unit=None, icon="mdi:lock"),
+            TesySensor(coordinator, api_url, device_id, device_name, "boost", endpoint="status", unit=None, icon="mdi:rocket"),
+            TesySensor(coordinator, api_url, device_id, device_name, "watts", endpoint="status", unit=UnitOfPower.WATT, icon="mdi:power-plug"),
+            TesySensor(coordinator, api_url, device_id, device_name, ATTR_CURRENT_TEMP, endpoint="status", unit="°C", icon="mdi:thermometer"),
+            TesySensor(coordinator, api_url, device_id, device_name, ATTR_TARGET_TEMP, endpoint="status", unit="°C", icon="mdi:thermometer-plus"),
+            TesySensor(coordinator, api_url, device_id, device_name, "mix40", endpoint="status", unit=UnitOfVolume.LITERS, icon="mdi:water"),
+            TesySensor(coordinator, api_url, device_id, device_name, ATTR_DATE_TIME, endpoint="status", unit=None, icon="mdi:calendar"),
+            TesySensor(coordinator, api_url, device_id, device_name, ATTR_TIME_ZONE, endpoint="status", unit=None, icon="mdi:clock"),
+            TesySensor(coordinator, api_url, device_id, device_name, "resetDate", endpoint="calcRes", unit=None, icon="mdi:calendar-refresh"),
+            TesySensor(coordinator, api_url, device_id, device_name, "volume", endpoint="calcRes", unit=UnitOfVolume.LITERS, icon="mdi:water"),
+            TesySensor(coordinator, api_url, device_id, device_name, "watt", endpoint="calcRes", unit=UnitOfPower.WATT, icon="mdi:flash"),
+            TesyEnergySensor(coordinator, api_url, device_id, device_name),
+        ]
+
+        # Add heating-cycle analytics sensors
+        detector = entry_data.get("cycles")
+        if detector is not None:
+            for key in TesyCycleSensor.KEYS:
+                sensors.append(TesyCycleSensor(coordinator, detector, device_id, device_name, key))
+
+        # Add hot-water draw sensors
+        draws = entry_data.get("draws")
+        if draws is not None:
+            for key in TesyDrawSensor.KEYS:
+                sensors.append(TesyDrawSensor(coordinator, draws, device_id, device_name, key))
+
+        # Add thermal model forecast sensors
+        model = entry_data.get("thermal")
+        if model is not None:
+            forecast_minutes = config_entry.options.get(CONF_FORECAST_MINUTES, DEFAULT_FORECAST_MINUTES)
+            sensors.append(TesyThermalSensor(coordinator, model, device_id, device_name, "minutes_to_target"))
+            sensors.append(
+                TesyThermalSensor(coordinator, model, device_id, device_name, "liters_at_40", forecast_minutes)
+            )
+
+        # Add the fleet power cap allocation sensor
+        scheduler = hass.data.get(DATA_LOAD_SCHEDULER)
+        if scheduler is not None:
+            sensors.append(TesyPowerAllocationSensor(coordinator, scheduler, config_entry.entry_id, device_id, device_name))
+
+        # Add clock drift diagnostics
+        clock = entry_data.get("clock")
+        if clock is not None:
+            sensors.append(TesyClockSensor(coordinator, clock, device_id, device_name, "drift"))
+            sensors.append(TesyClockSensor(coordinator, clock, device_id, device_name, "last_sync"))
+
+        # Add schedule sensors
+        for schedule_type, endpoint in SCHEDULE_ENDPOINTS.items():
+            sensors.append(
+                TesyScheduleSensor(coordinator, api_url, device_id, device_name, schedule_type, endpoint)
+            )
+
+        # Suppress writes for small wobbles of noisy numeric fields
+        heartbeat = config_entry.options.get(CONF_STATE_HEARTBEAT, DEFAULT_STATE_HEARTBEAT)
+        for sensor in sensors:
+            if isinstance(sensor, TesySensor):
+                sensor.state_filter = make_state_filter(sensor._endpoint, sensor._key, heartbeat)
+
+        async_add_entities([sensor for sensor in sensors if _is_supported(sensor, entry_data, coordinator.data)])
+    except Exception as e:
+        _LOGGER.error("Error setting up Tesy sensors: %s", e, exc_info=True)
+
+def _is_supported(sensor, entry_data, data):
+    """Return True if the device supports the data the sensor reads."""
+    endpoints = entry_data.get("endpoints") or list(ENDPOINT_DATA_KEYS)
+    supported_keys = {ENDPOINT_DATA_KEYS[endpoint] for endpoint in endpoints}
+
+    if isinstance(sensor, TesyScheduleSensor):
+        return sensor._schedule_type in supported_keys
+    if isinstance(sensor, TesyEnergySensor):
+        return "calcRes" in supported_keys
+    if sensor._endpoint not in supported_keys:
+        return False
+
+    # Skip fields the firmware does not report, judged from the first refresh
+    payload = (data or {}).get(sensor._endpoint)
+    if isinstance(payload, dict) and payload:
+        return sensor._key in payload
+    return True
+
+class TesySensor(StateFilterMixin, CoordinatorEntity, SensorEntity):
+    """Representation of a Tesy sensor."""
+
+    def __init__(self, coordinator, api_url, device_id, device_name, key, endpoint="status", unit=None, icon=None):
+        """Initialize the sensor."""
+        super().__init__(coordinator, (endpoint, "devstat"))
+        self._api_url = api_url
+        self._device_id = device_id
+        self._device_name = device_name
+        self._key = key
+        self._endpoint = endpoint
+        self._unit = unit
+        self._icon = icon
+        self._attr_unique_id = f"{device_id}_{endpoint}_{key}"
+
+        # Define custom mappings for user-friendly names
+        self._key_name_mapping = {
+            "heater_state": "Heater State",
+            ATTR_MODE: "Operating Mode",
+            "err_flag": "Error Flag",
+            "lockB": "Child Lock Status",
+            "boost": "Boost Mode",
+            "watts": "Power Consumption (Watts)",
+            ATTR_CURRENT_TEMP: "Current Temperature",
+            ATTR_TARGET_TEMP: "Target Temperature",
+            "mix40": "Water Mix at 40°C",
+            "resetDate": "Reset Date of Energy Usage",
+            "volume": "Water Volume",
+            "watt": "Current Power",
+            ATTR_TIME_ZONE: "Time Zone",
+            ATTR_DATE_TIME: "Date/Time",            
+        }
+
+    @property
+    def name(self):
+        """Return the name of the sensor."""
+        key_name = self._key_name_mapping.get(self._key, self._key.replace('_', ' ').title())
+        return f"{self._device_name} {key_name}"
+
+    @property
+    def native_value(self):
+        """Return the state of the sensor."""
+        if self.state_filter is not None:
+            return self.state_filter.value
+        return self._filtered_reading()
+
+    def _filtered_reading(self):
+        """Return the raw payload value."""
+        return self.coordinator.data.get(self._endpoint, {}).get(self._key)
+
+    @property
+    def extra_state_attributes(self):
+        """Return the extra state attributes."""
+        devstat_data = self.coordinator.data.get("devstat", {})
+        return {
+            "macaddr": devstat_data.get("macaddr", "Unknown"),
+            "device_name": self._device_name,
+            "source": "Tesy API",
+        }
+
+    @property
+    def unit_of_measurement(self):
+        """Return the unit of measurement."""
+        return self._unit
+
+    @property
+    def icon(self):
+        """Return the icon for the sensor."""
+        return self._icon
+
+class TesyEnergySensor(CoordinatorEntity, SensorEntity):
+    """Representation of the Tesy Energy Sensor."""
+
+    def __init__(self, coordinator, api_url, device_id, device_name):
+        """Initialize the Tesy Energy Sensor."""
+        super().__init__(coordinator, ("calcRes", "devstat"))
+        self._api_url = api_url
+        self._device_id = device_id
+        self._device_name = device_name
+        self._attr_name = f"{device_name} Energy Consumption"
+        self._attr_unique_id = f"{device_id}_energy_consumption"
+        self._attr_native_unit_of_measurement = UnitOfEnergy.WATT_HOUR
+        self._attr_device_class = "energy"
+        self._attr_state_class = "total_increasing"
+
+    @property
+    def native_value(self):
+        """Return the current energy consumption in Wh."""
+        calc_res = self.coordinator.data.get("calcRes", {})
+    
+        # Retrieve 'sum' (total energy in Joules) and 'watt' (power in Watts) from calcRes.
+        # Both are decoded to floats when fetched; undecodable values are dropped there.
+        total_energy_usage = calc_res.get("sum")
+        watt = calc_res.get("watt")
+
+        if total_energy_usage is None or watt is None:
+            _LOGGER.warning(
+                "Energy consumption data is incomplete. 'sum': %s, 'watt': %s",
+                total_energy_usage,
+                watt,
+            )
+            return None
+
+        # Convert Joules to Wh, then multiply by power
+        return int((total_energy_usage / 3600) * watt)
+
+    @property
+    def extra_state_attributes(self):
+        """Return extra attributes for the energy sensor."""
+        calc_res = self.coordinator.data.get("calcRes", {})
+        devstat_data = self.coordinator.data.get("devstat", {})
+
+        return {
+            "reset_date": calc_res.get("resetDate"),
+            "current_power": calc_res.get("watt"),
+            "macaddr": devstat_data.get("macaddr", "Unknown"),
+            "device_name": self._device_name,
+        }
+
+class TesyScheduleSensor(CoordinatorEntity, SensorEntity):
+    """Representation of a Tesy schedule sensor."""
+
+    def __init__(self, coordinator, api_url, device_id, device_name, schedule_type, endpoint):
+        """Initialize the schedule sensor."""
+        super().__init__(coordinator, schedule_type)
+        self._api_url = api_url
+        self._device_id = device_id
+        self._device_name = device_name
+        self._schedule_type = schedule_type
+        self._endpoint = endpoint
+
+        schedule_type_mapping = {
+            "p1": "Program 1",
+            "p2": "Program 2",
+            "p3": "Program 3",
+            "vacation": "Vacation",
+        }
+        self._attr_name = f"{device_name} Schedule {schedule_type_mapping.get(schedule_type, schedule_type).upper()}"
+        self._attr_unique_id = f"{device_id}_schedule_{schedule_type}"
+
+    async def async_added_to_hass(self):
+        """Also update on the hour, as the state follows the current hour's setpoint."""
+        await super().async_added_to_hass()
+        self.async_on_remove(
+            async_track_time_change(self.hass, self._async_hour_changed, minute=0, second=0)
+        )
+
+    @callback
+    def _async_hour_changed(self, now):
+        self.async_write_ha_state()
+
+    @property
+    def native_value(self):
+        """Return the temperature for the current hour from the schedule."""
+        current_hour = datetime.now().hour
+        schedule_data = self.coordinator.data.get(self._schedule_type, None)
+
+        if not schedule_data:
+            _LOGGER.warning("No schedule data available for type: %s", self._schedule_type)
+            return None
+            
+        if self._schedule_type == "vacation":
+            # Handle vacation schedule format
+            try:
+                vacation_temp = schedule_data.get("vTemp")
+                return vacation_temp
+            except (AttributeError, KeyError) as e:
+                _LOGGER.error(
+                    "Error retrieving vacation temperature from schedule data: %s. Error: %s",
+                    schedule_data,
+                    e,
+                )
+                return None
+            
+        if not isinstance(schedule_data, list) or len(schedule_data) < 1:
+            _LOGGER.error("Invalid schedule data format for type: %s. Data: %s", self._schedule_type, schedule_data)
+            return None
+
+        try:
+            current_temp = schedule_data[0].get(f"h{current_hour:02d}")
+            return current_temp
+        except (IndexError, AttributeError) as e:
+            _LOGGER.error(
+                "Error retrieving temperature for current hour from schedule data: %s. Error: %s",
+                schedule_data,
+                e,
+            )
+            return None
+
+    @property
+    def extra_state_attributes(self):
+        """Return detailed schedule data."""
+        return {
+            "schedule_details": self.coordinator.data.get(self._schedule_type, {}),
+            "device_name": self._device_name,
+            "source": "Tesy API",
+        }
+
+
+class TesyCycleSensor(CoordinatorEntity, SensorEntity):
+    """Daily heating-cycle aggregate computed by the cycle detector."""
+
+    # key -> (name, unit, icon)
+    KEYS = {
+        "cycles_today": ("Heating Cycles Today", None, "mdi:counter"),
+        "avg_cycle_minutes": ("Average Heating Cycle", UnitOfTime.MINUTES, "mdi:timer-outline"),
+        "kwh_per_cycle": ("Energy per Heating Cycle", UnitOfEnergy.KILO_WATT_HOUR, "mdi:lightning-bolt"),
+    }
+
+    def __init__(self, coordinator, detector, device_id, device_name, key):
+        """Initialize the cycle sensor."""
+        super().__init__(coordinator, "status")
+        self._detector = detector
+        self._device_id = device_id
+        self._device_name = device_name
+        self._key = key
+        name, unit, icon = self.KEYS[key]
+        self._attr_name = f"{device_name} {name}"
+        self._attr_unique_id = f"{device_id}_cycles_{key}"
+        self._attr_native_unit_of_measurement = unit
+        self._attr_icon = icon
+        self._attr_state_class = "measurement"
+
+    @property
+    def native_value(self):
+        """Return today's aggregate."""
+        if self._key == "cycles_today":
+            return self._detector.day_cycles
+        if self._key == "avg_cycle_minutes":
+            return self._detector.average_cycle_minutes
+        return self._detector.kwh_per_cycle
+
+    @property
+    def extra_state_attributes(self):
+        """Return the last completed cycle."""
+        return {
+            "heating_now": self._detector.is_open,
+            "last_cycle": self._detector.last_cycle,
+            "device_name": self._device_name,
+        }
+
+
+class TesyDrawSensor(CoordinatorEntity, SensorEntity):
+    """Hot-water draw count and consumption estimated by the draw detector."""
+
+    # key -> (name, unit, icon, state class)
+    KEYS = {
+        "draws_today": ("Hot Water Draws Today", None, "mdi:water-pump", "total_increasing"),
+        "liters_today": ("Hot Water Used Today", UnitOfVolume.LITERS, "mdi:water", "total_increasing"),
+        "last_draw_liters": ("Last Hot Water Draw", UnitOfVolume.LITERS, "mdi:faucet", "measurement"),
+    }
+
+    def __init__(self, coordinator, detector, device_id, device_name, key):
+        """Initialize the draw sensor."""
+        super().__init__(coordinator, "status")
+        self._detector = detector
+        self._device_name = device_name
+        self._key = key
+        name, unit, icon, state_class = self.KEYS[key]
+        self._attr_name = f"{device_name} {name}"
+        self._attr_unique_id = f"{device_id}_draws_{key}"
+        self._attr_native_unit_of_measurement = unit
+        self._attr_icon = icon
+        self._attr_state_class = state_class
+
+    @property
+    def native_value(self):
+        """Return today's total or the last draw."""
+        if self._key == "draws_today":
+            return self._detector.day_draws
+        if self._key == "liters_today":
+            return round(self._detector.day_liters, 1)
+        last_draw = self._detector.last_draw
+        return last_draw["liters"] if last_draw else None
+
+    @property
+    def extra_state_attributes(self):
+        """Return the latest draws; only the last-draw sensor carries the event log."""
+        attributes = {"drawing_now": self._detector.is_open, "device_name": self._device_name}
+        if self._key == "last_draw_liters":
+            attributes["last_draw"] = self._detector.last_draw
+            attributes["recent_draws"] = self._detector.recent_events()
+        return attributes
+
+
+class TesyThermalSensor(CoordinatorEntity, SensorEntity):
+    """Forecast computed by the device's online thermal model."""
+
+    def __init__(self, coordinator, model, device_id, device_name, key, forecast_minutes=None):
+        """Initialize the thermal forecast sensor."""
+        super().__init__(coordinator, "status")
+        self._model = model
+        self._device_name = device_name
+        self._key = key
+        self._forecast_minutes = forecast_minutes
+        self._attr_unique_id = f"{device_id}_thermal_{key}"
+        if key == "minutes_to_target":
+            self._attr_name = f"{device_name} Time to Target Temperature"
+            self._attr_native_unit_of_measurement = UnitOfTime.MINUTES
+            self._attr_icon = "mdi:timer-sand"
+        else:
+            self._attr_name = f"{device_name} Water at 40°C in {forecast_minutes} min"
+            self._attr_native_unit_of_measurement = UnitOfVolume.LITERS
+            self._attr_icon = "mdi:water-thermometer"
+
+    @property
+    def native_value(self):
+        """Return the forecast."""
+        if self._key == "minutes_to_target":
+            return self._model.minutes_to_target
+        return self._model.liters_at_40(self._forecast_minutes)
+
+    @property
+    def extra_state_attributes(self):
+        """Return the learned model parameters."""
+        model = self._model
+        return {
+            "heating_rate_c_per_min": round(model.heating_rate, 3) if model.heating_rate is not None else None,
+            "loss_coefficient_per_min": round(model.loss_coefficient, 5) if model.loss_coefficient is not None else None,
+            "tank_volume_l": round(model.volume) if model.volume is not None else None,
+            "samples": model.samples,
+            "device_name": self._device_name,
+        }
+
+
+class TesyPowerAllocationSensor(CoordinatorEntity, SensorEntity):
+    """Power the fleet scheduler attributes to this heater."""
+
+    def __init__(self, coordinator, scheduler, entry_id, device_id, device_name):
+        """Initialize the allocation sensor."""
+        super().__init__(coordinator, "status")
+        self._scheduler = scheduler
+        self._entry_id = entry_id
+        self._device_name = device_name
+        self._attr_name = f"{device_name} Power Allocation"
+        self._attr_unique_id = f"{device_id}_power_allocation"
+        self._attr_native_unit_of_measurement = UnitOfPower.WATT
+        self._attr_device_class = "power"
+        self._attr_state_class = "measurement"
+        self._attr_icon = "mdi:transmission-tower"
+
+    async def async_added_to_hass(self):
+        """Also update when the scheduler grants or queues commands."""
+        await super().async_added_to_hass()
+        self.async_on_remove(self._scheduler.async_add_listener(self.async_write_ha_state))
+
+    @property
+    def native_value(self):
+        """Return live draw plus any reservation for a granted command."""
+        return self._scheduler.allocation(self._entry_id)
+
+    @property
+    def extra_state_attributes(self):
+        """Return the fleet-wide budget."""
+        scheduler = self._scheduler
+        return {
+            "queued": scheduler.queued(self._entry_id),
+            "fleet_power": scheduler.live_total,
+            "fleet_reserved": scheduler.reserved_total,
+            "fleet_cap": scheduler.cap or None,
+            "fleet_headroom": scheduler.headroom,
+            "device_name": self._device_name,
+        }
+
+
+class TesyClockSensor(CoordinatorEntity, SensorEntity):
+    """Diagnostic sensor for the device clock drift and the last resync."""
+
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+
+    def __init__(self, coordinator, clock, device_id, device_name, key):
+        """Initialize the clock sensor."""
+        super().__init__(coordinator, "status")
+        self._clock = clock
+        self._device_name = device_name
+        self._key = key
+        self._attr_unique_id = f"{device_id}_clock_{key}"
+        if key == "drift":
+            self._attr_name = f"{device_name} Clock Drift"
+            self._attr_native_unit_of_measurement = UnitOfTime.SECONDS
+            self._attr_state_class = "measurement"
+            self._attr_icon = "mdi:clock-alert-outline"
+        else:
+            self._attr_name = f"{device_name} Last Clock Sync"
+            self._attr_device_class = "timestamp"
+            self._attr_icon = "mdi:clock-check-outline"
+
+    @property
+    def native_value(self):
+        """Return the drift in seconds or the last sync time."""
+        if self._key == "drift":
+            return self._clock.drift
+        return self._clock.last_sync
+
+    @property
+    def extra_state_attributes(self):
+        """Return the estimate's error bound and the threshold."""
+        return {
+            "uncertainty": self._clock.uncertainty,
+            "threshold": self._clock.threshold,
+            "tz_mismatch": self._clock.tz_mismatch,
+            "device_name": self._device_name,
+        }
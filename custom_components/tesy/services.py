@@ -1,73 +1,366 @@
-import datetime
-import logging
-from aiohttp import ClientSession
-import voluptuous as vol
-from homeassistant.core import HomeAssistant, ServiceCall
-from homeassistant.helpers.typing import ConfigType
-
-_LOGGER = logging.getLogger(__name__)
-
-# Utility function to get the weekday number (0=Sunday, 1=Monday, ..., 6=Saturday)
-def get_weekday(date: datetime.date) -> int:
-    return (date.weekday() + 1) % 7
-
-# Service definition
-async def set_vacation_mode_service(hass: HomeAssistant, call: ServiceCall, api_url: str):
-    """Handle the service call to set vacation mode."""
-    try:
-        # Extract the parameters from the service call
-        vacation_end = call.data.get("vacation_end")
-        vacation_temp = call.data.get("vacation_temp")
-
-        if not vacation_end or not vacation_temp:
-            _LOGGER.error("Missing required parameters: vacation_end or vacation_temp")
-            return
-
-        # Parse vacation_end into a datetime object
-        vacation_datetime = datetime.datetime.fromisoformat(vacation_end)
-        vYear = vacation_datetime.year % 100  # Get last two digits of the year
-        vMonth = vacation_datetime.month
-        vMDay = vacation_datetime.day
-        vHour = vacation_datetime.hour
-        vWDay = get_weekday(vacation_datetime.date())  # Calculate the day of the week
-
-        # Construct the API URL
-        url = (
-            f"{api_url}/setVacation?"
-            f"vYear={vYear}&vMonth={vMonth:02d}&vMDay={vMDay:02d}"
-            f"&vWDay={vWDay}&vHour={vHour:02d}&vTemp={vacation_temp}"
-        )
-
-        _LOGGER.debug("Constructed URL: %s", url)
-
-        # Send the request to the API
-        async with ClientSession() as session:
-            async with session.get(url) as response:
-                if response.status == 200:
-                    _LOGGER.info(
-                        "Vacation mode successfully set: %s (temp=%s)",
-                        vacation_end,
-                        vacation_temp,
-                    )
-                else:
-                    _LOGGER.error("Failed to set vacation mode: HTTP %s", response.status)
-
-    except Exception as e:
-        _LOGGER.error("Error setting vacation mode: %s", e)
-
-# Register the service
-async def register_set_vacation_mode_service(hass: HomeAssistant, api_url: str):
-    """Register the set_vacation_mode service."""
-    hass.services.async_register(
-        "tesy",
-        "set_vacation_mode",
-        lambda call: set_vacation_mode_service(hass, call, api_url),
-        schema=vol.Schema(
-            {
-                vol.Required("vacation_end"): vol.All(
-                    str, vol.Match(r"^\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}$")
-                ),
-                vol.Required("vacation_temp"): vol.All(vol.Coerce(float), vol.Range(min=8, max=75)),
-            }
-        ),
-    )
+import datetime
+import logging
+import voluptuous as vol
+from homeassistant.core import HomeAssistant, ServiceCall, SupportsResponse
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers import config_validation as cv
+from homeassistant.helpers.typing import ConfigType
+from .const import (
+    DOMAIN,
+    DEFAULT_HEATING_RATE,
+    DEFAULT_LOSS_COEFFICIENT,
+    DEFAULT_HEATER_POWER,
+    THERMAL_AMBIENT_TEMP,
+    DEFAULT_POWER_STAGGER,
+    SCHEDULE_ENDPOINTS,
+    DEFAULT_IMPORT_CONCURRENCY,
+    DEFAULT_IMPORT_TIMEOUT,
+    DEFAULT_RESTORE_CONCURRENCY,
+    AVAILABILITY_DAYS,
+)
+from .profiler import async_profile
+from .provisioning import async_import_devices, parse_device_list, summarize
+from .optimizer import solve_program, expand_prices, expand_comfort
+from .scheduler import async_get_scheduler
+from .snapshots import async_get_snapshot_store
+from .pytesy import TesyError
+from .utils import async_set_program, get_client, get_entry_data, get_entry_data_by_url, to_float
+
+_LOGGER = logging.getLogger(__name__)
+
+# Utility function to get the weekday number (0=Sunday, 1=Monday, ..., 6=Saturday)
+def get_weekday(date: datetime.date) -> int:
+    return (date.weekday() + 1) % 7
+
+async def async_send_vacation(hass: HomeAssistant, api_url: str, vacation_end: str, vacation_temp) -> bool:
+    """Send the vacation end and temperature to the device."""
+    try:
+        await get_client(hass, api_url).set_vacation(datetime.datetime.fromisoformat(vacation_end), vacation_temp)
+    except TesyError as e:
+        _LOGGER.error("Failed to set vacation mode: %s", e)
+        return False
+    _LOGGER.info("Vacation mode successfully set: %s (temp=%s)", vacation_end, vacation_temp)
+    device = get_entry_data_by_url(hass, api_url)
+    if device and "coordinator" in device:
+        device["coordinator"].async_invalidate(SCHEDULE_ENDPOINTS["vacation"])
+        await device["coordinator"].async_request_refresh()
+    return True
+
+# Service definition
+async def set_vacation_mode_service(hass: HomeAssistant, call: ServiceCall, api_url: str):
+    """Handle the service call to set vacation mode."""
+    try:
+        # Extract the parameters from the service call
+        vacation_end = call.data.get("vacation_end")
+        vacation_temp = call.data.get("vacation_temp")
+
+        if not vacation_end or not vacation_temp:
+            _LOGGER.error("Missing required parameters: vacation_end or vacation_temp")
+            return
+
+        if not await async_send_vacation(hass, api_url, vacation_end, vacation_temp):
+            # Keep the intent and replay it once the device answers again
+            device = get_entry_data_by_url(hass, api_url)
+            if device and "journal" in device:
+                device["journal"].async_record(
+                    "vacation", {"vacation_end": vacation_end, "vacation_temp": vacation_temp}
+                )
+
+    except Exception as e:
+        _LOGGER.error("Error setting vacation mode: %s", e)
+
+# Register the service
+async def register_set_vacation_mode_service(hass: HomeAssistant, api_url: str):
+    """Register the set_vacation_mode service."""
+    hass.services.async_register(
+        "tesy",
+        "set_vacation_mode",
+        lambda call: set_vacation_mode_service(hass, call, api_url),
+        schema=vol.Schema(
+            {
+                vol.Required("vacation_end"): vol.All(
+                    str, vol.Match(r"^\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}$")
+                ),
+                vol.Required("vacation_temp"): vol.All(vol.Coerce(float), vol.Range(min=8, max=75)),
+            }
+        ),
+    )
+
+
+async def optimize_program_service(hass: HomeAssistant, call: ServiceCall):
+    """Compute the cheapest weekly program and optionally write it to a slot."""
+    device = get_entry_data(hass, call.data.get("entry_id"))
+    if not device or "coordinator" not in device:
+        raise HomeAssistantError("Tesy device not found for program optimization")
+
+    coordinator = device["coordinator"]
+    model = device.get("thermal")
+    status = coordinator.data.get("status", {})
+    power = to_float(coordinator.data.get("calcRes", {}).get("watt")) or DEFAULT_HEATER_POWER
+    heating_rate = (model.heating_rate if model else None) or DEFAULT_HEATING_RATE
+    loss_coefficient = (model.loss_coefficient if model else None) or DEFAULT_LOSS_COEFFICIENT
+    start_temp = to_float(status.get("gradus")) or device["min_setpoint"]
+
+    try:
+        prices = expand_prices(call.data["prices"])
+    except ValueError as e:
+        raise HomeAssistantError(f"Invalid price vector: {e}") from e
+
+    program, cost = await hass.async_add_executor_job(
+        solve_program,
+        prices,
+        expand_comfort(call.data.get("comfort", [])),
+        heating_rate,
+        loss_coefficient,
+        power / 1000,
+        start_temp,
+        device["min_setpoint"],
+        device["max_setpoint"],
+        THERMAL_AMBIENT_TEMP,
+    )
+    if program is None:
+        raise HomeAssistantError("Comfort constraints cannot be met with the learned heating rate")
+
+    slot = call.data.get("program")
+    if slot is not None:
+        if await async_set_program(hass, device["api_url"], slot, program):
+            _LOGGER.info("Optimized program written to P%s (cost %s)", slot, cost)
+            coordinator.async_invalidate(SCHEDULE_ENDPOINTS[f"p{slot}"])
+            await coordinator.async_request_refresh()
+        else:
+            raise HomeAssistantError(f"Failed to write optimized program to P{slot}")
+
+    return {
+        "program": program,
+        "cost": cost,
+        "heating_rate": heating_rate,
+        "loss_coefficient": loss_coefficient,
+        "power_w": power,
+    }
+
+# Register the optimizer service
+async def register_optimize_program_service(hass: HomeAssistant):
+    """Register the optimize_program service."""
+    if hass.services.has_service(DOMAIN, "optimize_program"):
+        return
+
+    async def handle_optimize_program(call: ServiceCall):
+        result = await optimize_program_service(hass, call)
+        return result if call.return_response else None
+
+    hass.services.async_register(
+        DOMAIN,
+        "optimize_program",
+        handle_optimize_program,
+        schema=vol.Schema(
+            {
+                vol.Optional("entry_id"): str,
+                vol.Required("prices"): vol.All([vol.Coerce(float)], vol.Length(min=24, max=168)),
+                vol.Optional("comfort", default=[]): [
+                    vol.Schema(
+                        {
+                            vol.Required("hour"): vol.All(vol.Coerce(int), vol.Range(min=0, max=23)),
+                            vol.Required("min_temp"): vol.All(vol.Coerce(float), vol.Range(min=8, max=75)),
+                            vol.Optional("day"): vol.All(vol.Coerce(int), vol.Range(min=0, max=6)),
+                        }
+                    )
+                ],
+                vol.Optional("program"): vol.All(vol.Coerce(int), vol.In([1, 2, 3])),
+            }
+        ),
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+
+# Register the fleet power cap service
+async def register_set_power_cap_service(hass: HomeAssistant):
+    """Register the set_power_cap service."""
+    if hass.services.has_service(DOMAIN, "set_power_cap"):
+        return
+
+    async def handle_set_power_cap(call: ServiceCall):
+        scheduler = await async_get_scheduler(hass)
+        await scheduler.async_configure(call.data["watts"], call.data["stagger_seconds"])
+        _LOGGER.info("Fleet power cap set to %s W (stagger %s s)", scheduler.cap, scheduler.stagger)
+
+    hass.services.async_register(
+        DOMAIN,
+        "set_power_cap",
+        handle_set_power_cap,
+        schema=vol.Schema(
+            {
+                # 0 removes the cap
+                vol.Required("watts"): vol.All(vol.Coerce(float), vol.Range(min=0)),
+                vol.Optional("stagger_seconds", default=DEFAULT_POWER_STAGGER): vol.All(
+                    vol.Coerce(float), vol.Range(min=0, max=3600)
+                ),
+            }
+        ),
+    )
+
+# Register the hot path profiling service
+async def register_profile_service(hass: HomeAssistant):
+    """Register the profile service."""
+    if hass.services.has_service(DOMAIN, "profile"):
+        return
+
+    async def handle_profile(call: ServiceCall):
+        report = await async_profile(hass, call.data["duration"])
+        return report if call.return_response else None
+
+    hass.services.async_register(
+        DOMAIN,
+        "profile",
+        handle_profile,
+        schema=vol.Schema(
+            {
+                vol.Optional("duration", default=60): vol.All(vol.Coerce(float), vol.Range(min=1, max=3600)),
+            }
+        ),
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+
+# Register the bulk import service
+async def register_import_devices_service(hass: HomeAssistant):
+    """Register the import_devices service."""
+    if hass.services.has_service(DOMAIN, "import_devices"):
+        return
+
+    async def handle_import_devices(call: ServiceCall):
+        if "path" in call.data:
+            path = hass.config.path(call.data["path"])
+            if not hass.config.is_allowed_path(path):
+                raise HomeAssistantError(f"Reading {path} is not allowed")
+
+            def read_list():
+                with open(path, encoding="utf-8-sig") as device_list:
+                    return device_list.read()
+
+            try:
+                text = await hass.async_add_executor_job(read_list)
+                fmt = "yaml" if path.endswith((".yaml", ".yml")) else "csv"
+                rows = parse_device_list(text, fmt)
+            except (OSError, ValueError) as e:
+                raise HomeAssistantError(f"Cannot read device list {path}: {e}") from e
+        elif "devices" in call.data:
+            try:
+                rows = parse_device_list(call.data["devices"], "yaml")
+            except ValueError as e:
+                raise HomeAssistantError(f"Invalid device list: {e}") from e
+        else:
+            raise HomeAssistantError("Either path or devices is required")
+
+        report = await async_import_devices(hass, rows, call.data["concurrency"], call.data["timeout"])
+        return {"summary": summarize(report), "rows": report} if call.return_response else None
+
+    hass.services.async_register(
+        DOMAIN,
+        "import_devices",
+        handle_import_devices,
+        schema=vol.Schema(
+            {
+                # CSV or YAML file, relative to the configuration directory
+                vol.Exclusive("path", "source"): str,
+                # Inline list of addresses or {ip, mac, name} mappings
+                vol.Exclusive("devices", "source"): vol.Any(list, str),
+                vol.Optional("concurrency", default=DEFAULT_IMPORT_CONCURRENCY): vol.All(
+                    vol.Coerce(int), vol.Range(min=1, max=256)
+                ),
+                vol.Optional("timeout", default=DEFAULT_IMPORT_TIMEOUT): vol.All(
+                    vol.Coerce(float), vol.Range(min=1, max=60)
+                ),
+            }
+        ),
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+
+def _loaded_devices(hass: HomeAssistant, entry_ids=None) -> dict:
+    """Return entry_id -> `hass.data` entry for every device with a coordinator, optionally filtered."""
+    devices = {
+        entry_id: data
+        for entry_id, data in hass.data.get(DOMAIN, {}).items()
+        if isinstance(data, dict) and "coordinator" in data
+    }
+    if entry_ids:
+        unknown = set(entry_ids) - set(devices)
+        if unknown:
+            raise HomeAssistantError(f"Unknown or unloaded Tesy entries: {', '.join(sorted(unknown))}")
+        devices = {entry_id: devices[entry_id] for entry_id in entry_ids}
+    return devices
+
+# Register the snapshot and restore services
+async def register_snapshot_services(hass: HomeAssistant):
+    """Register the snapshot and restore services."""
+    if hass.services.has_service(DOMAIN, "snapshot"):
+        return
+
+    async def handle_snapshot(call: ServiceCall):
+        snapshots = await async_get_snapshot_store(hass)
+        taken = await snapshots.async_take(call.data["name"], _loaded_devices(hass, call.data.get("entry_id")))
+        _LOGGER.info("Saved Tesy snapshot %s of %s devices", call.data["name"], len(taken))
+        return taken if call.return_response else None
+
+    async def handle_restore(call: ServiceCall):
+        snapshots = await async_get_snapshot_store(hass)
+        name = call.data["name"]
+        if name not in snapshots.snapshots:
+            raise HomeAssistantError(f"No Tesy snapshot named {name}")
+        devices = _loaded_devices(hass, call.data.get("entry_id"))
+        if not call.data.get("entry_id"):
+            # By default restore what the snapshot holds, not devices added since
+            devices = {entry_id: data for entry_id, data in devices.items() if entry_id in snapshots.snapshots[name]}
+        report = await snapshots.async_restore(hass, name, devices, call.data["concurrency"])
+        return report if call.return_response else None
+
+    hass.services.async_register(
+        DOMAIN,
+        "snapshot",
+        handle_snapshot,
+        schema=vol.Schema(
+            {
+                vol.Optional("name", default="default"): str,
+                vol.Optional("entry_id"): vol.All(cv.ensure_list, [str]),
+            }
+        ),
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+    hass.services.async_register(
+        DOMAIN,
+        "restore",
+        handle_restore,
+        schema=vol.Schema(
+            {
+                vol.Optional("name", default="default"): str,
+                vol.Optional("entry_id"): vol.All(cv.ensure_list, [str]),
+                vol.Optional("concurrency", default=DEFAULT_RESTORE_CONCURRENCY): vol.All(
+                    vol.Coerce(int), vol.Range(min=1, max=64)
+                ),
+            }
+        ),
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+
+# Register the availability report service
+async def register_availability_report_service(hass: HomeAssistant):
+    """Register the availability_report service."""
+    if hass.services.has_service(DOMAIN, "availability_report"):
+        return
+
+    async def handle_availability_report(call: ServiceCall):
+        report = {}
+        for entry_id, data in _loaded_devices(hass, call.data.get("entry_id")).items():
+            if "availability" in data:
+                report[entry_id] = {"device_name": data["device_name"], **data["availability"].report(call.data["days"])}
+        return {"days": call.data["days"], "devices": report}
+
+    hass.services.async_register(
+        DOMAIN,
+        "availability_report",
+        handle_availability_report,
+        schema=vol.Schema(
+            {
+                vol.Optional("entry_id"): vol.All(cv.ensure_list, [str]),
+                vol.Optional("days", default=30): vol.All(vol.Coerce(float), vol.Range(min=1 / 24, max=AVAILABILITY_DAYS)),
+            }
+        ),
+        supports_response=SupportsResponse.ONLY,
+    )
@@ -0,0 +1,244 @@
+"""Fleet-wide device state snapshots and minimal-write restore."""
+import asyncio
+import functools
+import logging
+from datetime import datetime
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers.storage import Store
+from homeassistant.util import dt as dt_util
+from .const import (
+    DOMAIN,
+    DATA_SNAPSHOTS,
+    ATTR_POWER,
+    ATTR_MODE,
+    ATTR_TARGET_TEMP,
+    API_OPERATION_MODES,
+    SCHEDULE_ENDPOINTS,
+    STORAGE_VERSION,
+)
+from .pytesy import TesyError
+from .scheduler import async_run_with_power_budget
+from .utils import to_float
+
+_LOGGER = logging.getLogger(__name__)
+
+VACATION_FIELDS = ("vYear", "vMonth", "vMDay", "vHour", "vTemp")
+PROGRAM_SLOTS = (1, 2, 3)
+PROGRAM_KEYS = {f"p{slot}" for slot in PROGRAM_SLOTS}
+MANUAL_MODE = API_OPERATION_MODES["Manual"]
+# Setpoints closer than this are considered equal
+SETPOINT_TOLERANCE = 0.5
+
+
+def capture(data: dict) -> dict:
+    """Return the compact restorable state of one device from coordinator data.
+
+    Programs are kept as 7 lists (Sunday first) of 24 setpoints and the
+    vacation as `[year, month, day, hour, temperature]`; anything the device
+    did not report is left out and is not touched on restore.
+    """
+    status = data.get("status") or {}
+    snapshot = {
+        "power": status.get(ATTR_POWER),
+        "mode": status.get(ATTR_MODE),
+        "setpoint": to_float(status.get(ATTR_TARGET_TEMP)),
+        "boost": status.get("boost"),
+        "lock": status.get("lockB"),
+    }
+    for slot in PROGRAM_SLOTS:
+        program = data.get(f"p{slot}")
+        if program:
+            snapshot[f"p{slot}"] = [[day.get(f"h{hour:02d}") for hour in range(24)] for day in program]
+    vacation = data.get("vacation")
+    if vacation and all(field in vacation for field in VACATION_FIELDS):
+        snapshot["vacation"] = [vacation[field] for field in VACATION_FIELDS]
+    return {key: value for key, value in snapshot.items() if value is not None}
+
+
+def _vacation_end(vacation):
+    """Return the end of a snapshot vacation as a local datetime, None if it is unset or invalid."""
+    year, month, day, hour, _ = vacation
+    try:
+        return datetime(year + 2000 if year < 100 else year, month, day, hour, tzinfo=dt_util.DEFAULT_TIME_ZONE)
+    except (TypeError, ValueError):
+        return None
+
+
+def plan_writes(target: dict, current: dict) -> list:
+    """Return the writes, in order, that take `current` to `target`.
+
+    Each write is `(field, detail)`; program writes are per day so an
+    unchanged day is never rewritten. A heater that was on is powered on
+    first and one that was off is powered off last, after its programs,
+    vacation and lock are in place. Mode, setpoint and boost only matter
+    while the heater is on, and the setpoint only in Manual mode, where it is
+    not driven by a program. A vacation is only restored while it still lies
+    ahead.
+    """
+    writes = []
+    powered = target.get("power", current.get("power"))
+    if powered == "on" and current.get("power") != "on":
+        writes.append(("power", "on"))
+
+    if powered == "on":
+        if "mode" in target and target["mode"] != current.get("mode"):
+            writes.append(("mode", target["mode"]))
+        setpoint = target.get("setpoint")
+        if (
+            setpoint is not None
+            and target.get("mode") == MANUAL_MODE
+            and (current.get("setpoint") is None or abs(setpoint - current["setpoint"]) >= SETPOINT_TOLERANCE)
+        ):
+            writes.append(("setpoint", setpoint))
+
+    for slot in PROGRAM_SLOTS:
+        key = f"p{slot}"
+        if key not in target:
+            continue
+        existing = current.get(key) or []
+        for day, setpoints in enumerate(target[key]):
+            if day >= len(existing) or existing[day] != setpoints:
+                writes.append((key, day))
+
+    vacation = target.get("vacation")
+    if vacation and vacation != current.get("vacation"):
+        end = _vacation_end(vacation)
+        if end is not None and end > dt_util.now():
+            writes.append(("vacation", vacation))
+
+    if powered == "on" and "boost" in target and target["boost"] != current.get("boost"):
+        writes.append(("boost", target["boost"]))
+    if "lock" in target and target["lock"] != current.get("lock"):
+        writes.append(("lock", target["lock"]))
+
+    if powered == "off" and current.get("power") != "off":
+        writes.append(("power", "off"))
+    return writes
+
+
+def _format_write(field, detail) -> str:
+    return f"{field}[{detail}]" if field in PROGRAM_KEYS else field
+
+
+async def async_restore_device(hass, entry_data: dict, target: dict) -> dict:
+    """Restore one device to `target` with the fewest writes, then verify it."""
+    coordinator = entry_data["coordinator"]
+    client = coordinator.client
+    entry_id = coordinator.config_entry.entry_id
+    journal = entry_data.get("journal")
+    writes = plan_writes(target, capture(coordinator.data or {}))
+    result = {"device_name": entry_data.get("device_name"), "writes": [_format_write(*write) for write in writes]}
+    if not writes:
+        result["result"] = "unchanged"
+        return result
+
+    async def send(field, detail):
+        if field == "power":
+            await client.set_power(detail == "on")
+        elif field == "mode":
+            await client.set_mode(detail)
+        elif field == "setpoint":
+            await client.set_temperature(int(detail) if float(detail).is_integer() else detail)
+        elif field == "boost":
+            await client.set_boost(detail == "1")
+        elif field == "lock":
+            await client.set_lock(detail == "on")
+        elif field == "vacation":
+            await client.set_vacation(_vacation_end(detail), detail[4])
+        else:
+            await client.set_program_day(int(field[1:]), detail, target[field][detail])
+
+    deferred = []
+    try:
+        for field, detail in writes:
+            # Powering on, mode changes and boost can start heating, so they wait for the fleet power cap
+            if (field, detail) in (("power", "on"), ("boost", "1")) or field == "mode":
+                kind = "boost" if field == "boost" else field
+                if not await async_run_with_power_budget(hass, entry_id, kind, functools.partial(send, field, detail)):
+                    deferred.append(_format_write(field, detail))
+                continue
+            await send(field, detail)
+    except (TesyError, HomeAssistantError) as err:
+        result["result"] = "failed"
+        result["error"] = str(err)
+        return result
+
+    # Newer commands supersede any intent still waiting in the offline journal
+    if journal is not None:
+        for field, kind in (
+            ("power", "power"), ("mode", "operation_mode"), ("setpoint", "temperature"), ("vacation", "vacation")
+        ):
+            if any(write[0] == field for write in writes):
+                journal.async_discard(kind)
+
+    # Verify against a fresh read of everything that was written
+    coordinator.async_invalidate(
+        *{SCHEDULE_ENDPOINTS[field] for field, _ in writes if field in SCHEDULE_ENDPOINTS}
+    )
+    await coordinator.async_request_refresh()
+    remaining = [
+        _format_write(*write)
+        for write in plan_writes(target, capture(coordinator.data or {}))
+        if _format_write(*write) not in deferred
+    ]
+    result["deferred"] = deferred
+    result["remaining"] = remaining
+    if remaining:
+        result["result"] = "mismatch"
+    elif deferred:
+        result["result"] = "deferred"
+    else:
+        result["result"] = "restored"
+    return result
+
+
+class SnapshotStore:
+    """Named fleet snapshots, `name -> entry_id -> compact device state`."""
+
+    def __init__(self, store):
+        """Initialize the snapshot store."""
+        self._store = store
+        self.snapshots = {}
+
+    async def async_load(self):
+        """Restore saved snapshots."""
+        stored = await self._store.async_load()
+        if stored:
+            self.snapshots = stored.get("snapshots", {})
+
+    async def async_take(self, name: str, devices: dict) -> dict:
+        """Capture `devices` (entry_id -> hass.data entry) from cached data and save them under `name`."""
+        taken = dt_util.utcnow().isoformat()
+        snapshot = self.snapshots.setdefault(name, {})
+        for entry_id, entry_data in devices.items():
+            coordinator = entry_data["coordinator"]
+            snapshot[entry_id] = {"taken": taken, **capture(coordinator.data or {})}
+        await self._store.async_save({"snapshots": self.snapshots})
+        return {entry_id: snapshot[entry_id] for entry_id in devices}
+
+    async def async_restore(self, hass, name: str, devices: dict, concurrency: int) -> dict:
+        """Restore `devices` from snapshot `name`, at most `concurrency` devices at a time."""
+        snapshot = self.snapshots.get(name, {})
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def restore(entry_id, entry_data):
+            target = snapshot.get(entry_id)
+            if target is None:
+                return {"device_name": entry_data.get("device_name"), "result": "missing"}
+            async with semaphore:
+                return await async_restore_device(hass, entry_data, target)
+
+        results = await asyncio.gather(*(restore(entry_id, data) for entry_id, data in devices.items()))
+        report = dict(zip(devices, results))
+        _LOGGER.info("Restored snapshot %s: %s", name, {entry_id: result["result"] for entry_id, result in report.items()})
+        return report
+
+
+async def async_get_snapshot_store(hass):
+    """Return the domain-wide snapshot store, creating it on first use."""
+    snapshots = hass.data.get(DATA_SNAPSHOTS)
+    if snapshots is None:
+        snapshots = SnapshotStore(Store(hass, STORAGE_VERSION, f"{DOMAIN}.snapshots"))
+        hass.data[DATA_SNAPSHOTS] = snapshots
+        await snapshots.async_load()
+    return snapshots
@@ -0,0 +1,177 @@
+"""Online thermal model: heating rate, standby loss and hot-water forecasts."""
+import logging
+from homeassistant.core import callback
+from homeassistant.helpers.storage import Store
+from homeassistant.util import dt as dt_util
+from .const import (
+    DOMAIN,
+    ATTR_CURRENT_TEMP,
+    ATTR_IS_HEATING,
+    ATTR_TARGET_TEMP,
+    DRAW_MIN_MIX40_DROP,
+    DRAW_MIN_TEMP_DROP,
+    STORAGE_SAVE_INTERVAL,
+    STORAGE_VERSION,
+    THERMAL_AMBIENT_TEMP,
+    THERMAL_COLD_WATER_TEMP,
+    THERMAL_FORGETTING_FACTOR,
+)
+from .utils import is_heating, throttled_saver, to_float
+
+_LOGGER = logging.getLogger(__name__)
+
+# Polls further apart than this are not used for learning (HA restart, outage)
+MAX_SAMPLE_GAP = 30 * 60
+
+
+class ThermalModel:
+    """Per-device tank model learned from successive polls.
+
+    Two scalar recursive least-squares estimators with exponential forgetting:
+
+    - heating rate `r` in °C/min, from dT/dt while the element is on
+    - loss coefficient `k` in 1/min, from dT/dt = -k * (T - T_ambient) while idle,
+      skipping intervals with a hot-water draw (a drop the draw detector
+      would count), which standby losses cannot explain
+
+    Each update is O(1) and the whole state is a handful of floats. The usable
+    tank volume is tracked from `mix40` and the tank temperature the same way.
+    """
+
+    def __init__(self, forgetting=THERMAL_FORGETTING_FACTOR):
+        """Initialize the model with no learned parameters."""
+        self._lambda = forgetting
+        self.heating_rate = None
+        self._heating_p = 1000.0
+        self.loss_coefficient = None
+        self._loss_p = 1000.0
+        self.volume = None
+        self.samples = 0
+        self._last_time = None
+        self._last_temp = None
+        self._last_mix40 = None
+        self._last_heating = None
+        self.temperature = None
+        self.target = None
+        self.heating = False
+
+    def update(self, status: dict, timestamp: float) -> None:
+        """Learn from one status payload."""
+        temperature = to_float(status.get(ATTR_CURRENT_TEMP))
+        heating = is_heating(status.get(ATTR_IS_HEATING))
+        self.target = to_float(status.get(ATTR_TARGET_TEMP))
+        mix40 = to_float(status.get("mix40"))
+        self._update_volume(temperature, mix40)
+
+        if temperature is not None and self._last_temp is not None:
+            minutes = (timestamp - self._last_time) / 60
+            # Only learn from intervals where the element state did not change
+            if 0 < minutes * 60 <= MAX_SAMPLE_GAP and heating == self._last_heating:
+                rate = (temperature - self._last_temp) / minutes
+                if heating:
+                    if rate > 0:
+                        self.heating_rate, self._heating_p = self._rls(self.heating_rate, self._heating_p, 1.0, rate)
+                else:
+                    excess = self._last_temp - THERMAL_AMBIENT_TEMP
+                    if excess > 1 and rate <= 0 and not self._is_draw(temperature, mix40):
+                        self.loss_coefficient, self._loss_p = self._rls(
+                            self.loss_coefficient, self._loss_p, excess, -rate
+                        )
+                self.samples += 1
+
+        self.temperature = temperature
+        self.heating = heating
+        self._last_time = timestamp
+        self._last_temp = temperature
+        self._last_mix40 = mix40
+        self._last_heating = heating
+
+    def _is_draw(self, temperature, mix40) -> bool:
+        """Return True if the drop since the last poll is a hot-water draw rather than standby loss."""
+        if None not in (mix40, self._last_mix40) and self._last_mix40 - mix40 >= DRAW_MIN_MIX40_DROP:
+            return True
+        return self._last_temp - temperature >= DRAW_MIN_TEMP_DROP
+
+    def _rls(self, theta, p, x, y):
+        """One step of scalar recursive least squares for y = theta * x."""
+        if theta is None:
+            return y / x, p
+        gain = p * x / (self._lambda + x * p * x)
+        theta += gain * (y - x * theta)
+        p = (p - gain * x * p) / self._lambda
+        return theta, p
+
+    def _update_volume(self, temperature, mix40):
+        """Track the equivalent tank volume from `mix40` (liters at 40 °C)."""
+        if None in (temperature, mix40) or temperature <= 40:
+            return
+        volume = mix40 * (40 - THERMAL_COLD_WATER_TEMP) / (temperature - THERMAL_COLD_WATER_TEMP)
+        self.volume = volume if self.volume is None else self.volume + 0.1 * (volume - self.volume)
+
+    @property
+    def minutes_to_target(self):
+        """Return the estimated minutes until the tank reaches the setpoint."""
+        if None in (self.temperature, self.target):
+            return None
+        if self.temperature >= self.target:
+            return 0
+        if not self.heating_rate or self.heating_rate <= 0:
+            return None
+        return round((self.target - self.temperature) / self.heating_rate)
+
+    def predict_temperature(self, minutes: float):
+        """Return the predicted tank temperature `minutes` from now."""
+        if self.temperature is None:
+            return None
+        if self.target is not None and self.temperature < self.target and self.heating_rate:
+            return min(self.target, self.temperature + self.heating_rate * minutes)
+        if self.loss_coefficient:
+            excess = self.temperature - THERMAL_AMBIENT_TEMP
+            return THERMAL_AMBIENT_TEMP + excess * max(0.0, 1 - self.loss_coefficient) ** minutes
+        return self.temperature
+
+    def liters_at_40(self, minutes: float):
+        """Return the estimated liters of 40 °C water available `minutes` from now."""
+        temperature = self.predict_temperature(minutes)
+        if temperature is None or self.volume is None:
+            return None
+        if temperature <= 40:
+            return 0
+        return round(self.volume * (temperature - THERMAL_COLD_WATER_TEMP) / (40 - THERMAL_COLD_WATER_TEMP))
+
+    def as_dict(self) -> dict:
+        """Return the learned parameters."""
+        return {
+            "heating_rate": [self.heating_rate, self._heating_p],
+            "loss_coefficient": [self.loss_coefficient, self._loss_p],
+            "volume": self.volume,
+            "samples": self.samples,
+        }
+
+    def load(self, stored: dict) -> None:
+        """Restore parameters saved by `as_dict`."""
+        self.heating_rate, self._heating_p = stored.get("heating_rate", [None, 1000.0])
+        self.loss_coefficient, self._loss_p = stored.get("loss_coefficient", [None, 1000.0])
+        self.volume = stored.get("volume")
+        self.samples = stored.get("samples", 0)
+
+
+async def async_setup_thermal_model(hass, entry, coordinator):
+    """Create the thermal model, restore what it learned and feed it every refresh."""
+    model = ThermalModel()
+    store = Store(hass, STORAGE_VERSION, f"{DOMAIN}.{entry.entry_id}.thermal")
+    stored = await store.async_load()
+    if stored:
+        model.load(stored)
+    save = throttled_saver(store, model.as_dict, STORAGE_SAVE_INTERVAL)
+
+    @callback
+    def handle_snapshot(previous, current):
+        status = current.get("status")
+        if not status or status is previous.get("status"):
+            return
+        model.update(status, dt_util.utcnow().timestamp())
+        save()
+
+    entry.async_on_unload(coordinator.async_add_snapshot_handler(handle_snapshot))
+    return model
@@ -0,0 +1,76 @@
+"""Heater transition events computed once per refresh."""
+import logging
+from homeassistant.const import CONF_DEVICE_ID
+from homeassistant.core import callback
+from homeassistant.helpers import device_registry as dr
+from .const import (
+    DOMAIN,
+    ATTR_IS_HEATING,
+    ATTR_MODE,
+    EVENT_HEATING_STARTED,
+    EVENT_HEATING_STOPPED,
+    EVENT_ERROR_RAISED,
+    EVENT_ERROR_CLEARED,
+    EVENT_MODE_CHANGED,
+    EVENT_BOOST_CHANGED,
+)
+from .utils import is_heating, is_error
+
+_LOGGER = logging.getLogger(__name__)
+
+
+def compute_transitions(previous: dict, current: dict) -> list:
+    """Return `(event_type, old, new)` for every transition between two status payloads."""
+    transitions = []
+
+    old, new = previous.get(ATTR_IS_HEATING), current.get(ATTR_IS_HEATING)
+    if old != new and None not in (old, new) and is_heating(old) != is_heating(new):
+        transitions.append((EVENT_HEATING_STARTED if is_heating(new) else EVENT_HEATING_STOPPED, old, new))
+
+    old, new = previous.get("err_flag"), current.get("err_flag")
+    if old != new and None not in (old, new) and is_error(old) != is_error(new):
+        transitions.append((EVENT_ERROR_RAISED if is_error(new) else EVENT_ERROR_CLEARED, old, new))
+
+    for key, event_type in ((ATTR_MODE, EVENT_MODE_CHANGED), ("boost", EVENT_BOOST_CHANGED)):
+        old, new = previous.get(key), current.get(key)
+        if old != new and None not in (old, new):
+            transitions.append((event_type, old, new))
+
+    return transitions
+
+
+@callback
+def async_setup_transition_events(hass, entry, coordinator, device_id):
+    """Fire transition events after every refresh; return the remove callback."""
+    ha_device_id = None
+
+    @callback
+    def handle_snapshot(previous, current):
+        nonlocal ha_device_id
+        previous_status = previous.get("status")
+        current_status = current.get("status")
+        if not previous_status or not current_status or previous_status is current_status:
+            return
+
+        transitions = compute_transitions(previous_status, current_status)
+        if not transitions:
+            return
+
+        if ha_device_id is None:
+            device = dr.async_get(hass).async_get_device(identifiers={(DOMAIN, device_id)})
+            ha_device_id = device.id if device else None
+
+        for event_type, old, new in transitions:
+            _LOGGER.debug("%s: %s -> %s", event_type, old, new)
+            hass.bus.async_fire(
+                event_type,
+                {
+                    CONF_DEVICE_ID: ha_device_id,
+                    "tesy_device_id": device_id,
+                    "entry_id": entry.entry_id,
+                    "old": old,
+                    "new": new,
+                },
+            )
+
+    return coordinator.async_add_snapshot_handler(handle_snapshot)
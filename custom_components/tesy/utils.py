@@ -1,49 +1,145 @@
-import logging
-from homeassistant.helpers.aiohttp_client import async_get_clientsession
-from .const import TESY_DEVICE_TYPES  
-
-_LOGGER = logging.getLogger(__name__)
-
-async def async_set_power(hass, api_url, value):
-    """Send a power control request."""
-    url = f"{api_url}/power?val={value}"
-    try:
-        async with async_get_clientsession(hass).get(url) as response:
-            if response.status != 200:
-                _LOGGER.error("Failed to set power to %s, Response: %s", value, await response.text())
-            return response.status == 200
-    except Exception as err:
-        _LOGGER.error("Error in async_set_power: %s", err)
-        return False
-
-
-async def async_set_temperature(hass, api_url, temperature):
-    """Set the target temperature of the water heater."""
-    url = f"{api_url}/setTemp?val={temperature}"
-    try:
-        async with async_get_clientsession(hass).get(url) as response:
-            if response.status != 200:
-                _LOGGER.error("Failed to set temperature to %s. HTTP status: %s", temperature, response.status)
-                return False
-            return True
-    except Exception as e:
-        _LOGGER.error("Error in async_set_temperature: %s", e)
-        return False
-
-async def async_set_operation_mode(hass, api_url, mode):
-    """Set the operation mode of the water heater."""
-    url = f"{api_url}/modeSW?mode={mode}"
-    try:
-        async with async_get_clientsession(hass).get(url) as response:
-            if response.status != 200:
-                _LOGGER.error("Failed to set operation mode to %s. HTTP status: %s", mode, response.status)
-                return False
-            return True
-    except Exception as e:
-        _LOGGER.error("Error in async_set_operation_mode: %s", e)
-        return False
-
-def get_tesy_device_type(devid: str) -> str:
-    """Get the device name based on the device ID."""
-    return TESY_DEVICE_TYPES.get(devid[:4], {})
-    
\ No newline at end of file
+import logging
+import time
+from datetime import datetime
+from zoneinfo import ZoneInfo
+from homeassistant.helpers.aiohttp_client import async_get_clientsession
+from .const import DATA_TRANSPORT, DOMAIN, HTTP_TIMEOUT, TESY_DEVICE_TYPES
+from .pytesy import TesyClient, TesyError
+
+_LOGGER = logging.getLogger(__name__)
+
+def get_client(hass, api_url, timeout=HTTP_TIMEOUT) -> TesyClient:
+    """Return a Tesy client for `api_url` on Home Assistant's shared session.
+
+    A transport stored under DATA_TRANSPORT, such as a pytesy cassette
+    Player, replaces HTTP so the integration can run against recorded
+    device traffic.
+    """
+    return TesyClient(
+        api_url, async_get_clientsession(hass), timeout=timeout, transport=hass.data.get(DATA_TRANSPORT)
+    )
+
+async def async_set_power(hass, api_url, value, retries=None):
+    """Send a power control request."""
+    try:
+        await get_client(hass, api_url).set_power(value == "on", retries=retries)
+        return True
+    except TesyError as err:
+        _LOGGER.error("Failed to set power to %s: %s", value, err)
+        return False
+
+
+async def async_set_temperature(hass, api_url, temperature, retries=None):
+    """Set the target temperature of the water heater."""
+    try:
+        await get_client(hass, api_url).set_temperature(temperature, retries=retries)
+        return True
+    except TesyError as e:
+        _LOGGER.error("Failed to set temperature to %s: %s", temperature, e)
+        return False
+
+async def async_set_operation_mode(hass, api_url, mode, retries=None):
+    """Set the operation mode of the water heater."""
+    try:
+        await get_client(hass, api_url).set_mode(mode, retries=retries)
+        return True
+    except TesyError as e:
+        _LOGGER.error("Failed to set operation mode to %s: %s", mode, e)
+        return False
+
+async def async_set_boost(hass, api_url, on: bool):
+    """Switch boost mode on or off."""
+    try:
+        await get_client(hass, api_url).set_boost(on)
+        return True
+    except TesyError as e:
+        _LOGGER.error("Failed to set boost mode to %s: %s", on, e)
+        return False
+
+async def async_set_lock(hass, api_url, state: str):
+    """Switch the child lock "on" or "off"."""
+    try:
+        await get_client(hass, api_url).set_lock(state == "on")
+        return True
+    except TesyError as e:
+        _LOGGER.error("Failed to set child lock to %s: %s", state, e)
+        return False
+
+async def async_set_program(hass, api_url, slot: int, program):
+    """Write a weekly program (7 days, Sunday first, of 24 setpoints) to program slot 1-3."""
+    try:
+        await get_client(hass, api_url).set_program(slot, program)
+        return True
+    except TesyError as e:
+        _LOGGER.error("Failed to write program P%s: %s", slot, e)
+        return False
+
+async def async_set_device_time(hass, api_url, time_zone):
+    """Set the device clock to the current time in `time_zone`."""
+    local_time = datetime.now(ZoneInfo(time_zone))
+    try:
+        await get_client(hass, api_url).set_date(time_zone, local_time)
+    except TesyError as e:
+        _LOGGER.error("Failed to update device time: %s", e)
+        return False
+    _LOGGER.info("Successfully updated device time to %s", local_time)
+    return True
+
+def get_entry_data_by_url(hass, api_url):
+    """Return the `hass.data` entry whose device answers at `api_url`."""
+    for value in hass.data.get(DOMAIN, {}).values():
+        if isinstance(value, dict) and value.get("api_url") == api_url:
+            return value
+    return None
+
+def get_entry_data(hass, entry_id=None):
+    """Return the `hass.data` entry for `entry_id`, or the only entry if omitted."""
+    entries = {key: value for key, value in hass.data.get(DOMAIN, {}).items() if isinstance(value, dict)}
+    if entry_id is not None:
+        return entries.get(entry_id)
+    if len(entries) == 1:
+        return next(iter(entries.values()))
+    return None
+
+def get_tesy_device_type(devid: str) -> str:
+    """Get the device name based on the device ID."""
+    return TESY_DEVICE_TYPES.get(devid[:4], {})
+    
+
+def is_heating(heater_state) -> bool:
+    """Return True if a `heater_state` value means the element is heating."""
+    return str(heater_state).strip().upper() in ("HEATING", "ON", "1")
+
+def is_error(err_flag) -> bool:
+    """Return True if an `err_flag` value reports an error."""
+    return bool(str(err_flag or "").strip().strip("0"))
+
+def to_float(value):
+    """Convert a payload value to float, returning None if it is not numeric."""
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def throttled_saver(store, data_func, interval):
+    """Return a callback that persists `store` at most once every `interval` seconds.
+
+    `Store.async_delay_save` restarts its timer on every call, so calling it
+    once per poll with a longer delay never writes while the device is being
+    polled. The callback writes as soon as `interval` has passed since the
+    last write and otherwise leaves a delayed save pending, which also
+    flushes the latest state when polling stops or Home Assistant shuts down.
+    """
+    saved_at = time.monotonic()
+
+    def changed():
+        nonlocal saved_at
+        now = time.monotonic()
+        if now - saved_at >= interval:
+            saved_at = now
+            store.async_delay_save(data_func, 0)
+        else:
+            store.async_delay_save(data_func, interval)
+
+    return changed
@@ -1,4 +1,3 @@
-import asyncio
 import logging
 from datetime import datetime
 import pytz
@@ -28,9 +27,14 @@ from .const import (
     ATTR_CURRENT_TEMP,
     ATTR_TARGET_TEMP,
     ATTR_LAST_OPERATION_MODE,
+    DATA_LOAD_SCHEDULER,
     DOMAIN,
+    CONF_STATE_HEARTBEAT,
+    DEFAULT_STATE_HEARTBEAT,
 )
+from .filters import StateFilterMixin, make_state_filter
 from .utils import async_set_power, async_set_temperature, async_set_operation_mode
+from .scheduler import async_run_with_power_budget
 from .services import register_set_vacation_mode_service
 
 _LOGGER = logging.getLogger(__name__)
@@ -53,7 +57,11 @@ async def async_setup_entry(hass, config_entry, async_add_entities):
     min_temp = data.get("min_setpoint")
     max_temp = data.get("max_setpoint")
 
-    async_add_entities([TesyWaterHeater(coordinator, api_url, device_id, device_name, min_temp, max_temp)])
+    water_heater = TesyWaterHeater(coordinator, api_url, device_id, device_name, min_temp, max_temp)
+    water_heater.state_filter = make_state_filter(
+        "status", ATTR_CURRENT_TEMP, config_entry.options.get(CONF_STATE_HEARTBEAT, DEFAULT_STATE_HEARTBEAT)
+    )
+    async_add_entities([water_heater])
 
     # Check and warn about missing UI helpers
     await check_ui_helpers(hass, config_entry.entry_id)
@@ -80,7 +88,7 @@ async def check_ui_helpers(hass, entry_id):
             temp_after_vacation_entity_id
         )
 
-class TesyWaterHeater(CoordinatorEntity, WaterHeaterEntity):
+class TesyWaterHeater(StateFilterMixin, CoordinatorEntity, WaterHeaterEntity):
     """Representation of the Tesy Water Heater."""
 
     _attr_supported_features = TESY_SUPPORTED_FEATURES
@@ -88,7 +96,7 @@ class TesyWaterHeater(CoordinatorEntity, WaterHeaterEntity):
 
     def __init__(self, coordinator, api_url, device_id, device_name, min_temp, max_temp):
         """Initialize the Tesy Water Heater."""
-        super().__init__(coordinator)
+        super().__init__(coordinator, "status")
         self._api_url = api_url
         self._device_id = device_id
         self._device_name = device_name or "Tesy Generic Water Heater"
@@ -115,6 +123,12 @@ class TesyWaterHeater(CoordinatorEntity, WaterHeaterEntity):
             "sw_version": sw_version,
         }
 
+    @property
+    def _journal(self):
+        """Return the offline command journal of this device."""
+        data = self.hass.data[DOMAIN].get(self.coordinator.config_entry.entry_id, {})
+        return data.get("journal")
+
     @property
     def state(self):
         """Return the hassio state of the water heater."""
@@ -130,12 +144,22 @@ class TesyWaterHeater(CoordinatorEntity, WaterHeaterEntity):
     @property
     def current_temperature(self):
         """Return the current temperature."""
+        if self.state_filter is not None:
+            return self.state_filter.value
+        return self._filtered_reading()
+
+    def _filtered_reading(self):
+        """Return the measured temperature from the latest status."""
         try:
             return float(self.coordinator.data.get("status", {}).get(ATTR_CURRENT_TEMP))
         except (ValueError, TypeError):
             _LOGGER.error("Invalid current temperature value.")
             return None
 
+    def _unfiltered_signature(self):
+        """Return everything except the current temperature that must be written at once."""
+        return (self.available, self.state, self.target_temperature, self.is_away_mode_on)
+
     @property
     def target_temperature(self):
         """Return the temperature we are trying to reach."""
@@ -195,25 +219,29 @@ class TesyWaterHeater(CoordinatorEntity, WaterHeaterEntity):
             _LOGGER.error("No temperature specified.")
             return
 
-        for attempt in range(3):
-            if await async_set_temperature(self.coordinator.hass, self._api_url, temperature):
-                break
-            _LOGGER.warning(f"Failed to set temperature, retrying... (Attempt {attempt + 1}/3)")
-            await asyncio.sleep(1)
-        else:
-            _LOGGER.error("Failed to set temperature after retries.")
+        manual_mode = API_OPERATION_MODES.get("Manual")
+        # No retries here: while the device is unreachable the journal retries on every poll
+        if not await async_set_temperature(self.coordinator.hass, self._api_url, temperature, retries=0):
+            # Replay manual mode and the setpoint once the device answers again
+            if self._journal is not None:
+                self._journal.async_record("operation_mode", {"mode": manual_mode})
+                self._journal.async_record("temperature", {"temperature": temperature})
+            return
 
         # Switch to manual mode if needed
-        manual_mode = API_OPERATION_MODES.get("Manual")
         if self.coordinator.data.get("status", {}).get("mode") != manual_mode:
             success = await async_set_operation_mode(self.coordinator.hass, self._api_url, manual_mode)
             if not success:
                 _LOGGER.error("Failed to switch to manual mode.")
                 return
+            if self._journal is not None:
+                self._journal.async_discard("operation_mode")
 
         success = await async_set_temperature(self.coordinator.hass, self._api_url, temperature)
         if not success:
             _LOGGER.error("Failed to set temperature to %s", temperature)
+        elif self._journal is not None:
+            self._journal.async_discard("temperature")
 
         await self.async_update()
 
@@ -226,39 +254,72 @@ class TesyWaterHeater(CoordinatorEntity, WaterHeaterEntity):
             await self.async_turn_off()
             return
 
+        async def apply_and_refresh():
+            if await self._async_apply_operation_mode(operation_mode):
+                await self.async_update()
+
+        # Mode changes can start heating, so they go through the fleet power cap
+        await async_run_with_power_budget(
+            self.hass, self.coordinator.config_entry.entry_id, "mode", apply_and_refresh
+        )
+
+    async def _async_apply_operation_mode(self, operation_mode: str) -> bool:
+        """Send the operation mode to the device without refreshing."""
         valid_modes = self.operation_list
         if operation_mode not in valid_modes:
             _LOGGER.error("Invalid operation mode: %s. Valid modes are: %s", operation_mode, ", ".join(valid_modes))
-            return
+            return False
 
         mode = API_OPERATION_MODES.get(operation_mode)
         if not mode:
             _LOGGER.error("Invalid operation mode mapping: %s", operation_mode)
-            return
+            return False
 
-        if not await async_set_operation_mode(self.coordinator.hass, self._api_url, mode):
+        if not await async_set_operation_mode(self.coordinator.hass, self._api_url, mode, retries=0):
             _LOGGER.error("Failed to set operation mode: %s", operation_mode)
-            return
-
-        await self.async_update()
+            if self._journal is not None:
+                self._journal.async_record("operation_mode", {"mode": mode})
+            return False
+        if self._journal is not None:
+            self._journal.async_discard("operation_mode")
+        return True
 
     async def async_turn_on(self):
-        """Turn the water heater on."""
-        if await async_set_power(self.coordinator.hass, self._api_url, "on"):
+        """Turn the water heater on, deferred while the fleet power cap is reached."""
+        await async_run_with_power_budget(
+            self.hass, self.coordinator.config_entry.entry_id, "power", self._async_power_on
+        )
+
+    async def _async_power_on(self):
+        """Power the water heater on and restore its last operation mode."""
+        if await async_set_power(self.coordinator.hass, self._api_url, "on", retries=0):
+            if self._journal is not None:
+                self._journal.async_discard("power")
             last_mode = self.coordinator.data.get("status", {}).get(ATTR_LAST_OPERATION_MODE)
             if last_mode:
-                await self.async_set_operation_mode(
+                # Restore the mode without a refresh of its own; one refresh follows below
+                await self._async_apply_operation_mode(
                     next((k for k, v in API_OPERATION_MODES.items() if v == last_mode), "Manual")
                 )
         else:
             _LOGGER.error("Failed to turn on the water heater.")
+            if self._journal is not None:
+                self._journal.async_record("power", {"on": True})
 
         await self.async_update()
 
     async def async_turn_off(self):
         """Turn the water heater off."""
-        if not await async_set_power(self.coordinator.hass, self._api_url, "off"):
+        scheduler = self.hass.data.get(DATA_LOAD_SCHEDULER)
+        if scheduler is not None:
+            for kind in ("power", "mode"):
+                scheduler.async_cancel(self.coordinator.config_entry.entry_id, kind)
+        if not await async_set_power(self.coordinator.hass, self._api_url, "off", retries=0):
             _LOGGER.error("Failed to turn off the water heater.")
+            if self._journal is not None:
+                self._journal.async_record("power", {"on": False})
+        elif self._journal is not None:
+            self._journal.async_discard("power")
         await self.async_update()
 
     async def async_update(self):
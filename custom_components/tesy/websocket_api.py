@@ -0,0 +1,116 @@
+"""Websocket subscription to compact, diffed fleet snapshots."""
+import logging
+import voluptuous as vol
+from homeassistant.components import websocket_api
+from homeassistant.core import callback
+from homeassistant.helpers.dispatcher import async_dispatcher_connect
+from .const import (
+    DOMAIN,
+    ATTR_POWER,
+    ATTR_MODE,
+    ATTR_CURRENT_TEMP,
+    ATTR_TARGET_TEMP,
+    ATTR_IS_HEATING,
+    SIGNAL_FLEET_UPDATED,
+)
+from .utils import is_heating, to_float
+
+_LOGGER = logging.getLogger(__name__)
+
+
+def compact_state(device: dict) -> dict:
+    """Return the compact dashboard view of one device."""
+    coordinator = device["coordinator"]
+    status = (coordinator.data or {}).get("status", {})
+    fetched = coordinator.fetch_times.get("status")
+    return {
+        "name": device.get("device_name"),
+        "power": status.get(ATTR_POWER),
+        "mode": status.get(ATTR_MODE),
+        "temp": to_float(status.get(ATTR_CURRENT_TEMP)),
+        "target": to_float(status.get(ATTR_TARGET_TEMP)),
+        "watts": to_float(status.get("watts")),
+        "heating": is_heating(status.get(ATTR_IS_HEATING)),
+        "boost": status.get("boost"),
+        # UTC timestamp of the last answered status poll; clients derive the age from it
+        "updated": round(fetched[1]) if fetched else None,
+        "stale": not coordinator.last_update_success or "status" in coordinator.missing_endpoints,
+    }
+
+
+def _fleet(hass) -> dict:
+    """Return entry_id -> hass.data entry for every device with a coordinator."""
+    return {
+        entry_id: device
+        for entry_id, device in hass.data.get(DOMAIN, {}).items()
+        if isinstance(device, dict) and "coordinator" in device
+    }
+
+
+@websocket_api.websocket_command({vol.Required("type"): "tesy/subscribe"})
+@callback
+def websocket_subscribe(hass, connection, msg):
+    """Send a fleet snapshot, then one diff message per device refresh.
+
+    Diff messages map an entry_id to the fields that changed, to its full
+    state for a new device, or to None for a removed one.
+    """
+    msg_id = msg["id"]
+    sent = {}
+    unsub_devices = {}
+
+    @callback
+    def send_diff(entry_id):
+        device = _fleet(hass).get(entry_id)
+        if device is None:
+            return
+        state = compact_state(device)
+        previous = sent.get(entry_id)
+        sent[entry_id] = state
+        if previous is None:
+            changes = state
+        else:
+            changes = {key: value for key, value in state.items() if previous.get(key) != value}
+        if changes:
+            connection.send_message(websocket_api.event_message(msg_id, {"diff": {entry_id: changes}}))
+
+    @callback
+    def sync_fleet():
+        fleet = _fleet(hass)
+        for entry_id in list(unsub_devices):
+            if entry_id not in fleet or unsub_devices[entry_id][0] is not fleet[entry_id]["coordinator"]:
+                unsub_devices.pop(entry_id)[1]()
+                if entry_id not in fleet:
+                    sent.pop(entry_id, None)
+                    connection.send_message(websocket_api.event_message(msg_id, {"diff": {entry_id: None}}))
+        for entry_id, device in fleet.items():
+            if entry_id not in unsub_devices:
+                coordinator = device["coordinator"]
+                unsub_devices[entry_id] = (
+                    coordinator,
+                    # Same group context as the entities: only status changes and availability flips
+                    coordinator.async_add_listener(lambda entry_id=entry_id: send_diff(entry_id), "status"),
+                )
+                send_diff(entry_id)
+
+    sent.update({entry_id: compact_state(device) for entry_id, device in _fleet(hass).items()})
+    snapshot = dict(sent)
+    sync_fleet()
+    unsub_signal = async_dispatcher_connect(hass, SIGNAL_FLEET_UPDATED, sync_fleet)
+
+    @callback
+    def unsubscribe():
+        unsub_signal()
+        for _, unsub in unsub_devices.values():
+            unsub()
+        unsub_devices.clear()
+
+    connection.subscriptions[msg_id] = unsubscribe
+    connection.send_result(msg_id)
+    connection.send_message(websocket_api.event_message(msg_id, {"snapshot": snapshot}))
+
+
+@callback
+def async_setup_websocket_api(hass) -> None:
+    """Register the websocket commands."""
+    websocket_api.async_register_command(hass, websocket_subscribe)
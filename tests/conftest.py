@@ -0,0 +1,11 @@
+"""Shared test setup.
+
+The integration modules need Home Assistant; `pytesy` does not and is also
+importable on its own, the way `python -m pytesy` runs it.
+"""
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.append(os.path.join(ROOT, "custom_components", "tesy"))
@@ -0,0 +1,73 @@
+"""Replay recorded device sessions through the client."""
+import asyncio
+
+import pytest
+
+from pytesy import Cassette, CassetteMissError, Player, Recorder, TesyClient
+from pytesy.exceptions import TesyConnectionError, TesyResponseError, TesyTimeoutError
+
+HOST = "http://192.168.1.50"
+
+STATUS = '{"power_sw":"on","gradus":"55","ref_gradus":"60","mode":"1","watts":"2400","boost":"0"}'
+
+
+def _session():
+    """A heater that times out once, then answers; devstat drops the connection."""
+    cassette = Cassette()
+    cassette.append(HOST, "status", None, 3.0, error="timeout")
+    cassette.append(HOST, "status", None, 0.12, 200, STATUS.encode())
+    cassette.append(HOST, "setTemp", {"val": 65}, 0.08, 200, b'{"resp":"OK"}')
+    cassette.append(HOST, "modeSW", {"mode": "2"}, 0.09, 500, b"")
+    cassette.append(HOST, "devstat", None, 0.5, error="connection")
+    return cassette
+
+
+def _client(cassette, **kwargs):
+    return TesyClient(HOST, transport=Player(cassette, time_scale=0), retry_backoff=0, **kwargs)
+
+
+def test_replay_retries_past_a_recorded_timeout():
+    async def run():
+        client = _client(_session(), retries=1)
+        status = await client.status()
+        await client.set_temperature(65)
+        return status, client.transport.served
+
+    status, served = asyncio.run(run())
+    assert status["gradus"] == 55.0
+    assert status["ref_gradus"] == 60.0
+    assert status["power_sw"] == "on"
+    assert served == 3
+
+
+def test_replay_maps_recorded_failures_to_client_errors():
+    async def run():
+        client = _client(_session(), retries=0)
+        with pytest.raises(TesyTimeoutError):
+            await client.status()
+        with pytest.raises(TesyResponseError) as err:
+            await client.set_mode("2")
+        assert err.value.status == 500
+        with pytest.raises(TesyConnectionError):
+            await client.devstat()
+        with pytest.raises(CassetteMissError):
+            await client.calc_res()
+
+    asyncio.run(run())
+
+
+def test_recorded_session_round_trips_through_a_file(tmp_path):
+    async def run():
+        # Record the replayed session again, as if it came from a device
+        recorded = Cassette()
+        recorder = TesyClient(HOST, transport=Recorder(recorded, Player(_session())), retry_backoff=0, retries=1)
+        await recorder.status()
+        recorded.save(tmp_path / "heater.json")
+
+        client = _client(Cassette.load(tmp_path / "heater.json"), retries=1)
+        return recorded, await client.status()
+
+    recorded, status = asyncio.run(run())
+    assert [interaction.get("error") for interaction in recorded.interactions] == ["timeout", None]
+    assert recorded.hosts == [HOST]
+    assert status["watts"] == 2400.0
@@ -0,0 +1,47 @@
+"""Tests for the online thermal model."""
+import pytest
+
+pytest.importorskip("homeassistant")
+
+from custom_components.tesy.thermal import ThermalModel  # pylint: disable=wrong-import-position
+
+
+def _idle(model, minute, temperature, mix40):
+    model.update(
+        {"gradus": str(temperature), "ref_gradus": "60", "heater_state": "READY", "mix40": str(mix40)},
+        minute * 60.0,
+    )
+
+
+def _learn_standby(model, minutes=range(0, 600, 10)):
+    """Cool a tank from 60 °C at k = 0.0005/min, polled every 10 minutes."""
+    temperature = 60.0
+    for minute in minutes:
+        _idle(model, minute, round(temperature, 2), round(temperature * 2.5))
+        temperature -= 0.0005 * (temperature - 20) * 10
+    return temperature
+
+
+def test_standby_loss_is_learned():
+    model = ThermalModel()
+    _learn_standby(model)
+    assert model.loss_coefficient == pytest.approx(0.0005, rel=0.05)
+
+
+def test_draw_between_idle_samples_leaves_loss_coefficient_unchanged():
+    model = ThermalModel()
+    temperature = _learn_standby(model)
+    learned = model.loss_coefficient
+
+    # A shower: 6 °C and 40 liters of 40 °C water gone within one poll
+    _idle(model, 600, round(temperature - 6, 2), round((temperature - 6) * 2.5) - 40)
+    assert model.loss_coefficient == learned
+
+
+def test_draw_without_mix40_is_skipped():
+    model = ThermalModel()
+    model.update({"gradus": "60", "heater_state": "READY"}, 0)
+    model.update({"gradus": "59.9", "heater_state": "READY"}, 600)
+    learned = model.loss_coefficient
+    model.update({"gradus": "55", "heater_state": "READY"}, 1200)
+    assert model.loss_coefficient == learned